@@ -0,0 +1,295 @@
+import sys
+import json
+import time
+import queue
+import select
+import logging
+import threading
+import subprocess
+from concurrent.futures import Future
+from metrics import counter, timer
+
+# JXA program run by the persistent osascript process. It reads one JSON
+# batch per line from stdin, runs the actions and answers with one JSON line.
+# Instead of fixed delays it waits for the condition an action depends on
+# (the app being frontmost, the clipboard holding the text).
+JXA_SERVER = r"""
+ObjC.import('Foundation');
+
+var KEY_CODES = {'return': 36, 'enter': 76, 'tab': 48, 'escape': 53, 'space': 49, 'delete': 51};
+
+function waitFor(check, timeout) {
+    var deadline = Date.now() + timeout * 1000;
+    while (!check()) {
+        if (Date.now() > deadline) { throw new Error('Timed out waiting'); }
+        delay(0.01);
+    }
+}
+
+function run() {
+    var systemEvents = Application('System Events');
+    var app = Application.currentApplication();
+    app.includeStandardAdditions = true;
+    var stdin = $.NSFileHandle.fileHandleWithStandardInput;
+    var stdout = $.NSFileHandle.fileHandleWithStandardOutput;
+    var buffer = '';
+
+    function reply(result) {
+        stdout.writeData($(JSON.stringify(result) + '\n').dataUsingEncoding($.NSUTF8StringEncoding));
+    }
+
+    function modifiers(names) {
+        return (names || []).map(function (name) { return name + ' down'; });
+    }
+
+    function perform(action) {
+        switch (action.action) {
+        case 'focus':
+            var target = systemEvents.processes.byName(action.app);
+            if (!target.frontmost()) {
+                target.frontmost = true;
+                waitFor(function () { return target.frontmost(); }, action.timeout || 2);
+            }
+            break;
+        case 'click':
+            // Screen coordinates; lands on whichever app is frontmost
+            systemEvents.click({at: [action.x, action.y]});
+            break;
+        case 'paste':
+            app.setTheClipboardTo(action.text);
+            waitFor(function () { return app.theClipboard() === action.text; }, 1);
+            systemEvents.keystroke('v', {using: ['command down']});
+            break;
+        case 'key':
+            if (KEY_CODES.hasOwnProperty(action.key)) {
+                systemEvents.keyCode(KEY_CODES[action.key], {using: modifiers(action.modifiers)});
+            } else {
+                systemEvents.keystroke(action.key, {using: modifiers(action.modifiers)});
+            }
+            break;
+        case 'delay':
+            delay(action.seconds);
+            break;
+        default:
+            throw new Error('Unknown action ' + action.action);
+        }
+    }
+
+    while (true) {
+        var data = stdin.availableData;
+        if (data.length === 0) { break; }
+        buffer += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+        var newline;
+        while ((newline = buffer.indexOf('\n')) >= 0) {
+            var line = buffer.slice(0, newline);
+            buffer = buffer.slice(newline + 1);
+            var batch = JSON.parse(line);
+            try {
+                batch.actions.forEach(perform);
+                reply({id: batch.id, ok: true});
+            } catch (e) {
+                reply({id: batch.id, ok: false, error: String(e)});
+            }
+        }
+    }
+}
+"""
+
+
+def focus(app):
+    """Bring `app` to the front, waiting until it actually is."""
+    return {"action": "focus", "app": app}
+
+
+def click(x, y):
+    return {"action": "click", "x": int(x), "y": int(y)}
+
+
+def paste(text):
+    """Put `text` on the clipboard and press Command+V."""
+    return {"action": "paste", "text": text}
+
+
+def key(name, modifiers=()):
+    """Press a key ("return", "tab", ... or a character) with optional modifiers ("command", "shift", ...)."""
+    return {"action": "key", "key": name, "modifiers": list(modifiers)}
+
+
+def pause(seconds):
+    return {"action": "delay", "seconds": seconds}
+
+
+class ActionBackend:
+    """Runs a batch of actions. Subclasses talk to the real input system."""
+
+    name = "base"
+
+    def run_batch(self, actions):
+        """Perform `actions` in order; returns True on success."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class JXABackend(ActionBackend):
+    """One long-lived `osascript -l JavaScript` process fed batches over a pipe.
+
+    The process is started on the first batch and restarted if it dies, so
+    the interpreter start-up cost is paid once instead of per action.
+    """
+
+    name = "jxa"
+
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+        self.process = None
+        self.next_id = 1
+
+    def _start(self):
+        self.process = subprocess.Popen(
+            ["osascript", "-l", "JavaScript", "-e", JXA_SERVER],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+        logging.info(f"Started osascript action server (PID {self.process.pid})")
+
+    def _read_reply(self, batch_id):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("No reply from osascript")
+            readable, _, _ = select.select([self.process.stdout], [], [], remaining)
+            if not readable:
+                continue
+            line = self.process.stdout.readline()
+            if not line:
+                raise ConnectionError("osascript exited")
+            reply = json.loads(line)
+            if reply.get("id") == batch_id:
+                return reply
+
+    def run_batch(self, actions):
+        batch_id = self.next_id
+        self.next_id += 1
+        payload = json.dumps({"id": batch_id, "actions": actions}) + "\n"
+
+        # One retry covers an action server that died since the last batch
+        for _ in range(2):
+            if self.process is None or self.process.poll() is not None:
+                self._start()
+            try:
+                self.process.stdin.write(payload)
+                self.process.stdin.flush()
+            except (BrokenPipeError, OSError):
+                self.close()
+                continue
+            try:
+                reply = self._read_reply(batch_id)
+            except (TimeoutError, ConnectionError, ValueError) as e:
+                # The batch may have been partly performed; do not repeat it
+                logging.error(f"Action batch {batch_id} failed: {str(e)}")
+                self.close()
+                return False
+            if not reply.get("ok"):
+                logging.error(f"Action batch {batch_id} failed: {reply.get('error')}")
+            return bool(reply.get("ok"))
+        return False
+
+    def close(self):
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+                self.process.wait(1)
+            except Exception:
+                self.process.kill()
+            self.process = None
+
+
+class RecordingBackend(ActionBackend):
+    """Stores batches instead of performing them, for Linux and tests."""
+
+    name = "recording"
+
+    def __init__(self):
+        self.batches = []
+
+    def run_batch(self, actions):
+        self.batches.append((time.time(), [dict(action) for action in actions]))
+        return True
+
+
+def default_backend():
+    if sys.platform == "darwin":
+        return JXABackend()
+    logging.warning("No input backend for this platform, recording actions instead")
+    return RecordingBackend()
+
+
+class ActionExecutor:
+    """Queue of action batches run in order by one worker thread on one backend.
+
+    `submit` returns a Future for the batch's result; `run` waits for it.
+    Batches from several components (orchestrator mode) are serialised, so
+    their clicks and keystrokes never interleave.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or default_backend()
+        self.queue = queue.Queue()
+        self.worker = None
+        self._lock = threading.Lock()
+        self.action_time = timer("action_seconds", backend=self.backend.name)
+        self.queue_time = timer("action_queue_seconds", backend=self.backend.name)
+        self.failures = counter("action_failures_total", backend=self.backend.name)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._work, name="action-executor", daemon=True)
+                self.worker.start()
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            actions, future, submitted = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            start = time.perf_counter()
+            self.queue_time.observe(start - submitted)
+            try:
+                ok = self.backend.run_batch(actions)
+            except Exception as e:
+                ok = False
+                future.set_exception(e)
+            else:
+                future.set_result(ok)
+            self.action_time.observe(time.perf_counter() - start)
+            if not ok:
+                self.failures.inc()
+
+    def submit(self, actions):
+        future = Future()
+        self._ensure_worker()
+        self.queue.put((list(actions), future, time.perf_counter()))
+        return future
+
+    def run(self, actions, timeout=None):
+        """Run a batch and return True if it succeeded."""
+        try:
+            return self.submit(actions).result(timeout)
+        except Exception as e:
+            logging.error(f"Error running actions: {str(e)}")
+            return False
+
+    def close(self):
+        if self.worker is not None:
+            self.queue.put(None)
+            self.worker.join()
+            self.worker = None
+        self.backend.close()
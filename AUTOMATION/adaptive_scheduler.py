@@ -0,0 +1,84 @@
+import time
+import logging
+from collections import deque
+from metrics import counter, gauge, timer
+
+
+class AdaptiveScheduler:
+    """Decide how long a component loop sleeps between checks.
+
+    After a check that saw activity (motion, blue, a click signal) the
+    interval drops back to `min_interval`; every idle check stretches it by
+    `backoff` up to `max_interval`. Sleeps end early when the kill switch
+    fires. All timing uses the monotonic clock. The effective check rate
+    over the last `window` seconds is logged every `report_interval`
+    seconds.
+
+    Loop lag (how late each check started against its scheduled time),
+    check counts and the current interval go to the metrics registry.
+    """
+
+    def __init__(self, name, min_interval=0.1, max_interval=1.0, backoff=1.5, window=60, report_interval=60):
+        self.name = name
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.window = window
+        self.report_interval = report_interval
+        self.interval = min_interval
+        self.next_time = time.monotonic()
+        self.checks = deque()
+        self.next_report = time.monotonic() + report_interval
+        self.loop_lag = timer("loop_lag_seconds", component=name)
+        self.checks_total = counter("checks_total", component=name)
+        self.active_total = counter("active_checks_total", component=name)
+        self.interval_gauge = gauge("check_interval_seconds", component=name)
+
+    def set_intervals(self, min_interval, max_interval):
+        """Change the interval bounds (e.g. after a config reload), keeping the current interval inside them."""
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min(max_interval, max(min_interval, self.interval))
+        self.interval_gauge.set(self.interval)
+
+    def record(self, active):
+        """Register one check and whether it saw activity; sets the next check time."""
+        now = time.monotonic()
+        self.checks_total.inc()
+        if active:
+            self.active_total.inc()
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+        self.interval_gauge.set(self.interval)
+        self.next_time = now + self.interval
+
+        self.checks.append(now)
+        while self.checks and self.checks[0] < now - self.window:
+            self.checks.popleft()
+        if now >= self.next_report:
+            self.next_report = now + self.report_interval
+            logging.info(f"{self.name}: {self.rate():.2f} checks/s, current interval {self.interval:.2f}s")
+
+    def check_started(self):
+        """Call when a check begins; how late it is against `next_time` is recorded as loop lag."""
+        self.loop_lag.observe(max(0.0, time.monotonic() - self.next_time))
+
+    def rate(self):
+        """Checks per second over the recent window."""
+        if len(self.checks) < 2:
+            return 0.0
+        span = self.checks[-1] - self.checks[0]
+        return (len(self.checks) - 1) / span if span > 0 else 0.0
+
+    def remaining(self):
+        """Seconds until the next check is due (0 if it is overdue)."""
+        return max(0.0, self.next_time - time.monotonic())
+
+    def sleep(self):
+        """Sleep until the next check is due or the kill switch fires."""
+        from kill_switch import get_kill_switch
+
+        delay = self.remaining()
+        if delay > 0:
+            get_kill_switch().wait(delay)
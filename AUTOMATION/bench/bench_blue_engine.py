@@ -0,0 +1,60 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+"""Compare the vectorized blue classifier with the old per-pixel loop."""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blue_engine import count_blue_pixels, is_blue_region
+
+
+def legacy_is_blue_present(img_array):
+    """The original nested-loop check from BlueDetector.is_blue_present."""
+    for row in img_array:
+        for pixel in row:
+            r, g, b = pixel[:3]
+            if int(b) > 150 and int(b) > (int(r) + 30) and int(b) > (int(g) + 30):
+                return True
+    return False
+
+
+def synthetic_frame(size=60, blue_pixels=0, seed=0):
+    """Grey-ish noise frame with `blue_pixels` blue pixels near the bottom right."""
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(90, 140, size=(size, size, 3), dtype=np.uint8)
+    for i in range(blue_pixels):
+        frame[size - 1 - (i // size), size - 1 - (i % size)] = (20, 60, 230)
+    return frame
+
+
+def time_call(func, frame, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(frame)
+    return (time.perf_counter() - start) / repeat
+
+
+def run(size=60, repeat=200):
+    """Return per-call timings (seconds) for a frame without blue, the worst case."""
+    frame = synthetic_frame(size)
+    assert legacy_is_blue_present(frame) == is_blue_region(frame)
+    blue = synthetic_frame(size, blue_pixels=5)
+    assert legacy_is_blue_present(blue) == is_blue_region(blue)
+    assert count_blue_pixels(blue) == 5
+
+    legacy_repeat = max(1, repeat // 20)
+    return {
+        "size": size,
+        "legacy_s": time_call(legacy_is_blue_present, frame, legacy_repeat),
+        "vectorized_s": time_call(is_blue_region, frame, repeat),
+    }
+
+
+if __name__ == "__main__":
+    for size in (30, 60, 120):
+        result = run(size)
+        speedup = result["legacy_s"] / result["vectorized_s"]
+        print(f"{size}x{size}: legacy {result['legacy_s'] * 1e3:.3f} ms | "
+              f"vectorized {result['vectorized_s'] * 1e3:.3f} ms | {speedup:.0f}x faster")
@@ -0,0 +1,96 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+"""Measure how much work per-ROI fingerprints save in each detector.
+
+Every detector is timed on a still screen, where each ROI matches its
+previous fingerprint and classification or diffing is skipped. It is
+then timed on a screen that changes on every grab, where every lookup
+misses and the fingerprint is pure overhead. The cost of the fingerprint
+itself and the hit rates are reported too. InstructionTyper has no cache
+of its own; its hits are the motion engine's unchanged bands.
+"""
+import os
+import sys
+import time
+import logging
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_source import SyntheticFrameSource
+from frame_hash import fingerprint, HASH_NAME
+from blue_detector import BlueDetector
+from motion_detector import MotionDetector
+from instruction_typer import InstructionTyper
+from action_executor import ActionExecutor, RecordingBackend
+from signal_bus import LocalSignalChannel
+from config import StaticConfig
+
+
+def build(name, source):
+    """Return (detect, cache) for one detector reading from `source`; `cache` counts hits and misses."""
+    config = StaticConfig()
+    if name == "blue_detector":
+        detector = BlueDetector(frame_source=source, click_sender=LocalSignalChannel("click_positions"), config=config)
+        return detector.detect_blue_positions, detector.fingerprints
+    if name == "motion_detector":
+        detector = MotionDetector(frame_source=source, motion_sender=LocalSignalChannel("motion_status"), config=config)
+        return detector.detect_motion, detector.fingerprints
+    detector = InstructionTyper(frame_source=source, action_executor=ActionExecutor(RecordingBackend()),
+                                screen_size=(source.width, source.height), config=config)
+    return detector.detect_motion, detector.motion_engine
+
+
+def time_detect(name, motion_every, count):
+    """Mean seconds per detection pass and the hit rate of its fingerprint cache."""
+    detect, cache = build(name, SyntheticFrameSource(motion_every=motion_every))
+    detect()  # First frame only primes the detector
+    hits, misses = cache.hits.value, cache.misses.value
+    start = time.perf_counter()
+    for _ in range(count):
+        detect()
+    elapsed = (time.perf_counter() - start) / count
+    hits, misses = cache.hits.value - hits, cache.misses.value - misses
+    return elapsed, hits / (hits + misses) if hits + misses else 0.0
+
+
+def time_fingerprint(shape, count):
+    pixels = np.random.default_rng(0).integers(0, 256, size=shape, dtype=np.uint8)
+    start = time.perf_counter()
+    for _ in range(count):
+        fingerprint(pixels)
+    return (time.perf_counter() - start) / count
+
+
+# ROI shape each detector fingerprints per tick
+ROI_SHAPES = {
+    "blue_detector": (60, 60, 3),
+    "motion_detector": (60, 60),
+    "instruction_typer": (1440, 853, 3),
+}
+
+
+def run(count=200):
+    results = {"hash": HASH_NAME}
+    for name, shape in ROI_SHAPES.items():
+        repeat = count if name != "instruction_typer" else max(10, count // 10)
+        still_s, still_hits = time_detect(name, 0, repeat)
+        changing_s, changing_hits = time_detect(name, 1, repeat)
+        results[name] = {
+            "still_s": still_s,
+            "still_hit_rate": still_hits,
+            "changing_s": changing_s,
+            "changing_hit_rate": changing_hits,
+            "fingerprint_s": time_fingerprint(shape, repeat),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    result = run()
+    print(f"Fingerprint: {result['hash']}")
+    for name in ROI_SHAPES:
+        stats = result[name]
+        print(f"{name:>18}: still {stats['still_s'] * 1e6:8.1f} us (hits {stats['still_hit_rate']:.0%}) | "
+              f"changing {stats['changing_s'] * 1e6:8.1f} us (hits {stats['changing_hit_rate']:.0%}) | "
+              f"fingerprint {stats['fingerprint_s'] * 1e6:7.1f} us")
@@ -0,0 +1,62 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+"""Compare in-memory frame capture with the old PNG temp-file round trip.
+
+Runs headless: frames come from SyntheticFrameSource. The legacy path is
+emulated without the `screencapture` fork itself, so the numbers are a
+lower bound on what the old method cost.
+"""
+import os
+import sys
+import time
+import logging
+import tempfile
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_source import SyntheticFrameSource
+from motion_detector import MotionDetector
+from config import StaticConfig
+
+AREA = (1663, 1043, 1723, 1103)
+
+
+def legacy_png_round_trip(source, area, temp_dir):
+    """Encode to PNG, write, read back as grayscale and delete, like hidden_screen_capture did."""
+    temp_file = os.path.join(temp_dir, f"screen_capture_{time.time()}.png")
+    cv2.imwrite(temp_file, source.grab(area))
+    frame = cv2.imread(temp_file, cv2.IMREAD_GRAYSCALE)
+    os.remove(temp_file)
+    return frame
+
+
+def run(frames=500):
+    """Return per-frame timings (seconds) for both capture paths and the full detector."""
+    source = SyntheticFrameSource(motion_every=5)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        start = time.perf_counter()
+        for _ in range(frames):
+            legacy_png_round_trip(source, AREA, temp_dir)
+        legacy = (time.perf_counter() - start) / frames
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        source.grab_gray(AREA)
+    in_memory = (time.perf_counter() - start) / frames
+
+    detector = MotionDetector(frame_source=source, config=StaticConfig())
+    start = time.perf_counter()
+    for _ in range(frames):
+        detector.detect_motion()
+    detect = (time.perf_counter() - start) / frames
+
+    return {"legacy_capture_s": legacy, "in_memory_capture_s": in_memory, "detect_motion_s": detect}
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    result = run()
+    print(f"PNG round trip:     {result['legacy_capture_s'] * 1e6:8.1f} us/frame")
+    print(f"In-memory capture:  {result['in_memory_capture_s'] * 1e6:8.1f} us/frame")
+    print(f"detect_motion tick: {result['detect_motion_s'] * 1e6:8.1f} us/frame "
+          f"({1 / result['detect_motion_s']:.0f} fps)")
@@ -0,0 +1,148 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+"""Guard the start-up budget of every component script.
+
+Each module is imported in a fresh interpreter with `python -X importtime`,
+from an empty working directory and HOME. A component fails the check when
+
+- its cumulative import time is over its budget (best of `repeat` runs),
+- importing it loads a GUI or capture library (pyautogui, AppKit, Quartz,
+  PIL, cv2) that should only be loaded once the component runs, or
+- importing it creates files (logs, instruction files) - imports must not
+  do any work.
+
+Exits 1 when any component fails, so it can run before a release.
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+AUTOMATION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import budget per module, in milliseconds
+BUDGETS = {
+    "clicker": 150,
+    "blue_detector": 250,
+    "motion_detector": 250,
+    "instruction_typer": 300,
+    "capture_service": 250,
+    "orchestrator": 150,
+    "supervisor": 150,
+    "run_automation": 100,
+}
+
+DEFERRED_MODULES = ("pyautogui", "pyperclip", "AppKit", "Quartz", "PIL", "cv2")
+
+
+def parse_importtime(stderr):
+    """Return [(name, self_us, cumulative_us, depth)] from `-X importtime` output."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # Header line
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), self_us, cumulative_us, depth))
+    return entries
+
+
+def files_under(root):
+    found = set()
+    for directory, _, files in os.walk(root):
+        for name in files:
+            found.add(os.path.relpath(os.path.join(directory, name), root))
+    return found
+
+
+def measure(module, repeat=3):
+    """Import `module` `repeat` times in fresh interpreters; return the best run's figures."""
+    best = None
+    for _ in range(repeat):
+        sandbox = tempfile.mkdtemp(prefix="bench_import_")
+        home = os.path.join(sandbox, "home")
+        cwd = os.path.join(sandbox, "cwd")
+        os.makedirs(home)
+        os.makedirs(cwd)
+        env = dict(os.environ, HOME=home, PYTHONPATH=AUTOMATION_DIR, PYTHONDONTWRITEBYTECODE="1")
+        try:
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                cwd=cwd, env=env, capture_output=True, text=True, timeout=60
+            )
+            created = sorted(files_under(sandbox))
+        finally:
+            shutil.rmtree(sandbox, ignore_errors=True)
+
+        entries = parse_importtime(result.stderr)
+        top = [entry for entry in entries if entry[0] == module and entry[3] == 0]
+        if result.returncode != 0 or not top:
+            return {"module": module, "error": result.stderr.strip().splitlines()[-1:] or ["import failed"]}
+
+        run = {
+            "module": module,
+            "import_s": top[-1][2] / 1e6,
+            "deferred_loaded": sorted({name.split(".")[0] for name, _, _, _ in entries
+                                       if name.split(".")[0] in DEFERRED_MODULES}),
+            "files_created": created,
+            # Largest direct dependencies, to see where the time goes
+            "heaviest": [[name, cumulative / 1e6] for name, _, cumulative, depth in
+                         sorted(entries, key=lambda entry: -entry[2]) if depth == 1][:5],
+        }
+        if best is None or run["import_s"] < best["import_s"]:
+            best = run
+    return best
+
+
+def run(modules=None, repeat=3):
+    """Measure every module; each result says whether it is within its budget and has no side effects."""
+    results = {}
+    for module in modules or BUDGETS:
+        result = measure(module, repeat)
+        if "error" not in result:
+            budget = BUDGETS.get(module)
+            result["budget_s"] = budget / 1e3 if budget else None
+            result["ok"] = (
+                (budget is None or result["import_s"] * 1e3 <= budget)
+                and not result["deferred_loaded"]
+                and not result["files_created"]
+            )
+        else:
+            result["ok"] = False
+        results[module] = result
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the import time of each component against its budget.")
+    parser.add_argument("modules", nargs="*", help=f"modules to check (default: {', '.join(BUDGETS)})")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.modules, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for module, result in results.items():
+            if "error" in result:
+                print(f"{module:>18}: FAILED to import: {result['error'][0]}")
+                continue
+            budget = f"{result['budget_s'] * 1e3:.0f} ms" if result["budget_s"] else "none"
+            print(f"{module:>18}: {result['import_s'] * 1e3:7.1f} ms (budget {budget}) "
+                  f"{'ok' if result['ok'] else 'FAIL'}")
+            if result["deferred_loaded"]:
+                print(f"{'':>20}loads at import: {', '.join(result['deferred_loaded'])}")
+            if result["files_created"]:
+                print(f"{'':>20}creates at import: {', '.join(result['files_created'])}")
+            print(f"{'':>20}heaviest: " + ", ".join(f"{name} {seconds * 1e3:.1f} ms" for name, seconds in result["heaviest"]))
+    sys.exit(0 if all(result["ok"] for result in results.values()) else 1)
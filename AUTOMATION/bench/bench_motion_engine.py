@@ -0,0 +1,73 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+"""Compare TiledMotionEngine with the old full-resolution RGB diff."""
+import os
+import sys
+import time
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motion_engine import TiledMotionEngine
+
+
+def legacy_changed_pixels(current_frame, last_frame):
+    """The original InstructionTyper.detect_motion diff."""
+    diff = cv2.absdiff(current_frame, last_frame)
+    r_diff = diff[:, :, 0]
+    g_diff = diff[:, :, 1]
+    b_diff = diff[:, :, 2]
+    return np.sum((r_diff > 0) | (g_diff > 0) | (b_diff > 0))
+
+
+def synthetic_frames(width, height, count, seed=0):
+    """Mostly static frames with a small text-cursor-sized change every other frame.
+
+    Every fourth frame instead nudges one pixel's red up and green down by
+    one level, a change that leaves every block's R + G + B sum as it was.
+    """
+    rng = np.random.default_rng(seed)
+    base = rng.integers(1, 255, size=(height, width, 3), dtype=np.uint8)
+    frames = []
+    for i in range(count):
+        frame = base.copy()
+        y = int(rng.integers(0, height - 20))
+        x = int(rng.integers(0, width - 2))
+        if i % 4 == 3:
+            frame[y, x, 0] += 1
+            frame[y, x, 1] -= 1
+        elif i % 2:
+            frame[y:y + 20, x:x + 2] ^= 0xFF
+        frames.append(frame)
+    return frames
+
+
+def run(width, height, count=20):
+    """Return per-frame timings (seconds) at one resolution and check both agree on motion."""
+    frames = synthetic_frames(width, height, count)
+
+    start = time.perf_counter()
+    legacy = [legacy_changed_pixels(frames[i], frames[i - 1]) > 0 for i in range(1, count)]
+    legacy_s = (time.perf_counter() - start) / (count - 1)
+
+    engine = TiledMotionEngine()
+    engine.update(frames[0])
+    start = time.perf_counter()
+    tiled = [engine.update(frames[i]) > 0 for i in range(1, count)]
+    tiled_s = (time.perf_counter() - start) / (count - 1)
+
+    return {
+        "width": width,
+        "height": height,
+        "legacy_s": legacy_s,
+        "tiled_s": tiled_s,
+        "decisions_match": legacy == tiled,
+    }
+
+
+if __name__ == "__main__":
+    # Right third of 1080p, 1440p and 5K displays
+    for width, height in ((640, 1080), (853, 1440), (1706, 2880)):
+        result = run(width, height)
+        print(f"{width}x{height}: legacy {result['legacy_s'] * 1e3:.2f} ms | "
+              f"tiled {result['tiled_s'] * 1e3:.2f} ms | decisions match: {result['decisions_match']}")
@@ -0,0 +1,166 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+"""Time the whole detect-to-act path: blue appears on screen -> click batch performed.
+
+A fake screen shows a blue button on demand; BlueDetector captures and
+classifies it, signals the Clicker, and the Clicker's batch lands on a
+backend that only notes the time. Two measurements:
+
+- processing: one detection pass is run the moment the button appears,
+  so the figure is pure pipeline cost (capture, classify, signal, act).
+- polled: the detector runs its own adaptive loop and the button appears
+  at random moments, so the figure includes the wait for the next check.
+"""
+import os
+import sys
+import time
+import random
+import logging
+import tempfile
+import threading
+import shutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from action_executor import ActionExecutor
+from frame_source import FrameSource
+from blue_detector import BlueDetector, POSITIONS
+from clicker import Clicker
+from config import StaticConfig
+from bench_signal import TimedBackend, make_channel, latency_stats
+
+BUTTON = POSITIONS[0]
+BUTTON_RADIUS = 6
+
+
+class ButtonFrameSource(FrameSource):
+    """Flat grey screen with a blue button at BUTTON while `shown` is set."""
+
+    name = "button"
+
+    def __init__(self):
+        super().__init__()
+        self.shown = False
+
+    def _capture(self, area, out):
+        x1, y1, x2, y2 = area
+        out.fill(128)
+        if self.shown:
+            bx, by = BUTTON
+            left, top = max(bx - BUTTON_RADIUS, x1), max(by - BUTTON_RADIUS, y1)
+            right, bottom = min(bx + BUTTON_RADIUS, x2), min(by + BUTTON_RADIUS, y2)
+            if left < right and top < bottom:
+                out[top - y1:bottom - y1, left - x1:right - x1] = (20, 60, 230)
+        return True
+
+
+class Pipeline:
+    """BlueDetector and Clicker wired together over one transport, the clicker in its own thread."""
+
+    def __init__(self, transport):
+        self.working_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+        self.screen = ButtonFrameSource()
+        self.backend = TimedBackend()
+        self.executor = ActionExecutor(self.backend)
+        self.sender, listener = make_channel(transport, self.working_dir)
+        # Default settings whatever this machine's config says; clicks are
+        # timed one at a time, the button is hidden as soon as one lands
+        config = StaticConfig({"blue_detector": {"click_cooldown": 0}})
+        self.detector = BlueDetector(frame_source=self.screen, click_sender=self.sender, config=config)
+        self.clicker = Clicker(click_listener=listener, action_executor=self.executor, screen_size=(2560, 1440),
+                               config=config)
+        self.stop = threading.Event()
+        self.threads = [threading.Thread(target=self._clicker_loop, name="bench-clicker", daemon=True)]
+        self.threads[0].start()
+
+    def _clicker_loop(self):
+        while not self.stop.is_set():
+            self.clicker.process_click_positions(timeout=0.1)
+
+    def _detector_loop(self):
+        while not self.stop.is_set():
+            self.detector.tick()
+            self.stop.wait(self.detector.scheduler.remaining())
+
+    def start_detector(self):
+        thread = threading.Thread(target=self._detector_loop, name="bench-detector", daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
+    def show_button(self):
+        self.backend.performed.clear()
+        shown_at = time.perf_counter()
+        self.screen.shown = True
+        return shown_at
+
+    def wait_for_action(self, shown_at, timeout):
+        """Seconds from `shown_at` to the click batch, or None if none came."""
+        performed = self.backend.performed.wait(timeout)
+        self.screen.shown = False
+        return self.backend.performed_at - shown_at if performed else None
+
+    def close(self):
+        self.stop.set()
+        for thread in self.threads:
+            thread.join()
+        self.sender.close()
+        self.clicker.click_listener.close()
+        self.executor.close()
+        shutil.rmtree(self.working_dir, ignore_errors=True)
+
+
+def run_processing(transport="local", count=200):
+    pipeline = Pipeline(transport)
+    latencies, missed = [], 0
+    try:
+        for _ in range(count):
+            shown_at = pipeline.show_button()
+            pipeline.detector.tick()
+            latency = pipeline.wait_for_action(shown_at, 2)
+            if latency is None:
+                missed += 1
+            else:
+                latencies.append(latency)
+    finally:
+        pipeline.close()
+    return dict(latency_stats(latencies) if latencies else {}, transport=transport, trials=count, missed=missed)
+
+
+def run_polled(transport="local", count=10, max_gap=2.5, seed=0):
+    rng = random.Random(seed)
+    pipeline = Pipeline(transport)
+    pipeline.start_detector()
+    latencies, missed = [], 0
+    try:
+        for _ in range(count):
+            # Idle long enough for the detector to back off, as it would between prompts
+            time.sleep(rng.uniform(0.2, max_gap))
+            shown_at = pipeline.show_button()
+            latency = pipeline.wait_for_action(shown_at, 5)
+            if latency is None:
+                missed += 1
+            else:
+                latencies.append(latency)
+    finally:
+        pipeline.close()
+    return dict(latency_stats(latencies) if latencies else {}, transport=transport, trials=count, missed=missed)
+
+
+def run(transport="local", processing_count=200, polled_count=10):
+    """Return both detect-to-act measurements for one transport."""
+    return {
+        "transport": transport,
+        "processing": run_processing(transport, processing_count),
+        "polled": run_polled(transport, polled_count),
+    }
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    for transport in ("local", "socket"):
+        result = run(transport)
+        for kind in ("processing", "polled"):
+            stats = result[kind]
+            print(f"{transport:>6} {kind:>10}: mean {stats.get('mean_s', 0) * 1e3:8.3f} ms | "
+                  f"p95 {stats.get('p95_s', 0) * 1e3:8.3f} ms | max {stats.get('max_s', 0) * 1e3:8.3f} ms | "
+                  f"missed {stats['missed']}/{stats['trials']}")
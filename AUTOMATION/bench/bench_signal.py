@@ -0,0 +1,134 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+"""Time a click signal from BlueDetector to the Clicker's action.
+
+BlueDetector.update_click_positions sends, Clicker.process_click_positions
+receives in a second thread and runs its click batch on a backend that
+only notes the time. Runs headless over the socket bus, the legacy signal
+file and the in-process channel.
+"""
+import os
+import sys
+import time
+import shutil
+import logging
+import tempfile
+import threading
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from action_executor import ActionExecutor, RecordingBackend
+from signal_bus import SignalSender, SignalListener, LocalSignalChannel, FileSignalAdapter, FILE_FALLBACK
+from frame_source import SyntheticFrameSource
+from blue_detector import BlueDetector, POSITIONS
+from clicker import Clicker
+from config import StaticConfig
+
+TRANSPORTS = ("socket", "file", "local")
+
+
+class TimedBackend(RecordingBackend):
+    """Recording backend that notes when each batch arrived and wakes a waiter."""
+
+    def __init__(self):
+        super().__init__()
+        self.performed = threading.Event()
+        self.performed_at = None
+
+    def run_batch(self, actions):
+        self.performed_at = time.perf_counter()
+        self.performed.set()
+        return super().run_batch(actions)
+
+
+class FileSender:
+    """Sends through the legacy signal file only, like a component that predates the socket bus."""
+
+    def __init__(self, channel, working_dir):
+        self.adapter = FileSignalAdapter(channel, working_dir)
+
+    def send(self, message):
+        self.adapter.write(message)
+        return FILE_FALLBACK
+
+    def close(self):
+        self.adapter.close()
+
+
+def make_channel(transport, working_dir):
+    """Return (sender, listener) for one transport."""
+    if transport == "socket":
+        listener = SignalListener("click_positions", working_dir)
+        return SignalSender("click_positions", working_dir), listener
+    if transport == "file":
+        listener = SignalListener("click_positions", working_dir)
+        # The file reader starts lazily and ignores what is already there; start it before the first write
+        listener.file_adapter.reader
+        return FileSender("click_positions", working_dir), listener
+    channel = LocalSignalChannel("click_positions")
+    return channel, channel
+
+
+def latency_stats(samples):
+    values = np.array(samples)
+    return {
+        "mean_s": float(values.mean()),
+        "p50_s": float(np.percentile(values, 50)),
+        "p95_s": float(np.percentile(values, 95)),
+        "max_s": float(values.max()),
+    }
+
+
+def run(transport="socket", count=200):
+    """Send `count` click signals one at a time; return send and signal-to-action timings."""
+    working_dir = tempfile.mkdtemp(prefix="bench_signal_")
+    sender, listener = make_channel(transport, working_dir)
+    backend = TimedBackend()
+    executor = ActionExecutor(backend)
+    config = StaticConfig()  # Default settings whatever this machine's config says
+    detector = BlueDetector(frame_source=SyntheticFrameSource(), click_sender=sender, config=config)
+    clicker = Clicker(click_listener=listener, action_executor=executor, screen_size=(2560, 1440), config=config)
+
+    stop = threading.Event()
+
+    def clicker_loop():
+        while not stop.is_set():
+            clicker.process_click_positions(timeout=0.1)
+
+    thread = threading.Thread(target=clicker_loop, name="bench-clicker", daemon=True)
+    thread.start()
+
+    send_times, round_trips, lost = [], [], 0
+    try:
+        for _ in range(count):
+            backend.performed.clear()
+            start = time.perf_counter()
+            detector.update_click_positions(POSITIONS[:1])
+            send_times.append(time.perf_counter() - start)
+            if backend.performed.wait(2):
+                round_trips.append(backend.performed_at - start)
+            else:
+                lost += 1
+    finally:
+        stop.set()
+        thread.join()
+        sender.close()
+        clicker.click_listener.close()
+        executor.close()
+        shutil.rmtree(working_dir, ignore_errors=True)
+
+    result = {"transport": transport, "signals": count, "lost": lost,
+              "send": latency_stats(send_times)}
+    if round_trips:
+        result["signal_to_action"] = latency_stats(round_trips)
+    return result
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    for transport in TRANSPORTS:
+        result = run(transport)
+        trip = result.get("signal_to_action", {})
+        print(f"{transport:>6}: send {result['send']['mean_s'] * 1e6:8.1f} us | "
+              f"signal to action mean {trip.get('mean_s', 0) * 1e6:8.1f} us, "
+              f"p95 {trip.get('p95_s', 0) * 1e6:8.1f} us | lost {result['lost']}")
@@ -0,0 +1,85 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+"""Time the project tree index, its renderer and get_project_tree on a synthetic 100k-entry tree."""
+import os
+import sys
+import time
+import shutil
+import logging
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tree_index import TreeIndex
+from instruction_typer import get_project_tree
+
+
+def make_tree(root, packages=20, modules=50, files=100):
+    """Create packages x modules directories of `files` empty files each, plus one big node_modules-like directory."""
+    for p in range(packages):
+        for m in range(modules):
+            directory = os.path.join(root, f"package_{p:03d}", f"module_{m:03d}")
+            os.makedirs(directory)
+            for f in range(files):
+                open(os.path.join(directory, f"file_{f:04d}.py"), "w").close()
+    generated = os.path.join(root, "generated")
+    os.makedirs(generated)
+    for f in range(files * 20):
+        open(os.path.join(generated, f"chunk_{f:05d}.js"), "w").close()
+
+
+def timed(func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def run(root):
+    index = TreeIndex(root, min_interval=0)
+    results = {}
+    results["first_refresh_s"], _ = timed(index.refresh)
+    directories, files = index.counts()
+    results["entries"] = directories + files
+    results["unchanged_refresh_s"], _ = timed(index.refresh, 5)
+
+    open(os.path.join(root, "package_000", "module_000", "new_file.py"), "w").close()
+    results["one_change_refresh_s"], _ = timed(index.refresh)
+    results["relisted"] = index.relisted
+
+    results["full_render_s"], full = timed(index.render)
+    results["full_bytes"] = len(full.encode())
+    results["bounded_render_s"], bounded = timed(
+        lambda: index.render(max_depth=8, max_dir_entries=100, collapse_over=1000, max_bytes=16384), 5)
+    results["bounded_bytes"] = len(bounded.encode())
+
+    # What the typer pastes: the first call indexes the tree, later ones reuse the snapshot
+    previous_dir = os.environ.get("INITIAL_EXECUTION_DIR")
+    os.environ["INITIAL_EXECUTION_DIR"] = root
+    try:
+        results["get_project_tree_cold_s"], _ = timed(get_project_tree)
+        results["get_project_tree_warm_s"], _ = timed(get_project_tree, 5)
+    finally:
+        if previous_dir is None:
+            del os.environ["INITIAL_EXECUTION_DIR"]
+        else:
+            os.environ["INITIAL_EXECUTION_DIR"] = previous_dir
+
+    if shutil.which("find"):
+        results["find_subprocess_s"], _ = timed(
+            lambda: subprocess.run(["find", "."], cwd=root, capture_output=True, text=True))
+    return results
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    root = tempfile.mkdtemp(prefix="bench_tree_")
+    try:
+        make_tree(root)
+        for key, value in run(root).items():
+            if key.endswith("_s"):
+                print(f"{key[:-2]:>22}: {value * 1e3:9.2f} ms")
+            else:
+                print(f"{key:>22}: {value}")
+    finally:
+        shutil.rmtree(root)
@@ -0,0 +1,156 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+"""Compare template tracking with probing the fixed blue positions.
+
+A fake screen shows an app window with a blue "Submit" button. The
+template is cut from the screen at 1x scale. The benchmark measures:
+
+- the full multi-scale scan, run once at start-up and after losing a button,
+- steady-state tracking of the cached button against BlueDetector's
+  fixed-position probe on the same screen,
+- whether the button is still found after the window moves a little
+  (tracked) or a lot (rescan), and when it is drawn at another scale.
+"""
+import os
+import sys
+import time
+import logging
+import tempfile
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_source import FrameSource
+from blue_detector import BlueDetector
+from config import StaticConfig
+from signal_bus import LocalSignalChannel
+from ui_state import UIStateEngine, Template
+
+SCREEN = (2560, 1440)
+BUTTON_SIZE = (96, 32)
+
+
+def draw_button(scale=1.0):
+    """RGB image of a blue rounded button with a white label."""
+    width, height = int(BUTTON_SIZE[0] * scale), int(BUTTON_SIZE[1] * scale)
+    button = np.full((height, width, 3), 45, dtype=np.uint8)
+    radius = height // 3
+    cv2.rectangle(button, (radius, 0), (width - radius, height - 1), (20, 90, 230), -1)
+    cv2.rectangle(button, (0, radius), (width - 1, height - radius), (20, 90, 230), -1)
+    for cx, cy in ((radius, radius), (width - radius, radius), (radius, height - radius), (width - radius, height - radius)):
+        cv2.circle(button, (cx, cy), radius, (20, 90, 230), -1)
+    cv2.putText(button, "Submit", (int(14 * scale), int(22 * scale)), cv2.FONT_HERSHEY_SIMPLEX,
+                0.6 * scale, (255, 255, 255), max(1, int(round(1.5 * scale))), cv2.LINE_AA)
+    return button
+
+
+class WindowScreen(FrameSource):
+    """Dark editor-like screen: text-ish noise lines and one button placed with `place()`."""
+
+    name = "window"
+
+    def __init__(self, seed=0):
+        super().__init__()
+        rng = np.random.default_rng(seed)
+        width, height = SCREEN
+        self.background = np.full((height, width, 3), 30, dtype=np.uint8)
+        for y in range(20, height - 8, 24):  # Lines of "text"
+            length = int(rng.integers(200, width // 2))
+            x = int(rng.integers(0, width - length))
+            self.background[y:y + 8, x:x + length] = rng.integers(90, 200, size=(8, length, 3), dtype=np.uint8)
+        self.screen = self.background.copy()
+
+    def place(self, x, y, scale=1.0):
+        """Show the button with its top-left corner at (x, y); returns the button's box."""
+        button = draw_button(scale)
+        height, width = button.shape[:2]
+        self.screen = self.background.copy()
+        self.screen[y:y + height, x:x + width] = button
+        return (x, y, x + width, y + height)
+
+    def _capture(self, area, out):
+        x1, y1, x2, y2 = area
+        np.copyto(out, self.screen[y1:y2, x1:x2])
+        return True
+
+
+def time_calls(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def found_at(engine, box):
+    """True if the engine's element overlaps the drawn button's centre."""
+    element = engine.elements.get("submit")
+    if element is None:
+        return False
+    cx, cy = (box[0] + box[2]) // 2, (box[1] + box[3]) // 2
+    x1, y1, x2, y2 = element.box
+    return x1 <= cx < x2 and y1 <= cy < y2
+
+
+def run(repeat=200):
+    screen = WindowScreen()
+    box = screen.place(1640, 1050)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Through a PNG so loading is exercised the way the detector does it
+        path = os.path.join(temp_dir, "submit.png")
+        cv2.imwrite(path, cv2.cvtColor(screen.grab(box).copy(), cv2.COLOR_RGB2BGR))
+        template = Template.load(path)
+
+    engine = UIStateEngine([template], (0, 0) + SCREEN, rescan_interval=0)
+    start = time.perf_counter()
+    engine.locate(screen.grab)
+    full_scan = time.perf_counter() - start
+    located = found_at(engine, box)
+
+    tracking = time_calls(lambda: engine.update(screen.grab), repeat)
+    detector = BlueDetector(frame_source=screen, click_sender=LocalSignalChannel("click_positions", maxsize=1),
+                            config=StaticConfig())
+    fixed = time_calls(detector.detect_blue_positions, repeat)
+
+    # Small move: followed by tracking alone
+    scans = engine.scans.value
+    box = screen.place(box[0] + 12, box[1] - 8)
+    engine.update(screen.grab)
+    small_move = {"found": found_at(engine, box), "rescans": engine.scans.value - scans}
+
+    # Window moved across the screen: tracking fails and a rescan finds it
+    scans = engine.scans.value
+    box = screen.place(600, 300)
+    start = time.perf_counter()
+    engine.update(screen.grab)
+    large_move = {"found": found_at(engine, box), "rescans": engine.scans.value - scans,
+                  "recover_s": time.perf_counter() - start}
+
+    # Button drawn larger, as on a display with other scaling
+    scaled = screen.place(900, 700, scale=1.5)
+    engine.locate(screen.grab)
+    element = engine.elements["submit"]
+    rescaled = {"found": found_at(engine, scaled), "scale": element.scale if element else None}
+
+    return {
+        "full_scan_s": full_scan,
+        "located": located,
+        "tracking_s": tracking,
+        "fixed_positions_s": fixed,
+        "fixed_position_grabs": detector.capture_planner.grab_count,
+        "small_move": small_move,
+        "large_move": large_move,
+        "rescaled": rescaled,
+    }
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    result = run()
+    print(f"Full scan ({SCREEN[0]}x{SCREEN[1]}): {result['full_scan_s'] * 1e3:8.2f} ms (found: {result['located']})")
+    print(f"Tracking update:         {result['tracking_s'] * 1e6:8.1f} us")
+    print(f"Fixed positions probe:   {result['fixed_positions_s'] * 1e6:8.1f} us "
+          f"({result['fixed_position_grabs']} grab(s))")
+    print(f"Small move: found {result['small_move']['found']}, rescans {result['small_move']['rescans']}")
+    print(f"Large move: found {result['large_move']['found']}, rescans {result['large_move']['rescans']}, "
+          f"recovered in {result['large_move']['recover_s'] * 1e3:.2f} ms")
+    print(f"Drawn at 1.5x: found {result['rescaled']['found']}, matched scale {result['rescaled']['scale']}")
@@ -0,0 +1,211 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+"""Run the benchmark suite headless and emit the results as JSON.
+
+    ./run_benchmarks.py                       # everything, JSON to stdout
+    ./run_benchmarks.py --quick -o run.json   # smaller inputs, written to a file
+    ./run_benchmarks.py --only blue,signal
+    ./run_benchmarks.py --compare baseline.json
+
+Every timing key ends in `_s` (seconds, lower is better). With --compare,
+timings more than --tolerance slower than the baseline are listed and the
+exit status is 1, so runs can be tracked over time.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from collections import OrderedDict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+
+def bench_blue(quick):
+    """Blue classification for each capture size (30 px radius is what BlueDetector uses)."""
+    import bench_blue_engine
+    repeat = 50 if quick else 200
+    return OrderedDict((f"{size}x{size}", bench_blue_engine.run(size, repeat)) for size in (30, 60, 120))
+
+
+def bench_motion(quick):
+    """Motion diffing on the right third of 1080p, 1440p and 5K displays."""
+    import bench_motion_engine
+    count = 10 if quick else 20
+    return OrderedDict(
+        (f"{width}x{height}", bench_motion_engine.run(width, height, count))
+        for width, height in ((640, 1080), (853, 1440), (1706, 2880))
+    )
+
+
+def bench_capture(quick):
+    import bench_frame_source
+    return bench_frame_source.run(100 if quick else 500)
+
+
+def bench_signal(quick):
+    """BlueDetector -> Clicker signal round trip over each transport."""
+    import bench_signal
+    count = 50 if quick else 200
+    return OrderedDict((transport, bench_signal.run(transport, count)) for transport in bench_signal.TRANSPORTS)
+
+
+def bench_tree(quick):
+    """Tree index and get_project_tree on a synthetic tree."""
+    import bench_tree
+    root = tempfile.mkdtemp(prefix="bench_tree_")
+    try:
+        if quick:
+            bench_tree.make_tree(root, packages=4, modules=10, files=20)
+        else:
+            bench_tree.make_tree(root)
+        return bench_tree.run(root)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_pipeline(quick):
+    """Detect-to-act latency with the fake screen and input backend."""
+    import bench_pipeline
+    processing, polled = (50, 4) if quick else (200, 10)
+    return OrderedDict(
+        (transport, bench_pipeline.run(transport, processing, polled)) for transport in ("local", "socket")
+    )
+
+
+def bench_ui_state(quick):
+    """Button template scan and tracking against the fixed-position probe."""
+    import bench_ui_state
+    return bench_ui_state.run(50 if quick else 200)
+
+
+def bench_frame_hash(quick):
+    """Detectors on a still and a changing screen, with the work skipped by frame fingerprints."""
+    import bench_frame_hash
+    return bench_frame_hash.run(50 if quick else 200)
+
+
+def bench_startup(quick):
+    """Import time of every component script in a fresh interpreter."""
+    import bench_import_time
+    return bench_import_time.run(repeat=1 if quick else 3)
+
+
+SUITES = OrderedDict([
+    ("blue", bench_blue),
+    ("motion", bench_motion),
+    ("capture", bench_capture),
+    ("signal", bench_signal),
+    ("tree", bench_tree),
+    ("pipeline", bench_pipeline),
+    ("ui_state", bench_ui_state),
+    ("frame_hash", bench_frame_hash),
+    ("startup", bench_startup),
+])
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                                capture_output=True, text=True, timeout=5)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_suites(names, quick=False):
+    """Run the named suites and return the report: metadata plus one entry per suite."""
+    report = OrderedDict([
+        ("time", time.time()),
+        ("commit", git_commit()),
+        ("host", socket.gethostname()),
+        ("platform", platform.platform()),
+        ("python", platform.python_version()),
+        ("quick", quick),
+        ("results", OrderedDict()),
+    ])
+    for name in names:
+        logging.warning(f"Running {name} benchmarks")
+        start = time.perf_counter()
+        try:
+            result = SUITES[name](quick)
+        except Exception as e:
+            logging.error(f"Benchmark {name} failed: {str(e)}")
+            result = {"error": str(e)}
+        report["results"][name] = result
+        logging.warning(f"  {name} done in {time.perf_counter() - start:.1f}s")
+    return report
+
+
+def timings(results, prefix=""):
+    """Flatten nested results into {"suite.case.key": seconds} for every `_s` key."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(timings(value, path + "."))
+        elif key.endswith("_s") and isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+
+def compare(report, baseline, tolerance):
+    """Return [(key, baseline_s, current_s)] for timings more than `tolerance` slower than the baseline."""
+    current = timings(report["results"])
+    previous = timings(baseline.get("results", {}))
+    regressions = []
+    for key, value in sorted(current.items()):
+        before = previous.get(key)
+        if before and value > before * (1 + tolerance):
+            regressions.append((key, before, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the automation benchmarks and print JSON results.")
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--only", help=f"comma-separated suites to run ({', '.join(SUITES)})")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs and fewer repeats")
+    parser.add_argument("--compare", metavar="BASELINE", help="report timings slower than this earlier report")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown for --compare (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    names = list(SUITES)
+    if args.only:
+        names = [name.strip() for name in args.only.split(",") if name.strip()]
+        unknown = [name for name in names if name not in SUITES]
+        if unknown:
+            parser.error(f"unknown suite(s): {', '.join(unknown)}")
+
+    # Progress goes to stderr at WARNING, the components' INFO/DEBUG logging stays quiet
+    logging.getLogger().setLevel(logging.WARNING)
+    report = run_suites(names, args.quick)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for key, before, after in regressions:
+            print(f"SLOWER {key}: {before * 1e3:.3f} ms -> {after * 1e3:.3f} ms "
+                  f"({(after / before - 1) * 100:+.0f}%)", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,112 +1,188 @@
 #!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
 import os
+import sys
 import time
-import numpy as np
-import pyautogui
-from PIL import ImageGrab
-from datetime import datetime
 import logging
+from log_setup import setup_logging
 from kill_switch import should_stop
+from heartbeat import Heartbeat
+from pid_registry import register_process
+from adaptive_scheduler import AdaptiveScheduler
+from metrics import start_metrics, counter, timer
+from config import get_config, DEFAULTS
+from blue_engine import is_blue_region
+from capture_planner import CapturePlanner, area_around
+from ui_state import UIStateEngine, load_templates, screen_area
+from frame_hash import FingerprintCache
+from frame_source import default_frame_source
+from signal_bus import SignalSender, ClickSignal, ACKNOWLEDGED, UNACKNOWLEDGED, FILE_FALLBACK
 
-# Set up logging
-log_dir = os.path.expanduser("~/automation_logs")
-os.makedirs(log_dir, exist_ok=True)
-log_file = os.path.join(log_dir, f"blue_detector_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+# Default positions to monitor (set `blue_detector.positions` in the config file per machine)
+POSITIONS = [tuple(position) for position in DEFAULTS["blue_detector"]["positions"]]
 
 class BlueDetector:
-    def __init__(self, positions):
-        self.positions = positions  # List of (x, y) tuples
+    def __init__(self, positions=None, frame_source=None, click_sender=None, config=None):
+        self.config = config or get_config()
+        # Positions passed in here win over the config file
+        self.overrides = {"positions": positions} if positions is not None else {}
+        self.frame_source = frame_source or default_frame_source()
         self.working_dir = os.path.dirname(os.path.abspath(__file__))
         self.click_signal_file = os.path.join(self.working_dir, "click_positions")
-        self.check_interval = 0.1
-        self.last_check_time = time.time()
+        self.click_sender = click_sender or SignalSender("click_positions", self.working_dir)
+        self.scheduler = AdaptiveScheduler("blue_detector")
         self.last_click_time = 0
-        self.click_cooldown = 3  # Seconds between clicks
+        self.ui_settings = None
+        self.ui_state = None  # Template tracker, used instead of the fixed positions when configured
+        self.fingerprints = FingerprintCache("blue_detector")  # Classification of unchanged regions is reused
+        self.detect_time = timer("detect_seconds", component="blue_detector")
+        self.detections = counter("detections_total", component="blue_detector")
         
         logging.info(f"Blue Detector started")
         logging.info(f"Working directory: {self.working_dir}")
         logging.info(f"Click signal file: {self.click_signal_file}")
+        logging.info(f"Frame source: {self.frame_source.name}")
+        self.apply_config()
+    
+    def apply_config(self):
+        """Take the blue_detector settings from the config; called again whenever the file changes."""
+        self.config_version = self.config.version
+        settings = dict(self.config.section("blue_detector"), **self.overrides)
+        self.positions = [tuple(position) for position in settings["positions"]]  # List of (x, y) tuples
+        self.capture_radius = settings["capture_radius"]
+        self.min_blue_pixels = settings["min_blue_pixels"]
+        self.click_cooldown = settings["click_cooldown"]
+        self.check_interval = settings["min_interval"]  # Fastest checking rate, used right after blue was seen
+        self.scheduler.set_intervals(settings["min_interval"], settings["max_interval"])
+        self.capture_planner = CapturePlanner([area_around(x, y, self.capture_radius) for x, y in self.positions])
+        self.fingerprints.forget()
+        
         logging.info("Monitoring positions:")
-        for i, pos in enumerate(positions, 1):
+        for i, pos in enumerate(self.positions, 1):
             logging.info(f"  Position {i}: {pos}")
+        logging.info(f"Capturing {len(self.positions)} positions with {self.capture_planner.grab_count} grab(s) per check")
+        
+        ui_settings = self.config.section("ui_state")
+        if ui_settings != self.ui_settings:
+            # Rebuilt only when its own settings change, so found buttons stay cached
+            self.ui_settings = ui_settings
+            self.ui_state = self.build_ui_state(ui_settings)
+    
+    def build_ui_state(self, settings):
+        """Return a UIStateEngine for the configured button templates, or None to probe the fixed positions."""
+        if not settings["templates"]:
+            return None
+        try:
+            engine = UIStateEngine(
+                load_templates(settings["templates"]),
+                settings["search_area"] or screen_area(),
+                threshold=settings["threshold"],
+                scales=settings["scales"],
+                margin=settings["margin"],
+                rescan_interval=settings["rescan_interval"],
+            )
+            logging.info(f"Tracking button templates {', '.join(engine.templates)} in {engine.search_area}")
+            return engine
+        except Exception as e:
+            logging.error(f"Error loading button templates, probing fixed positions instead: {str(e)}")
+            return None
     
     def is_blue_present(self, x, y, threshold=30):
         """Check if blue is present at the given position."""
         try:
             area = (x - threshold, y - threshold, x + threshold, y + threshold)
-            screenshot = ImageGrab.grab(area)
-            img_array = np.array(screenshot)
+            img_array = self.frame_source.grab(area)
+            if img_array is None:
+                return False
             
-            for row in img_array:
-                for pixel in row:
-                    r, g, b = pixel[:3]
-                    if b > 150 and b > (r + 30) and b > (g + 30):
-                        return True
-            return False
+            return is_blue_region(img_array, min_pixels=self.min_blue_pixels)
         except Exception as e:
             logging.error(f"Error in blue detection: {str(e)}")
             return False
     
+    def is_blue_region(self, region):
+        return is_blue_region(region, min_pixels=self.min_blue_pixels)
+    
+    def detect_blue_positions(self):
+        """Return the monitored positions that currently show blue, using as few grabs as possible."""
+        try:
+            if self.ui_state is not None:
+                # Buttons found by their templates; only their own pixels are classified
+                return [
+                    element.center for element, region in self.ui_state.update(self.frame_source.grab)
+                    if self.fingerprints.get(element.name, region, self.is_blue_region)
+                ]
+            regions = self.capture_planner.capture(self.frame_source.grab)
+            return [
+                pos for i, (pos, region) in enumerate(zip(self.positions, regions))
+                if region is not None and self.fingerprints.get(i, region, self.is_blue_region)
+            ]
+        except Exception as e:
+            logging.error(f"Error in blue detection: {str(e)}")
+            return []
+    
     def update_click_positions(self, positions_to_click):
-        """Update the click positions file."""
+        """Send the click positions to the clicker (signal file if it is not listening)."""
         try:
             if positions_to_click:
-                with open(self.click_signal_file, "w") as f:
-                    for pos in positions_to_click:
-                        f.write(f"{pos[0]},{pos[1]}\n")
-                os.chmod(self.click_signal_file, 0o666)
-                logging.debug(f"Updated click positions file")
+                result = self.click_sender.send(ClickSignal(positions_to_click))
+                if result == ACKNOWLEDGED:
+                    logging.debug("Click signal acknowledged by clicker")
+                elif result == UNACKNOWLEDGED:
+                    logging.info("Clicker is listening but did not acknowledge the click signal in time")
+                elif result == FILE_FALLBACK:
+                    logging.debug("Clicker not listening, updated click positions file")
+                else:
+                    logging.error("Click signal could not be delivered")
         except Exception as e:
             logging.error(f"Error updating click positions: {str(e)}")
     
+    def tick(self, current_time=None):
+        """Run one detection pass; returns the positions that were signalled."""
+        current_time = time.time() if current_time is None else current_time
+        self.scheduler.check_started()
+        if self.config.poll() != self.config_version:
+            self.apply_config()
+        if current_time - self.last_click_time < self.click_cooldown:
+            # Just clicked; stay at the fast rate until the cooldown is over
+            self.scheduler.record(True)
+            return []
+        
+        with self.detect_time.time():
+            positions_to_click = self.detect_blue_positions()
+        self.scheduler.record(bool(positions_to_click))
+        if positions_to_click:
+            self.detections.inc()
+            logging.info(f"Blue detected at {len(positions_to_click)} positions")
+            self.update_click_positions(positions_to_click)
+            self.last_click_time = current_time
+        return positions_to_click
+    
     def run(self):
         """Main loop to detect blue and signal clicks."""
         try:
             logging.info("Starting blue detection...")
+            register_process("blue_detector")
+            start_metrics("blue_detector")
+            heartbeat = Heartbeat("blue_detector")
             
             while not should_stop():  # Check kill conditions
-                current_time = time.time()
-                if current_time - self.last_check_time >= self.check_interval:
-                    self.last_check_time = current_time
-                    
-                    if current_time - self.last_click_time >= self.click_cooldown:
-                        positions_to_click = []
-                        for x, y in self.positions:
-                            if self.is_blue_present(x, y):
-                                positions_to_click.append((x, y))
-                        
-                        if positions_to_click:
-                            logging.info(f"Blue detected at {len(positions_to_click)} positions")
-                            self.update_click_positions(positions_to_click)
-                            self.last_click_time = current_time
+                heartbeat.beat()
+                self.tick()
                 
-                time.sleep(0.1)
+                # Checks back off while nothing is found
+                self.scheduler.sleep()
             
             logging.info("Blue detector stopped by kill switch")
+            return True
                 
         except KeyboardInterrupt:
             logging.info("Blue detector stopped by user")
+            return True
         except Exception as e:
             logging.error(f"Fatal error in blue detector: {str(e)}")
+            return False
 
 if __name__ == "__main__":
-    # All positions to monitor
-    POSITIONS = [
-        (1693, 1073),  # Submit button
-        (1673, 976),   # Position 1
-        (1668, 727),   # Position 2
-        (1678, 930),   # Position 3
-        (1666, 910)    # Position 4
-    ]
-    
-    detector = BlueDetector(POSITIONS)
-    detector.run() 
\ No newline at end of file
+    setup_logging("blue_detector")
+    detector = BlueDetector()
+    sys.exit(0 if detector.run() else 1) 
\ No newline at end of file
@@ -0,0 +1,53 @@
+import numpy as np
+
+# Same rule the detector always used: strong blue channel that clearly
+# dominates both red and green.
+BLUE_MIN = 150
+BLUE_MARGIN = 30
+
+
+def blue_mask(pixels, blue_min=BLUE_MIN, margin=BLUE_MARGIN):
+    """Return a boolean mask of the pixels that count as blue.
+
+    Accepts any (..., 3) or (..., 4) uint8 array in RGB(A) order. The channel
+    arithmetic is done in int16 so that `r + margin` cannot wrap around the
+    way it does on raw uint8 pixels.
+    """
+    r = pixels[..., 0].astype(np.int16)
+    g = pixels[..., 1].astype(np.int16)
+    b = pixels[..., 2].astype(np.int16)
+    return (b > blue_min) & (b > r + margin) & (b > g + margin)
+
+
+def count_blue_pixels(pixels, min_pixels=None, band_rows=None, blue_min=BLUE_MIN, margin=BLUE_MARGIN):
+    """Count blue pixels in a region.
+
+    If `min_pixels` is given the region is classified in bands of
+    `band_rows` rows and counting stops as soon as `min_pixels` blue pixels
+    have been seen, so the returned count is then a lower bound.
+    """
+    pixels = np.asarray(pixels)
+    rows = pixels.shape[0]
+    if min_pixels is None or not band_rows or band_rows >= rows:
+        return int(np.count_nonzero(blue_mask(pixels, blue_min, margin)))
+
+    count = 0
+    for start in range(0, rows, band_rows):
+        count += int(np.count_nonzero(blue_mask(pixels[start:start + band_rows], blue_min, margin)))
+        if count >= min_pixels:
+            break
+    return count
+
+
+def blue_fraction(pixels, blue_min=BLUE_MIN, margin=BLUE_MARGIN):
+    """Return the fraction (0.0 - 1.0) of pixels in the region that are blue."""
+    pixels = np.asarray(pixels)
+    total = pixels.shape[0] * pixels.shape[1]
+    if total == 0:
+        return 0.0
+    return count_blue_pixels(pixels, blue_min=blue_min, margin=margin) / total
+
+
+def is_blue_region(pixels, min_pixels=1, band_rows=16, blue_min=BLUE_MIN, margin=BLUE_MARGIN):
+    """Return True if at least `min_pixels` pixels in the region are blue."""
+    return count_blue_pixels(pixels, min_pixels, band_rows, blue_min, margin) >= min_pixels
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+def area_around(x, y, radius):
+    """Return the (x1, y1, x2, y2) box of side 2 * radius centred on (x, y)."""
+    return (x - radius, y - radius, x + radius, y + radius)
+
+
+def _union(a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _size(box):
+    return (box[2] - box[0]) * (box[3] - box[1])
+
+
+class CapturePlanner:
+    """Merge nearby capture areas into as few bounding-box grabs as possible.
+
+    Two groups are merged when the union box costs at most `max_waste` extra
+    pixels compared to grabbing them separately. One grab of a tall thin
+    column is far cheaper than several small grabs, so the default is
+    generous.
+    """
+
+    def __init__(self, areas, max_waste=50000):
+        self.areas = [tuple(int(v) for v in area) for area in areas]
+        self.max_waste = max_waste
+        self.groups = self._plan()
+        self._buffers = {}
+
+    def _plan(self):
+        # Each group is [bbox, pixels_if_grabbed_separately, [area indices]]
+        groups = [[area, _size(area), [i]] for i, area in enumerate(self.areas)]
+        merged = True
+        while merged and len(groups) > 1:
+            merged = False
+            best = None
+            for i in range(len(groups)):
+                for j in range(i + 1, len(groups)):
+                    box = _union(groups[i][0], groups[j][0])
+                    waste = _size(box) - groups[i][1] - groups[j][1]
+                    if waste <= self.max_waste and (best is None or waste < best[0]):
+                        best = (waste, i, j, box)
+            if best is not None:
+                _, i, j, box = best
+                groups[i] = [box, groups[i][1] + groups[j][1], groups[i][2] + groups[j][2]]
+                del groups[j]
+                merged = True
+        return [(box, sorted(indices)) for box, _, indices in groups]
+
+    @property
+    def grab_count(self):
+        """Number of screen grabs needed per tick."""
+        return len(self.groups)
+
+    def capture(self, grab):
+        """Grab every group once and return one view per area, in input order.
+
+        `grab(box, out)` captures the (x1, y1, x2, y2) box, preferably into
+        `out`, and returns an (H, W, C) array (FrameSource.grab fits). The
+        returned per-area arrays are views into those grabs, not copies.
+        """
+        views = [None] * len(self.areas)
+        for g, (box, indices) in enumerate(self.groups):
+            frame = grab(box, self._group_buffer(g, box))
+            if frame is None:
+                continue
+            for i in indices:
+                x1, y1, x2, y2 = self.areas[i]
+                views[i] = frame[y1 - box[1]:y2 - box[1], x1 - box[0]:x2 - box[0]]
+        return views
+
+    def _group_buffer(self, g, box):
+        # One buffer per group so that groups of equal size never share memory
+        if g not in self._buffers:
+            self._buffers[g] = np.empty((box[3] - box[1], box[2] - box[0], 3), dtype=np.uint8)
+        return self._buffers[g]
@@ -0,0 +1,319 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+import sys
+import time
+import logging
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from frame_source import FrameSource
+
+SHM_NAME = "automation_frames"
+MAGIC = 0x4155544F  # "AUTO"
+VERSION = 1
+DEFAULT_SLOTS = 4
+
+# Control block layout (int64 words). Each slot has a sequence word and a
+# timestamp word. A slot's sequence is negative while it is being written.
+_MAGIC, _VERSION, _X1, _Y1, _X2, _Y2, _SLOTS, _LATEST = range(8)
+_FIXED_WORDS = 8
+
+
+def _header_words(slots):
+    return _FIXED_WORDS + 2 * slots
+
+
+class _FrameRing:
+    """NumPy views over the shared-memory control block and frame slots."""
+
+    def __init__(self, shm, area, slots):
+        self.shm = shm
+        self.area = area
+        self.slots = slots
+        x1, y1, x2, y2 = area
+        self.shape = (y2 - y1, x2 - x1, 3)
+        header_bytes = _header_words(slots) * 8
+        self.header = np.ndarray((_header_words(slots),), dtype=np.int64, buffer=shm.buf)
+        self.slot_seq = self.header[_FIXED_WORDS:_FIXED_WORDS + slots]
+        self.slot_time = self.header[_FIXED_WORDS + slots:]
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=shm.buf, offset=header_bytes)
+
+    def release(self):
+        # Views must go before the segment can be closed
+        self.header = self.slot_seq = self.slot_time = self.frames = None
+
+
+class CaptureService:
+    """Grab one screen area per tick and publish it through a shared-memory ring.
+
+    Every detector attaches with a SharedFrameSource and reads its own ROI
+    straight out of the ring, so the display is captured once per tick no
+    matter how many detectors are running.
+    """
+
+    def __init__(self, source, area, slots=DEFAULT_SLOTS, interval=0.1, name=SHM_NAME):
+        self.source = source
+        self.area = tuple(int(v) for v in area)
+        self.slots = slots
+        self.interval = interval
+        self.name = name
+        self.seq = 0
+        self.ring = None
+
+    def start(self):
+        """Create (or recreate) the shared-memory segment."""
+        x1, y1, x2, y2 = self.area
+        size = _header_words(self.slots) * 8 + self.slots * (y2 - y1) * (x2 - x1) * 3
+        try:
+            stale = shared_memory.SharedMemory(name=self.name)
+            stale.close()
+            stale.unlink()
+            logging.info(f"Removed stale shared memory segment {self.name}")
+        except FileNotFoundError:
+            pass
+
+        shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        self.ring = _FrameRing(shm, self.area, self.slots)
+        self.ring.header[:] = 0
+        self.ring.header[_X1:_Y2 + 1] = self.area
+        self.ring.header[_SLOTS] = self.slots
+        self.ring.header[_VERSION] = VERSION
+        # Written last so readers never see a half-initialised header
+        self.ring.header[_MAGIC] = MAGIC
+        logging.info(f"Capture service publishing {self.area} in {self.slots} slots ({size / 1e6:.1f} MB) as {self.name}")
+
+    def publish_frame(self):
+        """Capture one frame into the next slot. Returns the new sequence number or None."""
+        ring = self.ring
+        seq = self.seq + 1
+        slot = seq % self.slots
+        ring.slot_seq[slot] = -seq
+        frame = self.source.grab(self.area, out=ring.frames[slot])
+        if frame is None:
+            ring.slot_seq[slot] = 0
+            return None
+        if frame is not ring.frames[slot]:
+            np.copyto(ring.frames[slot], frame)
+        ring.slot_time[slot] = time.time_ns()
+        ring.slot_seq[slot] = seq
+        ring.header[_LATEST] = seq
+        self.seq = seq
+        return seq
+
+    def run(self):
+        """Publish frames every `interval` seconds until the kill switch fires.
+
+        Returns False if the service stopped on an error.
+        """
+        from kill_switch import should_stop
+        from heartbeat import Heartbeat
+        from pid_registry import register_process
+        from metrics import start_metrics, timer
+
+        try:
+            self.start()
+            register_process("capture_service")
+            start_metrics("capture_service")
+            heartbeat = Heartbeat("capture_service")
+            loop_lag = timer("loop_lag_seconds", component="capture_service")
+            next_tick = time.monotonic()
+            while not should_stop():
+                heartbeat.beat()
+                if self.publish_frame() is None:
+                    logging.error("Frame capture failed")
+                next_tick += self.interval
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    loop_lag.observe(-delay)
+                    next_tick = time.monotonic()
+            logging.info("Capture service stopped by kill switch")
+            return True
+        except KeyboardInterrupt:
+            logging.info("Capture service stopped by user")
+            return True
+        except Exception as e:
+            logging.error(f"Fatal error in capture service: {str(e)}")
+            return False
+        finally:
+            self.close()
+
+    def close(self):
+        if self.ring is not None:
+            shm = self.ring.shm
+            self.ring.release()
+            self.ring = None
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SharedFrameReader:
+    """Attach to a running CaptureService and read frames without copying."""
+
+    def __init__(self, name=SHM_NAME):
+        shm = shared_memory.SharedMemory(name=name)
+        # Readers must not unlink the segment when they exit
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        header = np.ndarray((_FIXED_WORDS,), dtype=np.int64, buffer=shm.buf)
+        if header[_MAGIC] != MAGIC or header[_VERSION] != VERSION:
+            del header
+            shm.close()
+            raise ValueError(f"Shared memory segment {name} is not a capture ring")
+        area = tuple(int(v) for v in header[_X1:_Y2 + 1])
+        slots = int(header[_SLOTS])
+        del header
+        self.ring = _FrameRing(shm, area, slots)
+        self.area = area
+        self.last_seq = 0
+        self.missed_frames = 0
+
+    def latest(self):
+        """Return (seq, timestamp, frame view) for the newest complete frame, or None."""
+        ring = self.ring
+        seq = int(ring.header[_LATEST])
+        if seq <= 0:
+            return None
+        slot = seq % ring.slots
+        if ring.slot_seq[slot] != seq:
+            # Writer already lapped this slot; fall back to the previous frame
+            seq -= 1
+            slot = seq % ring.slots
+            if seq <= 0 or ring.slot_seq[slot] != seq:
+                return None
+
+        if self.last_seq and seq > self.last_seq + 1:
+            self.missed_frames += seq - self.last_seq - 1
+        if seq > self.last_seq:
+            self.last_seq = seq
+        return seq, ring.slot_time[slot] / 1e9, ring.frames[slot]
+
+    def is_current(self, seq):
+        """True while frame `seq` has not been overwritten by the writer."""
+        return int(self.ring.slot_seq[seq % self.ring.slots]) == seq
+
+    def contains(self, area):
+        x1, y1, x2, y2 = area
+        ax1, ay1, ax2, ay2 = self.area
+        return ax1 <= x1 and ay1 <= y1 and x2 <= ax2 and y2 <= ay2
+
+    def close(self):
+        shm = self.ring.shm
+        self.ring.release()
+        shm.close()
+
+
+class SharedFrameSource(FrameSource):
+    """FrameSource that reads ROIs out of the CaptureService ring.
+
+    `grab` returns a view straight into shared memory. If the service is not
+    running, its frames are stale or the area lies outside the published
+    region, the `fallback` source is used instead and attaching is retried
+    every `retry_interval` seconds.
+    """
+
+    name = "shared"
+
+    def __init__(self, fallback=None, name=SHM_NAME, max_age=1.0, retry_interval=1.0):
+        super().__init__()
+        self.fallback = fallback
+        self.shm_name = name
+        self.max_age = max_age
+        self.retry_interval = retry_interval
+        self.reader = None
+        self.last_attach_attempt = 0
+        self.last_seq = None
+
+    def _attach(self):
+        now = time.monotonic()
+        if now - self.last_attach_attempt < self.retry_interval:
+            return None
+        self.last_attach_attempt = now
+        try:
+            self.reader = SharedFrameReader(self.shm_name)
+            logging.info(f"Attached to capture service {self.shm_name} covering {self.reader.area}")
+        except (FileNotFoundError, ValueError):
+            self.reader = None
+        return self.reader
+
+    @property
+    def missed_frames(self):
+        return self.reader.missed_frames if self.reader is not None else 0
+
+    def _detach(self):
+        """Drop a reader whose service stopped publishing; attaching is retried after `retry_interval`."""
+        logging.info(f"Capture service {self.shm_name} stopped publishing, detaching")
+        self.reader.close()
+        self.reader = None
+        self.last_attach_attempt = time.monotonic()
+
+    def _read(self, reader, area, out):
+        """ROI of the newest fresh frame, or None if there is none or the writer overwrote it meanwhile."""
+        latest = reader.latest()
+        if latest is None or time.time() - latest[1] > self.max_age:
+            # A restarted service publishes a new segment under the same name
+            self._detach()
+            return None
+        seq, _, frame = latest
+        ax1, ay1 = reader.area[:2]
+        x1, y1, x2, y2 = area
+        view = frame[y1 - ay1:y2 - ay1, x1 - ax1:x2 - ax1]
+        if out is not None:
+            np.copyto(out, view)
+            view = out
+        if not reader.is_current(seq):
+            return None
+        self.last_seq = seq
+        return view
+
+    def grab(self, area, out=None):
+        """Grab `area` from the ring, or from the fallback.
+
+        Without `out` the result is a view into shared memory that stays
+        valid only until the writer laps its slot; pass `out` to get a copy
+        checked against the slot's sequence number after copying.
+        """
+        start = time.perf_counter()
+        reader = self.reader or self._attach()
+        if reader is not None and reader.contains(area):
+            view = self._read(reader, area, out)
+            if view is None and self.reader is not None:
+                # Overwritten mid-read; the newest frame is in another slot now
+                view = self._read(self.reader, area, out)
+            if view is not None:
+                self.capture_time.observe(time.perf_counter() - start)
+                return view
+        if self.fallback is None:
+            return None
+        return self.fallback.grab(area, out=out)
+
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+        if self.fallback is not None:
+            self.fallback.close()
+        super().close()
+
+
+if __name__ == "__main__":
+    import pyautogui
+    from frame_source import local_frame_source
+
+    from log_setup import setup_logging
+
+    setup_logging("capture_service", level=logging.INFO)
+
+    # Publish the whole screen unless an area is given as x1 y1 x2 y2
+    if len(sys.argv) == 5:
+        area = tuple(int(v) for v in sys.argv[1:5])
+    else:
+        width, height = pyautogui.size()
+        area = (0, 0, width, height)
+
+    service = CaptureService(local_frame_source(), area)
+    sys.exit(0 if service.run() else 1)
@@ -1,50 +1,55 @@
 #!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
 import os
-import time
-import subprocess
+import sys
 import logging
-from datetime import datetime
+from log_setup import setup_logging
 from kill_switch import should_stop
-from AppKit import NSScreen
-import pyautogui
-
-# Disable PyAutoGUI's failsafe and pause features
-pyautogui.FAILSAFE = False
-pyautogui.PAUSE = 0
-
-# Set up logging
-log_dir = os.path.expanduser("~/automation_logs")
-os.makedirs(log_dir, exist_ok=True)
-log_file = os.path.join(log_dir, f"clicker_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+from heartbeat import Heartbeat
+from pid_registry import register_process
+from adaptive_scheduler import AdaptiveScheduler
+from metrics import start_metrics, counter
+from config import get_config
+from signal_bus import SignalListener
+from action_executor import ActionExecutor, focus, click, key
 
 class Clicker:
-    def __init__(self):
+    def __init__(self, click_listener=None, action_executor=None, screen_size=None, config=None):
+        self.config = config or get_config()
         self.working_dir = os.path.dirname(os.path.abspath(__file__))
         self.click_signal_file = os.path.join(self.working_dir, "click_positions")
-        self.check_interval = 0.1
-        self.last_check_time = time.time()
+        self.click_listener = click_listener or SignalListener("click_positions", self.working_dir)
+        self.actions = action_executor or ActionExecutor()
+        self.screen_size = screen_size  # Looked up on every click when not given
+        self.scheduler = AdaptiveScheduler("clicker")
+        self.clicks = counter("clicks_total", component="clicker")
+        self.apply_config()
         
         logging.info(f"Clicker started")
         logging.info(f"Working directory: {self.working_dir}")
         logging.info(f"Click signal file: {self.click_signal_file}")
+        logging.info(f"Action backend: {self.actions.backend.name}")
+    
+    def apply_config(self):
+        """Take the clicker settings from the config; called again whenever the file changes."""
+        self.config_version = self.config.version
+        settings = self.config.section("clicker")
+        self.click_x = settings["click_x"]  # Click position as a fraction of the screen size
+        self.click_y = settings["click_y"]
+        self.check_interval = settings["min_interval"]  # Shortest wait, used right after a click signal
+        self.scheduler.set_intervals(settings["min_interval"], settings["max_interval"])
     
     def get_screen_dimensions(self):
         """Get the main screen dimensions using PyObjC"""
+        if self.screen_size is not None:
+            return self.screen_size
         try:
+            from AppKit import NSScreen
             main_screen = NSScreen.mainScreen()
             frame = main_screen.frame()
             return int(frame.size.width), int(frame.size.height)
         except Exception as e:
             logging.warning(f"Failed to get screen dimensions using PyObjC: {str(e)}")
+            import pyautogui
             return pyautogui.size()  # Use PyAutoGUI's method as a fallback
     
     def click_and_press(self):
@@ -54,67 +59,72 @@ class Clicker:
             width, height = self.get_screen_dimensions()
             
             # Calculate position in right third
-            right_third_x = int(width * 0.83)  # Positioned at 83% of screen width
-            middle_y = int(height * 0.5)       # Middle of screen height
+            right_third_x = int(width * self.click_x)  # 83% of screen width by default
+            middle_y = int(height * self.click_y)      # Middle of screen height by default
             
             logging.debug(f"Screen dimensions: {width}x{height}")
             logging.debug(f"Calculated click position: ({right_third_x}, {middle_y})")
             
-            # Use AppleScript to focus Cursor app and perform actions
-            script = f'''
-            tell application "System Events"
-                tell application process "Cursor"
-                    set frontmost to true
-                    delay 0.2
-                    click at {{x:{right_third_x}, y:{middle_y}}}
-                    delay 0.2
-                    keystroke return using command down
-                end tell
-            end tell
-            '''
-            
-            subprocess.run(['osascript', '-e', script], capture_output=True, text=True)
+            # Focus Cursor app, click and press Command+Enter in one batch
+            self.actions.run([
+                focus("Cursor"),
+                click(right_third_x, middle_y),
+                key("return", ["command"]),
+            ])
             logging.info(f"Clicked at right third ({right_third_x}, {middle_y}) and pressed Command+Enter")
                 
         except Exception as e:
             logging.error(f"Error in click action: {str(e)}")
             logging.debug(f"Full error details: {repr(e)}")
     
-    def process_click_positions(self):
-        """Process click signals - triggers the right-third click and Command+Enter."""
+    def process_click_positions(self, timeout=None):
+        """Wait up to `timeout` seconds for a click signal and act on it; True if one arrived.
+
+        Without a timeout the wait grows while no signals arrive (see AdaptiveScheduler).
+        """
         try:
-            if os.path.exists(self.click_signal_file):
+            if self.config.poll() != self.config_version:
+                self.apply_config()
+            message = self.click_listener.receive(timeout=self.scheduler.interval if timeout is None else timeout)
+            self.scheduler.record(message is not None)
+            if message is not None:
+                logging.debug(f"Received click signal for {len(message.positions)} positions")
                 self.click_and_press()
-                
-                try:
-                    os.remove(self.click_signal_file)
-                    logging.debug("Removed click signal file")
-                except Exception as e:
-                    logging.error(f"Error removing click signal file: {str(e)}")
+                self.clicks.inc()
+                return True
+            return False
                 
         except Exception as e:
             logging.error(f"Error processing click positions: {str(e)}")
+            return False
     
     def run(self):
-        """Main loop to check for and process click signals."""
+        """Main loop to wait for and process click signals."""
         try:
             logging.info("Starting clicker...")
+            register_process("clicker")
+            start_metrics("clicker")
+            heartbeat = Heartbeat("clicker")
             
             while not should_stop():  # Check kill conditions
-                current_time = time.time()
-                if current_time - self.last_check_time >= self.check_interval:
-                    self.last_check_time = current_time
-                    self.process_click_positions()
-                
-                time.sleep(0.1)
+                heartbeat.beat()
+                # Blocks until a signal arrives or the interval passes
+                self.process_click_positions()
             
             logging.info("Clicker stopped by kill switch")
+            return True
                 
         except KeyboardInterrupt:
             logging.info("Clicker stopped by user")
+            return True
         except Exception as e:
             logging.error(f"Fatal error in clicker: {str(e)}")
+            return False
+        finally:
+            self.click_listener.close()
+            self.actions.close()
 
 if __name__ == "__main__":
+    setup_logging("clicker")
     clicker = Clicker()
-    clicker.run()
+    sys.exit(0 if clicker.run() else 1)
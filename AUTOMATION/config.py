@@ -0,0 +1,355 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+import os
+import sys
+import copy
+import json
+import time
+import logging
+import argparse
+import threading
+
+CONFIG_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE = os.environ.get("AUTOMATION_CONFIG", os.path.join(CONFIG_DIR, "automation_config.json"))
+
+# Used for every setting the config file leaves out
+DEFAULTS = {
+    "paths": {
+        "kill_switch_file": "~/automation_files/KILL_SWITCH",
+    },
+    "kill_switch": {
+        "poll_interval": 0.1,
+        "corner_hold": 2.0,  # Seconds the mouse must stay in the top-left corner
+        "corner_size": 5,
+    },
+    "blue_detector": {
+        "positions": [
+            [1693, 1073],  # Submit button
+            [1673, 976],   # Position 1
+            [1668, 727],   # Position 2
+            [1678, 930],   # Position 3
+            [1666, 910],   # Position 4
+        ],
+        "capture_radius": 30,
+        "min_blue_pixels": 1,  # Blue pixels needed to count a position as blue
+        "click_cooldown": 3.0,  # Seconds between clicks
+        "min_interval": 0.1,  # Fastest checking rate, used right after blue was seen
+        "max_interval": 2.0,
+    },
+    "ui_state": {
+        # Button images (relative to templates/) that replace the fixed blue
+        # positions when given; see ui_state.py
+        "templates": [],
+        "search_area": None,  # [x1, y1, x2, y2]; the whole screen when null
+        "threshold": 0.8,  # Minimum match score (-1 to 1)
+        "scales": [0.5, 0.75, 1.0, 1.25, 1.5, 2.0],
+        "margin": 24,  # Pixels around each found button grabbed while tracking
+        "rescan_interval": 2.0,  # Shortest time between full-screen searches
+    },
+    "motion_detector": {
+        "position": [1693, 1073],
+        "threshold": 30,  # Half the side of the watched square
+        "motion_sensitivity": 5,  # Changed pixels needed to count as motion
+        "min_interval": 0.1,
+        "max_interval": 2.0,
+    },
+    "clicker": {
+        "click_x": 0.83,  # Click position as a fraction of the screen size
+        "click_y": 0.5,
+        "min_interval": 0.1,
+        "max_interval": 1.0,
+    },
+    "instruction_typer": {
+        "paste_position": [1306, 1029],
+        "no_motion_delay": 6.0,  # Seconds to wait after last motion
+        "type_cooldown": 1.0,  # Seconds between typing attempts
+        "completion_hold": 3600.0,  # Seconds at 100% before the automation stops
+        "min_interval": 0.1,
+        "max_interval": 2.0,
+    },
+}
+
+
+def _number(minimum=None, maximum=None, integer=False):
+    def check(value):
+        if isinstance(value, bool) or not isinstance(value, int if integer else (int, float)):
+            return "must be an integer" if integer else "must be a number"
+        if minimum is not None and value < minimum:
+            return f"must be at least {minimum}"
+        if maximum is not None and value > maximum:
+            return f"must be at most {maximum}"
+        return None
+    return check
+
+
+def _point(value):
+    if (not isinstance(value, list) or len(value) != 2
+            or any(isinstance(v, bool) or not isinstance(v, int) or v < 0 for v in value)):
+        return "must be an [x, y] pair of non-negative integers"
+    return None
+
+
+def _points(value):
+    if not isinstance(value, list) or not value:
+        return "must be a non-empty list of [x, y] pairs"
+    for point in value:
+        problem = _point(point)
+        if problem:
+            return f"has an entry that {problem}"
+    return None
+
+
+def _box(value):
+    if value is None:
+        return None
+    if (not isinstance(value, list) or len(value) != 4
+            or any(isinstance(v, bool) or not isinstance(v, int) or v < 0 for v in value)
+            or value[2] <= value[0] or value[3] <= value[1]):
+        return "must be null or an [x1, y1, x2, y2] box of non-negative integers"
+    return None
+
+
+def _scales(value):
+    if (not isinstance(value, list) or not value
+            or any(isinstance(v, bool) or not isinstance(v, (int, float)) or not 0.1 <= v <= 4 for v in value)):
+        return "must be a non-empty list of numbers between 0.1 and 4"
+    return None
+
+
+def _paths(value):
+    if not isinstance(value, list) or any(_path(v) for v in value):
+        return "must be a list of paths"
+    return None
+
+
+def _path(value):
+    if not isinstance(value, str) or not value:
+        return "must be a non-empty path"
+    return None
+
+
+def _interval():
+    return _number(0.01, 60)
+
+
+SCHEMA = {
+    "paths": {
+        "kill_switch_file": _path,
+    },
+    "kill_switch": {
+        "poll_interval": _interval(),
+        "corner_hold": _number(0),
+        "corner_size": _number(1, integer=True),
+    },
+    "blue_detector": {
+        "positions": _points,
+        "capture_radius": _number(1, 500, integer=True),
+        "min_blue_pixels": _number(1, integer=True),
+        "click_cooldown": _number(0),
+        "min_interval": _interval(),
+        "max_interval": _interval(),
+    },
+    "ui_state": {
+        "templates": _paths,
+        "search_area": _box,
+        "threshold": _number(0, 1),
+        "scales": _scales,
+        "margin": _number(1, 500, integer=True),
+        "rescan_interval": _number(0),
+    },
+    "motion_detector": {
+        "position": _point,
+        "threshold": _number(1, 500, integer=True),
+        "motion_sensitivity": _number(0, integer=True),
+        "min_interval": _interval(),
+        "max_interval": _interval(),
+    },
+    "clicker": {
+        "click_x": _number(0, 1),
+        "click_y": _number(0, 1),
+        "min_interval": _interval(),
+        "max_interval": _interval(),
+    },
+    "instruction_typer": {
+        "paste_position": _point,
+        "no_motion_delay": _number(0),
+        "type_cooldown": _number(0),
+        "completion_hold": _number(0),
+        "min_interval": _interval(),
+        "max_interval": _interval(),
+    },
+}
+
+
+class ConfigError(ValueError):
+    """The config file is unreadable or has invalid settings; `problems` lists each one."""
+
+    def __init__(self, path, problems):
+        self.path = path
+        self.problems = problems
+        super().__init__(f"Invalid config {path}: " + "; ".join(problems))
+
+
+def validate(data):
+    """Return the list of problems in a (partial) config dict; empty when it is valid."""
+    if not isinstance(data, dict):
+        return ["the config must be a JSON object"]
+    problems = []
+    for section, settings in data.items():
+        schema = SCHEMA.get(section)
+        if schema is None:
+            problems.append(f"unknown section '{section}'")
+            continue
+        if not isinstance(settings, dict):
+            problems.append(f"'{section}' must be an object")
+            continue
+        count = len(problems)
+        for key, value in settings.items():
+            check = schema.get(key)
+            if check is None:
+                problems.append(f"unknown setting '{section}.{key}'")
+                continue
+            problem = check(value)
+            if problem:
+                problems.append(f"'{section}.{key}' {problem}")
+        merged = dict(DEFAULTS[section], **settings)
+        if "min_interval" in schema and len(problems) == count and merged["min_interval"] > merged["max_interval"]:
+            problems.append(f"'{section}.min_interval' must not be above '{section}.max_interval'")
+    return problems
+
+
+def merge(data):
+    """DEFAULTS with the sections of `data` laid over them."""
+    merged = copy.deepcopy(DEFAULTS)
+    for section, settings in data.items():
+        merged[section].update(copy.deepcopy(settings))
+    return merged
+
+
+def load_file(path):
+    """Read and validate a config file; returns {} if it does not exist, raises ConfigError if invalid."""
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        raise ConfigError(path, [str(e)])
+    problems = validate(data)
+    if problems:
+        raise ConfigError(path, problems)
+    return data
+
+
+class Config:
+    """Settings shared by all components: DEFAULTS overlaid with the JSON config file.
+
+    The file may set any subset of the settings. `poll()` stats the file at
+    most every `check_interval` seconds and reloads it when its mtime or
+    size changed, so components can call it every tick and pick up edits
+    without restarting. An invalid edit is logged and the last good
+    settings stay in effect. `version` goes up with every reload that
+    changed something.
+    """
+
+    def __init__(self, path=CONFIG_FILE, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.version = 0
+        self.settings = copy.deepcopy(DEFAULTS)
+        self.file_state = None  # (mtime, size) of the file last read
+        self.next_check = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def reload(self):
+        """Re-read the file now; True if the settings changed."""
+        with self._lock:
+            self.file_state = self._stat()
+            try:
+                settings = merge(load_file(self.path))
+            except ConfigError as e:
+                logging.error(f"{str(e)} - keeping the previous settings")
+                return False
+            if settings == self.settings:
+                return False
+            self.settings = settings
+            self.version += 1
+            logging.info(f"Loaded config from {self.path} (version {self.version})")
+            return True
+
+    def poll(self):
+        """Reload the file if it changed since the last look; returns the current version."""
+        now = time.monotonic()
+        if now >= self.next_check:
+            self.next_check = now + self.check_interval
+            if self._stat() != self.file_state:
+                self.reload()
+        return self.version
+
+    def section(self, name):
+        """The current settings of one section, e.g. config.section("blue_detector")."""
+        return self.settings[name]
+
+    def path_setting(self, name):
+        """A `paths` setting with `~` expanded; relative paths are taken from the scripts' directory."""
+        return os.path.join(CONFIG_DIR, os.path.expanduser(self.settings["paths"][name]))
+
+
+class StaticConfig(Config):
+    """Fixed settings that are never reloaded, for replays and benchmarks: DEFAULTS overlaid with `data`."""
+
+    def __init__(self, data=None):
+        problems = validate(data or {})
+        if problems:
+            raise ConfigError("<static>", problems)
+        self.path = None
+        self.version = 0
+        self.settings = merge(data or {})
+
+    def reload(self):
+        return False
+
+    def poll(self):
+        return self.version
+
+
+_config = None
+_config_lock = threading.Lock()
+
+
+def get_config():
+    """Return the process-wide Config, loading it on first use."""
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                _config = Config()
+    return _config
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check or show the automation settings.")
+    parser.add_argument("--check", action="store_true", help="validate the config file and exit 1 if it is invalid")
+    parser.add_argument("--defaults", action="store_true", help="print the default settings as a starting config file")
+    args = parser.parse_args()
+
+    if args.defaults:
+        print(json.dumps(DEFAULTS, indent=2))
+        sys.exit(0)
+    try:
+        data = load_file(CONFIG_FILE)
+    except ConfigError as e:
+        for problem in e.problems:
+            print(f"{CONFIG_FILE}: {problem}", file=sys.stderr)
+        sys.exit(1)
+    if args.check:
+        print(f"{CONFIG_FILE}: ok" if data else f"{CONFIG_FILE}: not found, using the defaults")
+    else:
+        print(json.dumps(merge(data), indent=2))
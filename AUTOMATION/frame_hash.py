@@ -0,0 +1,98 @@
+import zlib
+import numpy as np
+from metrics import counter
+
+try:
+    import xxhash
+
+    def _digest(data):
+        return xxhash.xxh3_64_intdigest(data)
+
+    HASH_NAME = "xxh3"
+except ImportError:
+    # zlib's crc32 is C and needs no extra package; roughly 2 GB/s
+    def _digest(data):
+        return zlib.crc32(data)
+
+    HASH_NAME = "crc32"
+
+
+# ROIs bigger than this are first compared on every SAMPLE_ROWS-th row
+LARGE_ROI = 256 * 1024
+SAMPLE_ROWS = 16
+
+
+def fingerprint(pixels):
+    """Fingerprint of a frame or ROI: its shape plus a hash of every pixel.
+
+    Every byte is hashed, not a sample, so a one-pixel change is never
+    missed. Views that are not contiguous (ROIs cut from a larger grab) are
+    copied first, which is cheap at ROI sizes.
+    """
+    return (pixels.shape, _digest(np.ascontiguousarray(pixels)))
+
+
+class FingerprintCache:
+    """Skip work on ROIs whose pixels are identical to the last time they were seen.
+
+    Each ROI is identified by a key (position index, element name, ...).
+    `get()` returns the cached result for an unchanged ROI and computes it
+    otherwise; `unchanged()` only reports whether the ROI changed, for
+    callers that keep their own state (frame differencing). Hits and misses
+    are counted in `frame_hash_total{component,result}`.
+    """
+
+    def __init__(self, component):
+        self.component = component
+        self.entries = {}  # key -> (fingerprint, result)
+        self.hits = counter("frame_hash_total", component=component, result="hit")
+        self.misses = counter("frame_hash_total", component=component, result="miss")
+
+    def _compare(self, key, pixels):
+        """Return (unchanged, fingerprint of `pixels`) against what was last stored under `key`."""
+        entry = self.entries.get(key)
+        previous = entry[0] if entry is not None else None
+        if pixels.nbytes < LARGE_ROI:
+            current = fingerprint(pixels)
+            return current == previous, current
+        # A large ROI that changed almost always shows it in the sampled rows,
+        # so most misses cost a sixteenth of a full hash. A skip still needs
+        # the full fingerprint to match.
+        sample = fingerprint(pixels[::SAMPLE_ROWS])
+        if previous is None or previous[0] != sample:
+            return False, (sample, None)
+        current = (sample, fingerprint(pixels))
+        return previous[1] is not None and current == previous, current
+
+    def get(self, key, pixels, compute):
+        """Return `compute(pixels)`, reusing the previous result if the ROI has not changed."""
+        unchanged, current = self._compare(key, pixels)
+        if unchanged:
+            self.hits.inc()
+            return self.entries[key][1]
+        self.misses.inc()
+        result = compute(pixels)
+        self.entries[key] = (current, result)
+        return result
+
+    def unchanged(self, key, pixels):
+        """True if the ROI is identical to the previous call with this key."""
+        unchanged, current = self._compare(key, pixels)
+        self.entries[key] = (current, None)
+        if unchanged:
+            self.hits.inc()
+            return True
+        self.misses.inc()
+        return False
+
+    def forget(self, key=None):
+        """Drop one key, or everything (e.g. when the settings behind the results change)."""
+        if key is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(key, None)
+
+    def hit_rate(self):
+        """Share of lookups (0.0 - 1.0) that skipped the work, since the process started."""
+        total = self.hits.value + self.misses.value
+        return self.hits.value / total if total else 0.0
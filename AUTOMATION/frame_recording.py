@@ -0,0 +1,188 @@
+import json
+import time
+import zlib
+import struct
+import numpy as np
+from frame_source import FrameSource
+
+# File layout:
+#   b"AFRM" | u16 version | u32 header length | header JSON
+#   then one record per frame:
+#   u32 record length | i64 timestamp (ns) |
+#   per ROI: u32 length + zlib(frame XOR previous frame) |
+#   u32 length + decisions JSON
+# XOR against the previous frame leaves mostly zeros on a static screen,
+# which zlib at level 1 squeezes to almost nothing at little CPU cost.
+MAGIC = b"AFRM"
+VERSION = 1
+_PREFIX = struct.Struct("<4sHI")
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+
+
+def _roi_shape(roi):
+    x1, y1, x2, y2 = roi
+    return (y2 - y1, x2 - x1, 3)
+
+
+class FrameRecordingWriter:
+    """Append frames (one RGB array per ROI) and their detection decisions to a recording file."""
+
+    def __init__(self, path, rois, metadata=None, level=1):
+        self.path = path
+        self.rois = [tuple(int(v) for v in roi) for roi in rois]
+        self.level = level
+        self.frames = 0
+        self._previous = [np.zeros(_roi_shape(roi), dtype=np.uint8) for roi in self.rois]
+        self._delta = [np.empty(_roi_shape(roi), dtype=np.uint8) for roi in self.rois]
+        self.file = open(path, "wb")
+        header = json.dumps({"rois": self.rois, "metadata": metadata or {}}).encode()
+        self.file.write(_PREFIX.pack(MAGIC, VERSION, len(header)))
+        self.file.write(header)
+
+    def write(self, frames, decisions=None, timestamp_ns=None):
+        """Record one frame: `frames` holds an (H, W, 3) uint8 array per ROI."""
+        parts = [_I64.pack(time.time_ns() if timestamp_ns is None else timestamp_ns)]
+        for frame, previous, delta in zip(frames, self._previous, self._delta):
+            np.bitwise_xor(frame, previous, out=delta)
+            data = zlib.compress(delta, self.level)
+            parts.append(_U32.pack(len(data)))
+            parts.append(data)
+            np.copyto(previous, frame)
+        data = json.dumps(decisions).encode()
+        parts.append(_U32.pack(len(data)))
+        parts.append(data)
+
+        record = b"".join(parts)
+        self.file.write(_U32.pack(len(record)))
+        self.file.write(record)
+        self.frames += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FrameRecordingReader:
+    """Iterate over a recording as (timestamp_ns, frames, decisions).
+
+    The frame arrays are reused from one record to the next; copy them to
+    keep them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        magic, version, header_length = _PREFIX.unpack(self.file.read(_PREFIX.size))
+        if magic != MAGIC or version != VERSION:
+            self.file.close()
+            raise ValueError(f"{path} is not a version {VERSION} frame recording")
+        header = json.loads(self.file.read(header_length))
+        self.rois = [tuple(roi) for roi in header["rois"]]
+        self.metadata = header["metadata"]
+        self._data_start = self.file.tell()
+        self._frames = [np.zeros(_roi_shape(roi), dtype=np.uint8) for roi in self.rois]
+
+    def rewind(self):
+        self.file.seek(self._data_start)
+        for frame in self._frames:
+            frame.fill(0)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        prefix = self.file.read(_U32.size)
+        if len(prefix) < _U32.size:
+            raise StopIteration
+        record = memoryview(self.file.read(_U32.unpack(prefix)[0]))
+        (timestamp_ns,) = _I64.unpack_from(record, 0)
+        offset = _I64.size
+        for frame in self._frames:
+            (length,) = _U32.unpack_from(record, offset)
+            offset += _U32.size
+            delta = np.frombuffer(zlib.decompress(record[offset:offset + length]), dtype=np.uint8)
+            np.bitwise_xor(frame, delta.reshape(frame.shape), out=frame)
+            offset += length
+        (length,) = _U32.unpack_from(record, offset)
+        offset += _U32.size
+        decisions = json.loads(bytes(record[offset:offset + length]))
+        return timestamp_ns, self._frames, decisions
+
+    def close(self):
+        self.file.close()
+
+
+class SnapshotFrameSource(FrameSource):
+    """Serve grabs from a fixed set of ROI images.
+
+    `set_frames` installs the images for the current moment; every grab
+    of an area inside one of the ROIs is cut out of it. Grabs outside all
+    ROIs fail.
+    """
+
+    name = "snapshot"
+
+    def __init__(self, rois):
+        super().__init__()
+        self.rois = [tuple(roi) for roi in rois]
+        self.frames = [None] * len(self.rois)
+
+    def set_frames(self, frames):
+        self.frames = list(frames)
+
+    def _capture(self, area, out):
+        x1, y1, x2, y2 = area
+        for (rx1, ry1, rx2, ry2), frame in zip(self.rois, self.frames):
+            if frame is not None and rx1 <= x1 and ry1 <= y1 and x2 <= rx2 and y2 <= ry2:
+                np.copyto(out, frame[y1 - ry1:y2 - ry1, x1 - rx1:x2 - rx1])
+                return True
+        return False
+
+
+class RecordedFrameSource(SnapshotFrameSource):
+    """Replay a recording file; `advance()` moves to the next frame.
+
+    With `realtime` set, `advance()` waits until the frame's recorded
+    offset from the first frame has elapsed; otherwise frames come as fast
+    as they are asked for.
+    """
+
+    name = "recording"
+
+    def __init__(self, path, realtime=False):
+        self.reader = FrameRecordingReader(path)
+        super().__init__(self.reader.rois)
+        self.realtime = realtime
+        self.decisions = None
+        self.timestamp_ns = None
+        self._first_ns = None
+        self._start = None
+
+    def advance(self):
+        """Load the next frame; returns False at the end of the recording."""
+        try:
+            timestamp_ns, frames, decisions = next(self.reader)
+        except StopIteration:
+            return False
+        if self.realtime:
+            if self._first_ns is None:
+                self._first_ns, self._start = timestamp_ns, time.monotonic()
+            delay = self._start + (timestamp_ns - self._first_ns) / 1e9 - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.timestamp_ns = timestamp_ns
+        self.decisions = decisions
+        self.set_frames(frames)
+        return True
+
+    def close(self):
+        self.reader.close()
+        super().close()
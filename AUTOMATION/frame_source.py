@@ -0,0 +1,227 @@
+import os
+import sys
+import time
+import logging
+import numpy as np
+from metrics import counter, timer
+
+
+def rgb_to_gray(rgb, out=None, scratch=None):
+    """Convert an (H, W, 3) uint8 RGB array to uint8 luma, writing into `out`.
+
+    Uses integer BT.601 weights (77, 150, 29) / 256. `scratch` is an
+    optional (H, W) uint16 buffer so repeated calls do not allocate.
+    """
+    shape = rgb.shape[:2]
+    if out is None or out.shape != shape:
+        out = np.empty(shape, dtype=np.uint8)
+    if scratch is None or scratch.shape != shape:
+        scratch = np.empty(shape, dtype=np.uint16)
+    np.multiply(rgb[..., 0], 77, out=scratch, dtype=np.uint16)
+    scratch += rgb[..., 1] * np.uint16(150)
+    scratch += rgb[..., 2] * np.uint16(29)
+    np.right_shift(scratch, 8, out=scratch)
+    np.copyto(out, scratch, casting="unsafe")
+    return out
+
+
+class FrameSource:
+    """Base class for anything that can hand out screen frames.
+
+    Subclasses implement `_capture(area, out)`, which fills `out` (an
+    (H, W, 3) uint8 RGB buffer for the (x1, y1, x2, y2) area) and returns
+    True on success. Frames returned by `grab` live in a buffer that is
+    reused by the next grab of the same size, so copy them (or pass your
+    own `out`) if they need to outlive the next call.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self._buffers = {}
+        self.capture_time = timer("capture_seconds", source=self.name)
+        self.capture_failures = counter("capture_failures_total", source=self.name)
+
+    def _buffer(self, key, shape, dtype):
+        buf = self._buffers.get(key)
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, dtype=dtype)
+            self._buffers[key] = buf
+        return buf
+
+    def _capture(self, area, out):
+        raise NotImplementedError
+
+    def grab(self, area, out=None):
+        """Return the area as an (H, W, 3) RGB array, or None if capture failed."""
+        x1, y1, x2, y2 = area
+        shape = (y2 - y1, x2 - x1, 3)
+        if out is None or out.shape != shape:
+            out = self._buffer("rgb", shape, np.uint8)
+        start = time.perf_counter()
+        captured = self._capture(area, out)
+        self.capture_time.observe(time.perf_counter() - start)
+        if not captured:
+            self.capture_failures.inc()
+            return None
+        return out
+
+    def grab_gray(self, area, out=None):
+        """Return the area as an (H, W) uint8 grayscale array, or None if capture failed."""
+        rgb = self.grab(area)
+        if rgb is None:
+            return None
+        scratch = self._buffer("gray_scratch", rgb.shape[:2], np.uint16)
+        if out is None or out.shape != rgb.shape[:2]:
+            out = self._buffer("gray", rgb.shape[:2], np.uint8)
+        return rgb_to_gray(rgb, out, scratch)
+
+    def close(self):
+        self._buffers.clear()
+
+
+class QuartzFrameSource(FrameSource):
+    """Capture straight from the macOS window server through Quartz.
+
+    No subprocess, no temp file and no PNG encode/decode: the CGImage bytes
+    are viewed with NumPy and copied once into the reusable RGB buffer.
+    Retina captures are subsampled back to point resolution.
+    """
+
+    name = "quartz"
+
+    def __init__(self):
+        super().__init__()
+        import Quartz
+        self.Quartz = Quartz
+
+    def _capture(self, area, out):
+        Q = self.Quartz
+        x1, y1, x2, y2 = area
+        width, height = x2 - x1, y2 - y1
+        image = Q.CGWindowListCreateImage(
+            Q.CGRectMake(x1, y1, width, height),
+            Q.kCGWindowListOptionOnScreenOnly,
+            Q.kCGNullWindowID,
+            Q.kCGWindowImageDefault
+        )
+        if image is None:
+            return False
+
+        image_width = Q.CGImageGetWidth(image)
+        image_height = Q.CGImageGetHeight(image)
+        stride = Q.CGImageGetBytesPerRow(image)
+        data = Q.CGDataProviderCopyData(Q.CGImageGetDataProvider(image))
+
+        # Pixels are BGRA with rows padded to `stride` bytes
+        bgra = np.frombuffer(data, dtype=np.uint8).reshape(image_height, stride // 4, 4)[:, :image_width]
+        scale_y = max(1, image_height // height)
+        scale_x = max(1, image_width // width)
+        if scale_y > 1 or scale_x > 1:
+            bgra = bgra[::scale_y, ::scale_x]
+        np.copyto(out, bgra[:height, :width, 2::-1])
+        return True
+
+
+class ImageGrabFrameSource(FrameSource):
+    """Capture through PIL.ImageGrab (portable fallback)."""
+
+    name = "imagegrab"
+
+    def __init__(self):
+        super().__init__()
+        from PIL import ImageGrab
+        self.ImageGrab = ImageGrab
+
+    def _capture(self, area, out):
+        pixels = np.asarray(self.ImageGrab.grab(area))
+        np.copyto(out, pixels[:out.shape[0], :out.shape[1], :3])
+        return True
+
+
+class SyntheticFrameSource(FrameSource):
+    """Generated screen for headless runs and benchmarks.
+
+    The screen is static noise with a small bright block that moves every
+    `motion_every` grabs (0 disables motion). Only the requested area is
+    rendered, so it is cheap for small regions.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, width=2560, height=1440, motion_every=0, block_size=8, seed=0):
+        super().__init__()
+        self.width = width
+        self.height = height
+        self.motion_every = motion_every
+        self.block_size = block_size
+        self.frame_count = 0
+        self.block_position = (0, 0)
+        self._rng = np.random.default_rng(seed)
+        self._background = self._rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+
+    def _capture(self, area, out):
+        x1, y1, x2, y2 = area
+        self.frame_count += 1
+        if self.motion_every and self.frame_count % self.motion_every == 0:
+            self.block_position = (
+                int(self._rng.integers(x1, max(x1 + 1, x2 - self.block_size))),
+                int(self._rng.integers(y1, max(y1 + 1, y2 - self.block_size)))
+            )
+        np.copyto(out, self._background[y1:y2, x1:x2])
+
+        bx, by = self.block_position
+        size = self.block_size
+        left, top = max(bx, x1), max(by, y1)
+        right, bottom = min(bx + size, x2), min(by + size, y2)
+        if left < right and top < bottom:
+            out[top - y1:bottom - y1, left - x1:right - x1] = 255
+        return True
+
+
+class ReplayFrameSource(FrameSource):
+    """Replay a sequence of full-screen RGB frames, advancing one frame per grab."""
+
+    name = "replay"
+
+    def __init__(self, frames, loop=True):
+        super().__init__()
+        self.frames = list(frames)
+        self.loop = loop
+        self.index = 0
+
+    def _capture(self, area, out):
+        if not self.frames:
+            return False
+        if self.index >= len(self.frames):
+            if not self.loop:
+                return False
+            self.index = 0
+        frame = self.frames[self.index]
+        self.index += 1
+        x1, y1, x2, y2 = area
+        np.copyto(out, frame[y1:y2, x1:x2, :3])
+        return True
+
+
+def local_frame_source():
+    """Return the fastest direct screen source available on this machine."""
+    if sys.platform == "darwin":
+        try:
+            return QuartzFrameSource()
+        except Exception as e:
+            logging.warning(f"Quartz capture unavailable, falling back to ImageGrab: {str(e)}")
+    return ImageGrabFrameSource()
+
+
+def default_frame_source():
+    """Return the frame source components should use.
+
+    When AUTOMATION_SHARED_CAPTURE is set (run_automation.py does this when it
+    starts capture_service.py) frames are read from the shared capture ring,
+    with direct capture as the fallback.
+    """
+    if os.environ.get("AUTOMATION_SHARED_CAPTURE"):
+        from capture_service import SharedFrameSource
+        return SharedFrameSource(fallback=local_frame_source())
+    return local_frame_source()
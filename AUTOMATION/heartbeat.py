@@ -0,0 +1,61 @@
+import os
+import json
+import time
+import logging
+from signal_file import SignalFileWriter, read_signal_file
+
+HEARTBEAT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "heartbeats")
+
+
+def heartbeat_path(name, directory=HEARTBEAT_DIR):
+    return os.path.join(directory, name)
+
+
+class Heartbeat:
+    """Let a supervisor know a component's main loop is still turning.
+
+    Call `beat()` once per loop iteration. The loop count and a timestamp are
+    written to `heartbeats/<name>` at most once every `interval` seconds.
+    """
+
+    def __init__(self, name, interval=1.0, directory=HEARTBEAT_DIR):
+        self.name = name
+        self.interval = interval
+        self.loops = 0
+        self.started = time.time()
+        self.last_write = 0
+        self.writer = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self.writer = SignalFileWriter(heartbeat_path(name, directory))
+        except Exception as e:
+            logging.warning(f"Heartbeat disabled for {name}: {str(e)}")
+
+    def beat(self):
+        self.loops += 1
+        now = time.monotonic()
+        if self.writer is None or now - self.last_write < self.interval:
+            return
+        self.last_write = now
+        try:
+            self.writer.write(json.dumps({
+                "pid": os.getpid(),
+                "loops": self.loops,
+                "started": self.started,
+            }))
+        except Exception as e:
+            logging.error(f"Error writing heartbeat for {self.name}: {str(e)}")
+
+
+def read_heartbeat(name, directory=HEARTBEAT_DIR):
+    """Return the last heartbeat of `name` as a dict (with its "time"), or None."""
+    result = read_signal_file(heartbeat_path(name, directory))
+    if result is None or result[0] is None:
+        return None
+    _, timestamp, payload = result
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        return None
+    data["time"] = timestamp
+    return data
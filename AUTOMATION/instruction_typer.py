@@ -1,55 +1,54 @@
 #!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
 import os
+import sys
 import time
-import pyautogui
-import pyperclip
-import numpy as np
-import cv2
-from PIL import ImageGrab
-from datetime import datetime
 import logging
+from log_setup import setup_logging
 from kill_switch import should_stop
-import subprocess
-
-# Disable PyAutoGUI's failsafe and pause features for faster operation
-pyautogui.FAILSAFE = False
-pyautogui.PAUSE = 0
-
-# Set up logging
-log_dir = os.path.expanduser("~/automation_logs")
-os.makedirs(log_dir, exist_ok=True)
-log_file = os.path.join(log_dir, f"instruction_typer_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+from heartbeat import Heartbeat
+from pid_registry import register_process
+from adaptive_scheduler import AdaptiveScheduler
+from metrics import start_metrics, counter, timer
+from config import get_config
+from frame_source import default_frame_source
+from motion_engine import TiledMotionEngine
+from tree_index import tree_index
+from roadmap_state import RoadmapState
+from progress_analytics import ProgressLog
+from action_executor import ActionExecutor, focus, click, paste, key
 
 class InstructionTyper:
-    def __init__(self):
+    def __init__(self, frame_source=None, action_executor=None, screen_size=None, config=None):
+        self.config = config or get_config()
+        self.frame_source = frame_source or default_frame_source()
+        self.actions = action_executor or ActionExecutor()
         self.working_dir = os.path.dirname(os.path.abspath(__file__))
         self.instructions_file = os.path.join(self.working_dir, "instructions.txt")
-        self.paste_position = (1306, 1029)  # Paste position coordinates
         self.current_instruction = 0
-        self.check_interval = 0.1
-        self.last_check_time = time.time()
-        self.no_motion_delay = 6  # Seconds to wait after last motion
+        self.scheduler = AdaptiveScheduler("instruction_typer")
         self.last_type_time = 0
-        self.type_cooldown = 1  # Seconds between typing attempts
         self.last_motion_time = time.time()
-        self.last_frame = None
+        self.motion_engine = TiledMotionEngine(scale=4, tile=16, component="instruction_typer")  # Unchanged bands are skipped
         self.completion_time = None  # Time when project reached 100%
+        self.detect_time = timer("detect_seconds", component="instruction_typer")
+        self.instructions_typed = counter("instructions_typed_total", component="instruction_typer")
+        self.apply_config()
         
         # Capture the initial directory where the script was first executed
         self.initial_execution_dir = os.environ.get('INITIAL_EXECUTION_DIR', os.getcwd())
+        self.roadmap = RoadmapState(os.path.join(self.initial_execution_dir, 'ROAD_MAP.md'))
+        self.roadmap.add_listener(self.on_progress_threshold)
+        self.progress_log = ProgressLog(self.initial_execution_dir)
+        self.roadmap.add_change_listener(self.progress_log.record_progress)
         
         # Get screen size for right third detection
-        screen_width, screen_height = pyautogui.size()
+        if screen_size is None:
+            import pyautogui
+            screen_size = pyautogui.size()
+        screen_width, screen_height = screen_size
+        self.screen_center = (screen_width // 2, screen_height // 2)
         self.right_third_x = int(screen_width * 2/3)
+        self.motion_area = (self.right_third_x, 0, screen_width, screen_height)
         
         logging.info(f"Instruction Typer started")
         logging.info(f"Working directory: {self.working_dir}")
@@ -57,38 +56,38 @@ class InstructionTyper:
         logging.info(f"Instructions file: {self.instructions_file}")
         logging.info(f"Paste position: {self.paste_position}")
         logging.info(f"Right third starts at x={self.right_third_x}")
+        logging.info(f"Action backend: {self.actions.backend.name}")
+        logging.info(f"Frame source: {self.frame_source.name}")
+    
+    def apply_config(self):
+        """Take the instruction_typer settings from the config; called again whenever the file changes."""
+        self.config_version = self.config.version
+        settings = self.config.section("instruction_typer")
+        self.paste_position = tuple(settings["paste_position"])  # Paste position coordinates
+        self.no_motion_delay = settings["no_motion_delay"]  # Seconds to wait after last motion
+        self.type_cooldown = settings["type_cooldown"]  # Seconds between typing attempts
+        self.completion_hold = settings["completion_hold"]  # Seconds at 100% before stopping
+        self.check_interval = settings["min_interval"]  # Fastest checking rate, used while motion is seen
+        self.scheduler.set_intervals(settings["min_interval"], settings["max_interval"])
     
     def detect_motion(self):
         """Detect any motion in the right third of the screen."""
         try:
             # Capture the right third of the screen
-            screen_width, screen_height = pyautogui.size()
-            area = (self.right_third_x, 0, screen_width, screen_height)
-            current_frame = np.array(ImageGrab.grab(area))
-            
-            if self.last_frame is None:
-                self.last_frame = current_frame
+            current_frame = self.frame_source.grab(self.motion_area)
+            if current_frame is None:
                 return False
             
-            # Calculate difference between frames
-            diff = cv2.absdiff(current_frame, self.last_frame)
-            
-            # Calculate RGB differences separately
-            r_diff = diff[:,:,0]
-            g_diff = diff[:,:,1]
-            b_diff = diff[:,:,2]
+            # Compare bands of the frame by checksum, and changed bands by their RGB block sums;
+            # a still screen costs one checksum pass
+            changed_blocks = self.motion_engine.update(current_frame)
             
-            # Count changed pixels (any channel changed by more than 0)
-            total_changed_pixels = np.sum((r_diff > 0) | (g_diff > 0) | (b_diff > 0))
-            
-            # Store current frame for next comparison
-            self.last_frame = current_frame.copy()
-            
-            # Consider ANY pixel change as motion
-            if total_changed_pixels > 0:
+            # Consider ANY block change as motion
+            if changed_blocks > 0:
                 self.last_motion_time = time.time()
-                if total_changed_pixels > 10:  # Only log significant motion
-                    logging.info(f"Motion detected in right third: {total_changed_pixels} pixels changed")
+                if changed_blocks > 10:  # Only log significant motion
+                    logging.info(f"Motion detected in right third: {changed_blocks} blocks changed "
+                                 f"in {self.motion_engine.changed_bands} bands")
                 return True
             
             return False
@@ -105,7 +104,9 @@ class InstructionTyper:
                 return False
             
             # Check for current motion
-            if self.detect_motion():
+            with self.detect_time.time():
+                motion = self.detect_motion()
+            if motion:
                 return False
             
             # Check if enough time has passed since last motion
@@ -123,13 +124,7 @@ class InstructionTyper:
     def create_instructions_file(self):
         """Create hardcoded instructions."""
         # Check percentage from ROAD_MAP.md
-        try:
-            with open('ROAD_MAP.md', 'r') as f:
-                first_line = f.readline().strip()
-                # Extract percentage
-                percentage = int(first_line.replace('% complete', '').strip())
-        except (FileNotFoundError, ValueError):
-            percentage = 0
+        percentage = self.roadmap.refresh()
 
         # Get project tree structure
         project_tree = get_project_tree()
@@ -207,17 +202,9 @@ class InstructionTyper:
         logging.info("Hardcoded instructions generated with project tree")
     
     def click_without_moving(self, x, y):
-        """Perform a click without any mouse movement using AppleScript"""
+        """Perform a click without any mouse movement through the action executor"""
         try:
-            script = f'''
-            tell application "System Events"
-                tell application process "Cursor"
-                    set frontmost to true
-                    click at {{x:{x}, y:{y}}}
-                end tell
-            end tell
-            '''
-            subprocess.run(['osascript', '-e', script], capture_output=True, text=True)
+            self.actions.run([focus("Cursor"), click(x, y)])
         except Exception as e:
             logging.error(f"Error in invisible click: {str(e)}")
 
@@ -247,29 +234,17 @@ class InstructionTyper:
                 
                 logging.info(f"Typing instruction {self.current_instruction + 1}: {instruction[:30]}...")
                 
-                # Focus Cursor app and perform actions
-                script = f'''
-                tell application "System Events"
-                    tell application process "Cursor"
-                        set frontmost to true
-                        delay 0.2
-                        click at {{x:{self.paste_position[0]}, y:{self.paste_position[1]}}}
-                        delay 0.2
-                        
-                        -- Type the instruction
-                        set the clipboard to "{full_instruction}"
-                        delay 0.1
-                        keystroke "v" using command down
-                        delay 0.1
-                        keystroke return
-                        
-                        -- Click in the middle
-                        delay 0.1
-                        click at {{x:{pyautogui.size()[0] // 2}, y:{pyautogui.size()[1] // 2}}}
-                    end tell
-                end tell
-                '''
-                subprocess.run(['osascript', '-e', script], capture_output=True, text=True)
+                # Focus Cursor, paste the instruction, send it and click in the middle.
+                # The text travels as JSON, so quotes in it need no escaping.
+                self.actions.run([
+                    focus("Cursor"),
+                    click(*self.paste_position),
+                    paste(full_instruction),
+                    key("return"),
+                    click(*self.screen_center),
+                ])
+                self.progress_log.record_instruction(self.current_instruction, instruction)
+                self.instructions_typed.inc()
                 
                 self.current_instruction += 1
                 self.last_type_time = time.time()
@@ -277,60 +252,86 @@ class InstructionTyper:
         except Exception as e:
             logging.error(f"Error typing instruction: {str(e)}")
     
+    def on_progress_threshold(self, threshold, old, new):
+        """Switch to the instruction set for the new progress band."""
+        if threshold == 100 and new < 100:
+            # Dropped back below 100%; the completion timer starts over
+            self.completion_time = None
+        elif threshold < 100 and getattr(self, 'instructions', None):
+            logging.info(f"Progress crossed {threshold}% ({old}% -> {new}%), regenerating instructions")
+            self.create_instructions_file()
+            self.current_instruction = 0
+    
     def check_project_completion(self):
         """Check if project is 100% complete and track time."""
         try:
-            roadmap_path = os.path.join(self.initial_execution_dir, 'ROAD_MAP.md')
-            if os.path.exists(roadmap_path):
-                with open(roadmap_path, 'r') as f:
-                    first_line = f.readline().strip()
-                    try:
-                        percentage = int(first_line.replace('% complete', '').strip())
-                        if percentage >= 100:
-                            if self.completion_time is None:
-                                self.completion_time = time.time()
-                                logging.info("Project reached 100% completion. Timer started.")
-                            elif time.time() - self.completion_time >= 3600:  # 1 hour = 3600 seconds
-                                logging.info("1 hour passed since 100% completion. Stopping automation.")
-                                return True
-                    except ValueError:
-                        pass
+            percentage = self.roadmap.refresh()
+            if percentage >= 100:
+                if self.completion_time is None:
+                    self.completion_time = time.time()
+                    logging.info("Project reached 100% completion. Timer started.")
+                elif time.time() - self.completion_time >= self.completion_hold:
+                    logging.info(f"{self.completion_hold / 60:.0f} minutes passed since 100% completion. Stopping automation.")
+                    return True
             return False
         except Exception as e:
             logging.error(f"Error checking project completion: {str(e)}")
             return False
     
+    def tick(self):
+        """Run one pass of the main loop; returns False once the project is finished."""
+        self.scheduler.check_started()
+        if self.config.poll() != self.config_version:
+            self.apply_config()
+        if self.check_project_completion():
+            return False
+        
+        motion_time = self.last_motion_time
+        if self.check_motion_status():
+            self.type_instruction()
+        self.scheduler.record(self.last_motion_time != motion_time)
+        return True
+    
     def run(self):
         """Main loop to check motion status and type instructions."""
         try:
             logging.info("Starting instruction typer...")
+            register_process("instruction_typer")
+            start_metrics("instruction_typer")
+            heartbeat = Heartbeat("instruction_typer")
             self.create_instructions_file()
             
             while not should_stop():
-                # Check if it's time to stop due to project completion
-                if self.check_project_completion():
+                heartbeat.beat()
+                
+                # Stops once the project has been complete long enough
+                if not self.tick():
                     break
-                    
-                current_time = time.time()
-                if current_time - self.last_check_time >= self.check_interval:
-                    self.last_check_time = current_time
-                    
-                    if self.check_motion_status():
-                        self.type_instruction()
                 
-                time.sleep(0.1)
+                # Checks back off while the screen is still
+                self.scheduler.sleep()
             
             logging.info("Instruction typer stopped")
+            return True
                 
         except KeyboardInterrupt:
             logging.info("Instruction typer stopped by user")
+            return True
         except Exception as e:
             logging.error(f"Fatal error in instruction typer: {str(e)}")
+            return False
+        finally:
+            self.actions.close()
 
-def get_project_tree():
+def get_project_tree(max_bytes=16384, max_depth=8, max_dir_entries=100, collapse_over=1000):
     """
     Capture the directory tree structure of the current project.
     
+    The output is pasted into a prompt, so it is bounded: directories with
+    more than `collapse_over` entries (or below `max_depth`) collapse to a
+    count, at most `max_dir_entries` children are listed per directory and
+    the whole text stays under `max_bytes`. Pass None to lift a limit.
+    
     Returns:
         str: Formatted tree structure of the project directory
     """
@@ -342,33 +343,13 @@ def get_project_tree():
         if not os.path.isdir(current_dir):
             return f"Error: {current_dir} is not a valid directory"
         
-        # Run tree command with specific formatting
-        try:
-            tree_result = subprocess.run(
-                ['tree', '-I', 'node_modules|.git|__pycache__|*.pyc'], 
-                cwd=current_dir, 
-                capture_output=True, 
-                text=True
-            )
-            
-            # If tree command is successful, return its output
-            if tree_result.returncode == 0:
-                return tree_result.stdout
-        except FileNotFoundError:
-            pass
-        
-        # Fallback to find command if tree is not available
-        find_result = subprocess.run(
-            ['find', '.', 
-             '-not', '-path', '*/node_modules/*',
-             '-not', '-path', '*/.git*', 
-             '-not', '-path', '*/__pycache__*'], 
-            cwd=current_dir, 
-            capture_output=True, 
-            text=True
+        # Served from an in-process snapshot that only re-reads changed directories
+        return tree_index(current_dir).render(
+            max_depth=max_depth,
+            max_dir_entries=max_dir_entries,
+            collapse_over=collapse_over,
+            max_bytes=max_bytes
         )
-        
-        return find_result.stdout
     
     except Exception as e:
         return f"Error generating project tree: {str(e)}"
@@ -393,9 +374,8 @@ def write_project_instructions():
     except Exception as e:
         print(f"Error writing instructions: {str(e)}")
 
-# Call the function to generate instructions
-write_project_instructions()
-
 if __name__ == "__main__":
+    setup_logging("instruction_typer")
+    write_project_instructions()
     typer = InstructionTyper()
-    typer.run() 
\ No newline at end of file
+    sys.exit(0 if typer.run() else 1) 
\ No newline at end of file
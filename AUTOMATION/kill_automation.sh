@@ -1,7 +1,15 @@
 #!/bin/bash
 
-# Ensure the script is executable
-chmod +x /Users/omarmaarouf/werfef/AUTOMATION/kill_switch.py
+# Load pyenv
+export PYENV_ROOT="$HOME/.pyenv"
+export PATH="$PYENV_ROOT/bin:$PATH"
+eval "$(pyenv init -)"
+eval "$(pyenv init --path)"
+
+# Same interpreter as the components it stops
+pyenv shell 3.10.0
+
+AUTOMATION_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 
 # Run the kill switch
-/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python /Users/omarmaarouf/werfef/AUTOMATION/kill_switch.py 
\ No newline at end of file
+python "$AUTOMATION_DIR/kill_switch.py"
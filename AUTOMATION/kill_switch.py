@@ -5,22 +5,31 @@ import subprocess
 import signal
 import psutil
 import time
-import pyautogui
+import threading
+from pid_registry import terminate_registered
+from config import get_config
 
-# Automation-related process names to kill
+# Automation scripts, matched only when the PID registry is empty (e.g.
+# processes started by an older version that does not register itself)
 AUTOMATION_PROCESSES = [
-    'python',  # Generic Python processes
+    'capture_service.py',
+    'supervisor.py',
+    'orchestrator.py',
     'motion_detector.py',
     'blue_detector.py',
     'clicker.py',
     'instruction_typer.py',
     'run_automation.py',
-    'tmux',  # Kill tmux sessions
 ]
 
 def kill_processes():
-    """Terminate all processes related to automation."""
-    killed_pids = []
+    """Terminate all processes related to automation.
+
+    Registered components (see pid_registry.py) are stopped by process
+    group with TERM, escalating to KILL; the process table is only scanned
+    when nothing is registered.
+    """
+    killed_pids = terminate_registered()
     
     # List all active tmux sessions before killing
     try:
@@ -33,25 +42,27 @@ def kill_processes():
     except Exception as e:
         print(f"Error listing tmux sessions: {e}")
     
-    for proc in psutil.process_iter(['name', 'cmdline']):
-        try:
-            # Check if any of the process names match our target processes
-            if any(proc_name in ' '.join(proc.info['cmdline'] or []) for proc_name in AUTOMATION_PROCESSES):
-                pid = proc.pid
-                process_name = proc.info['name']
-                
-                try:
-                    # First try graceful termination
-                    parent = psutil.Process(pid)
-                    for child in parent.children(recursive=True):
-                        child.terminate()
-                    parent.terminate()
-                    killed_pids.append(pid)
-                except psutil.NoSuchProcess:
-                    pass
-                
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            pass
+    # Fall back to a process table scan for unregistered processes
+    if not killed_pids:
+        for proc in psutil.process_iter(['name', 'cmdline']):
+            try:
+                # Check if any of the process names match our target processes
+                if any(proc_name in ' '.join(proc.info['cmdline'] or []) for proc_name in AUTOMATION_PROCESSES):
+                    pid = proc.pid
+                    process_name = proc.info['name']
+                    
+                    try:
+                        # First try graceful termination
+                        parent = psutil.Process(pid)
+                        for child in parent.children(recursive=True):
+                            child.terminate()
+                        parent.terminate()
+                        killed_pids.append(pid)
+                    except psutil.NoSuchProcess:
+                        pass
+                    
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
     
     # Kill tmux sessions with more detailed error handling
     try:
@@ -70,29 +81,132 @@ def kill_processes():
     
     return killed_pids
 
-def should_stop():
-    """Check if any kill condition is met:
+class KillSwitch:
+    """Watch the kill conditions from a background thread and publish a stop flag.
+
+    Kill conditions:
     1. Kill switch file exists
-    2. Mouse in top-left corner for 2 seconds
+    2. Mouse held in the top-left corner for `corner_hold` seconds
+
+    The watcher checks every `poll_interval` seconds and latches `event`
+    once a condition is met, so callers only ever read a flag and never
+    block. Settings not passed in come from the `paths` and `kill_switch`
+    config sections and follow edits to the config file.
     """
-    kill_switch_file = "/Users/omarmaarouf/automation_files/KILL_SWITCH"
-    
-    # Check for kill switch file
-    if os.path.exists(kill_switch_file):
-        return True
-    
-    # Check mouse position
-    try:
-        x, y = pyautogui.position()
-        if x < 5 and y < 5:  # Mouse in top-left corner
-            time.sleep(2)  # Wait 2 seconds
-            new_x, new_y = pyautogui.position()
-            if new_x < 5 and new_y < 5:  # Still in corner
-                return True
-    except:
-        pass
-    
-    return False
+
+    def __init__(self, kill_switch_file=None, poll_interval=None, corner_hold=None, corner_size=None, config=None):
+        self.config = config or get_config()
+        # Settings passed in here win over the config file
+        self.overrides = {
+            key: value for key, value in (
+                ("kill_switch_file", kill_switch_file), ("poll_interval", poll_interval),
+                ("corner_hold", corner_hold), ("corner_size", corner_size),
+            ) if value is not None
+        }
+        self.apply_config()
+        self.event = threading.Event()
+        self.reason = None
+        self.corner_since = None
+        self.mouse_position = None
+        self.thread = None
+        self._closing = threading.Event()
+
+    def apply_config(self):
+        """Take the kill switch settings from the config; called again whenever the file changes."""
+        self.config_version = self.config.version
+        settings = dict(self.config.section("kill_switch"), kill_switch_file=self.config.path_setting("kill_switch_file"))
+        settings.update(self.overrides)
+        self.kill_switch_file = settings["kill_switch_file"]
+        self.poll_interval = settings["poll_interval"]
+        self.corner_hold = settings["corner_hold"]
+        self.corner_size = settings["corner_size"]
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._watch, name="kill-switch", daemon=True)
+            self.thread.start()
+        return self
+
+    def _load_mouse_position(self):
+        try:
+            import pyautogui
+            return pyautogui.position
+        except Exception:
+            # No display access; only the kill switch file can stop us
+            return None
+
+    def _trigger(self, reason):
+        self.reason = reason
+        self.event.set()
+
+    def check(self, now=None):
+        """Evaluate the kill conditions once; True if the switch has fired."""
+        if self.event.is_set():
+            return True
+        if os.path.exists(self.kill_switch_file):
+            self._trigger("kill switch file")
+            return True
+
+        if self.mouse_position is not None:
+            now = time.monotonic() if now is None else now
+            try:
+                x, y = self.mouse_position()
+            except Exception:
+                return False
+            if x < self.corner_size and y < self.corner_size:  # Mouse in top-left corner
+                if self.corner_since is None:
+                    self.corner_since = now
+                elif now - self.corner_since >= self.corner_hold:
+                    self._trigger("mouse in corner")
+                    return True
+            else:
+                self.corner_since = None
+        return False
+
+    def _watch(self):
+        self.mouse_position = self._load_mouse_position()
+        while not self._closing.is_set():
+            if self.config.poll() != self.config_version:
+                self.apply_config()
+            if self.check():
+                break
+            self._closing.wait(self.poll_interval)
+
+    def is_set(self):
+        return self.event.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the switch fires or `timeout` passes; returns the flag."""
+        return self.event.wait(timeout)
+
+    def close(self):
+        self._closing.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+_kill_switch = None
+_kill_switch_lock = threading.Lock()
+
+
+def get_kill_switch():
+    """Return this process's kill switch, starting its watcher on first use."""
+    global _kill_switch
+    if _kill_switch is None:
+        with _kill_switch_lock:
+            if _kill_switch is None:
+                _kill_switch = KillSwitch().start()
+    return _kill_switch
+
+
+def should_stop():
+    """Check if any kill condition is met (see KillSwitch).
+
+    Only reads the flag published by the background watcher, so it is
+    cheap enough to call on every loop iteration and never blocks.
+    """
+    return (_kill_switch or get_kill_switch()).event.is_set()
 
 def main():
     """Main kill switch function."""
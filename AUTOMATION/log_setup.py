@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_DIR = os.path.expanduser("~/automation_logs")
+DEFAULT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class RateLimitFilter(logging.Filter):
+    """Keep hot loops from flooding the log.
+
+    Each call site (file and line) may log `burst` records per `interval`
+    seconds; past that only every `sample_every`-th record goes through,
+    carrying a `suppressed` count of the ones dropped since the last record
+    from that site. Records above `max_level` (warnings and errors by
+    default) are never limited.
+    """
+
+    def __init__(self, burst=10, interval=10.0, sample_every=100, max_level=logging.INFO):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.sample_every = sample_every
+        self.max_level = max_level
+        self.sites = {}  # (pathname, lineno) -> [window start, records in window, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            site = self.sites.get(key)
+            if site is None or record.created - site[0] >= self.interval:
+                suppressed = site[2] if site is not None else 0
+                self.sites[key] = [record.created, 1, 0]
+            else:
+                site[1] += 1
+                over = site[1] - self.burst
+                if over > 0 and over % self.sample_every:
+                    site[2] += 1
+                    return False
+                suppressed, site[2] = site[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One compact JSON object per record: time, level, component, source line, thread and message."""
+
+    def __init__(self, component):
+        super().__init__()
+        self.component = component
+
+    def format(self, record):
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "component": self.component,
+            "src": f"{record.module}:{record.lineno}",
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            data["suppressed"] = suppressed
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, separators=(",", ":"))
+
+
+class ConsoleFormatter(logging.Formatter):
+    """The usual text format, noting how many similar records the rate limit dropped."""
+
+    def format(self, record):
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        return f"{text} (+{suppressed} similar suppressed)" if suppressed else text
+
+
+class SizeAndAgeRotatingFileHandler(RotatingFileHandler):
+    """Rotate when the file would grow past `max_bytes` or is older than `max_age` seconds.
+
+    The file's age is taken from the timestamp of its first JSON record, so
+    it survives restarts; `backup_count` rotated files are kept.
+    """
+
+    def __init__(self, filename, max_bytes, max_age, backup_count):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.max_age = max_age
+        self.started = self._first_timestamp(filename)
+
+    @staticmethod
+    def _first_timestamp(filename):
+        try:
+            with open(filename, "r", encoding="utf-8") as f:
+                return float(json.loads(f.readline())["ts"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return time.time()
+
+    def shouldRollover(self, record):
+        if self.max_age and time.time() - self.started >= self.max_age:
+            try:
+                if os.path.getsize(self.baseFilename) > 0:
+                    return True
+            except OSError:
+                pass
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.started = time.time()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the writer falls behind.
+
+    Drops are counted in `dropped` (the `log_records_dropped_total` metric)
+    and reported with a warning once the queue has room again, at most
+    every `report_interval` seconds.
+    """
+
+    def __init__(self, log_queue, dropped, report_interval=10.0):
+        super().__init__(log_queue)
+        self.dropped = dropped
+        self.reported = 0
+        self.report_interval = report_interval
+        self.last_report = 0.0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped.inc()
+            return
+        if self.dropped.value > self.reported and record.created - self.last_report >= self.report_interval:
+            try:
+                self.queue.put_nowait(self.drop_record())
+            except queue.Full:
+                return
+            self.reported = self.dropped.value
+            self.last_report = record.created
+
+    def drop_record(self):
+        """Warning record about the drops not reported yet."""
+        return logging.LogRecord("log_setup", logging.WARNING, __file__, 0,
+                                 f"Log queue full: dropped {self.dropped.value - self.reported} records "
+                                 f"({self.dropped.value} in total)", None, None)
+
+
+_listener = None
+_log_file = None
+_queue_handler = None
+
+
+def setup_logging(name, level=logging.DEBUG, format=DEFAULT_FORMAT, log_dir=LOG_DIR,
+                  max_bytes=10 * 1024 * 1024, max_age=24 * 3600, backup_count=5, queue_size=10000):
+    """Send the process's logging through a queue to the console and ~/automation_logs/<name>.jsonl.
+
+    Callers only put records on a bounded queue; a listener thread formats
+    and writes them, so a hot loop never waits on the disk. Repeated
+    messages are rate limited per call site (see RateLimitFilter). The
+    JSON lines file rotates at `max_bytes` or after `max_age` seconds,
+    keeping `backup_count` old files.
+
+    Called from a script's entry point, never at import time, so importing
+    a component creates no files. Returns the log file path.
+    """
+    global _listener, _log_file, _queue_handler
+    if _listener is not None:
+        return _log_file
+
+    from metrics import counter
+
+    os.makedirs(log_dir, exist_ok=True)
+    log_file = os.path.join(log_dir, f"{name}.jsonl")
+
+    file_handler = SizeAndAgeRotatingFileHandler(log_file, max_bytes, max_age, backup_count)
+    file_handler.setFormatter(JsonLinesFormatter(name))
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(ConsoleFormatter(format))
+
+    log_queue = queue.Queue(queue_size)
+    queue_handler = DroppingQueueHandler(log_queue, counter("log_records_dropped_total"))
+    queue_handler.addFilter(RateLimitFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, file_handler, console_handler)
+    _listener.start()
+    _log_file = log_file
+    _queue_handler = queue_handler
+    atexit.register(stop_logging)
+    return log_file
+
+
+def stop_logging():
+    """Flush the queued records, report any drops not reported yet and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        if _queue_handler.dropped.value > _queue_handler.reported:
+            # The queue is gone; write straight to the handlers
+            record = _queue_handler.drop_record()
+            for handler in _listener.handlers:
+                handler.handle(record)
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
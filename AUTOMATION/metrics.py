@@ -0,0 +1,374 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+import os
+import sys
+import json
+import time
+import atexit
+import bisect
+import logging
+import argparse
+import threading
+from signal_file import atomic_write
+
+METRICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics")
+
+# Upper bounds (seconds) for latency histograms: 50 us up to 10 s
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+class Counter:
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return {"value": self.value}
+
+
+class Gauge:
+    """Value that goes up and down (queue depth, current interval)."""
+
+    kind = "gauge"
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+    def snapshot(self):
+        return {"value": self.value}
+
+
+class _Timing:
+    """Context manager returned by Histogram.time()."""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class Histogram:
+    """Distribution of observations in fixed buckets, plus count, sum and max.
+
+    Observing is a bisect and a few additions under a lock, cheap enough
+    for every tick. Percentiles are estimated from the buckets.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def time(self):
+        """`with histogram.time(): ...` observes the block's duration in seconds."""
+        return _Timing(self)
+
+    def _percentile(self, q, counts, count, maximum):
+        if not count:
+            return None
+        rank = count * q / 100
+        seen = 0
+        for bound, n in zip(self.buckets, counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, maximum)
+        return maximum
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile (0-100), or None if empty."""
+        with self._lock:
+            return self._percentile(q, list(self.counts), self.count, self.max)
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self.counts)
+            count, total, maximum = self.count, self.sum, self.max
+        return {
+            "count": count,
+            "sum": total,
+            "max": maximum,
+            "mean": total / count if count else None,
+            "p50": self._percentile(50, counts, count, maximum),
+            "p95": self._percentile(95, counts, count, maximum),
+            "p99": self._percentile(99, counts, count, maximum),
+            "buckets": [[bound, n] for bound, n in zip(self.buckets, counts)] + [["+Inf", counts[-1]]],
+        }
+
+
+class MetricsRegistry:
+    """Named metrics of one process, each optionally split by labels.
+
+    Asking for the same name and labels twice returns the same metric, so
+    components can look their metrics up once in __init__ and then only
+    call inc/observe/set on the hot path.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, labels, *args):
+        key = _key(name, labels)
+        metric = self.metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self.metrics.get(key)
+                if metric is None:
+                    metric = cls(*args)
+                    self.metrics[key] = metric
+        if not isinstance(metric, cls):
+            raise TypeError(f"Metric {name} is a {metric.kind}, not a {cls.kind}")
+        return metric
+
+    def counter(self, name, **labels):
+        return self._get(Counter, name, labels)
+
+    def gauge(self, name, **labels):
+        return self._get(Gauge, name, labels)
+
+    def histogram(self, name, buckets=LATENCY_BUCKETS, **labels):
+        return self._get(Histogram, name, labels, buckets)
+
+    def snapshot(self):
+        """Return [{name, kind, labels, ...values}] for every metric."""
+        with self._lock:
+            items = sorted(self.metrics.items())
+        return [
+            dict(metric.snapshot(), name=name, kind=metric.kind, labels=dict(labels))
+            for (name, labels), metric in items
+        ]
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name, **labels):
+    return REGISTRY.counter(name, **labels)
+
+
+def gauge(name, **labels):
+    return REGISTRY.gauge(name, **labels)
+
+
+def histogram(name, buckets=LATENCY_BUCKETS, **labels):
+    return REGISTRY.histogram(name, buckets, **labels)
+
+
+def timer(name, **labels):
+    """Latency histogram for `name`; use as `with timer("detect_seconds", component=...).time():`."""
+    return REGISTRY.histogram(name, LATENCY_BUCKETS, **labels)
+
+
+def dump_path(name, directory=METRICS_DIR):
+    return os.path.join(directory, f"{name}.json")
+
+
+class MetricsDumper:
+    """Write the registry to `metrics/<name>.json` every `interval` seconds and at exit."""
+
+    def __init__(self, name, registry=REGISTRY, interval=10.0, directory=METRICS_DIR):
+        self.name = name
+        self.registry = registry
+        self.interval = interval
+        self.path = dump_path(name, directory)
+        self.started = time.time()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def dump(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            atomic_write(self.path, json.dumps({
+                "process": self.name,
+                "pid": os.getpid(),
+                "started": self.started,
+                "time": time.time(),
+                "metrics": self.registry.snapshot(),
+            }))
+        except Exception as e:
+            logging.error(f"Error writing metrics for {self.name}: {str(e)}")
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.dump()
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="metrics-dump", daemon=True)
+            self.thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.dump()
+
+
+_dumper = None
+
+
+def start_metrics(name, interval=10.0):
+    """Start dumping this process's metrics as `name`; later calls return the running dumper."""
+    global _dumper
+    if _dumper is None:
+        _dumper = MetricsDumper(name, interval=interval).start()
+    return _dumper
+
+
+def load_dumps(directory=METRICS_DIR):
+    """Return the metrics dumps of all processes, skipping unreadable files."""
+    dumps = []
+    try:
+        names = sorted(os.listdir(directory))
+    except FileNotFoundError:
+        return dumps
+    for filename in names:
+        if not filename.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, filename), "r") as f:
+                dumps.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return dumps
+
+
+def _prometheus_labels(labels, extra=None):
+    items = dict(labels, **(extra or {}))
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in sorted(items.items())) + "}"
+
+
+def to_prometheus(dumps):
+    """Render dumps in the Prometheus text exposition format, metric names prefixed with `automation_`."""
+    lines = []
+    typed = set()
+    for dump in dumps:
+        process = {"process": dump.get("process", "unknown")}
+        for metric in dump.get("metrics", []):
+            name = f"automation_{metric['name']}"
+            labels = dict(metric["labels"], **process)
+            if name not in typed:
+                lines.append(f"# TYPE {name} {metric['kind']}")
+                typed.add(name)
+            if metric["kind"] == "histogram":
+                cumulative = 0
+                for bound, count in metric["buckets"]:
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_prometheus_labels(labels, {'le': str(bound)})} {cumulative}")
+                lines.append(f"{name}_sum{_prometheus_labels(labels)} {metric['sum']}")
+                lines.append(f"{name}_count{_prometheus_labels(labels)} {metric['count']}")
+            else:
+                lines.append(f"{name}{_prometheus_labels(labels)} {metric['value']}")
+    return "\n".join(lines) + "\n"
+
+
+def format_table(dumps, stale_after=60):
+    """Human-readable summary: one line per metric, latencies in milliseconds."""
+    lines = []
+    now = time.time()
+    for dump in dumps:
+        age = now - dump.get("time", 0)
+        state = f"stale, {age:.0f}s old" if age > stale_after else f"PID {dump.get('pid')}"
+        lines.append(f"{dump.get('process')} ({state})")
+        for metric in dump.get("metrics", []):
+            labels = ",".join(f"{key}={value}" for key, value in sorted(metric["labels"].items()))
+            label = f"{metric['name']}{{{labels}}}" if labels else metric["name"]
+            if metric["kind"] == "histogram":
+                if not metric["count"]:
+                    continue
+                lines.append(
+                    f"  {label:55} n={metric['count']:<8} mean {metric['mean'] * 1e3:8.3f} ms | "
+                    f"p95 <={metric['p95'] * 1e3:8.3f} ms | max {metric['max'] * 1e3:8.3f} ms"
+                )
+            else:
+                lines.append(f"  {label:55} {metric['value']:g}")
+    return "\n".join(lines)
+
+
+def serve(port, host="127.0.0.1", directory=METRICS_DIR):
+    """Serve all processes' dumps: /metrics (Prometheus text) and /metrics.json."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            dumps = load_dumps(directory)
+            if self.path.startswith("/metrics.json"):
+                body, content_type = json.dumps(dumps).encode(), "application/json"
+            elif self.path.startswith("/metrics"):
+                body, content_type = to_prometheus(dumps).encode(), "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logging.debug(f"metrics endpoint: {format % args}")
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    logging.info(f"Serving metrics on http://{host}:{port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show or serve the metrics dumped by the automation components.")
+    parser.add_argument("--json", action="store_true", help="print the raw dumps as JSON")
+    parser.add_argument("--prometheus", action="store_true", help="print the Prometheus text format")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="serve /metrics and /metrics.json on localhost")
+    args = parser.parse_args()
+
+    if args.serve:
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        serve(args.serve)
+    elif args.json:
+        print(json.dumps(load_dumps(), indent=2))
+    elif args.prometheus:
+        sys.stdout.write(to_prometheus(load_dumps()))
+    else:
+        print(format_table(load_dumps()) or "No metrics dumped yet")
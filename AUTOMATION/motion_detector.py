@@ -1,86 +1,100 @@
 #!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
 import os
+import sys
 import time
 import numpy as np
-import cv2
-import subprocess
-from datetime import datetime
 import logging
+from log_setup import setup_logging
 from kill_switch import should_stop
+from heartbeat import Heartbeat
+from pid_registry import register_process
+from adaptive_scheduler import AdaptiveScheduler
+from metrics import start_metrics, counter, timer
+from config import get_config, DEFAULTS
+from frame_source import default_frame_source
+from signal_bus import SignalSender, MotionSignal
+from frame_hash import FingerprintCache
 
-# Set up logging
-log_dir = os.path.expanduser("~/automation_logs")
-os.makedirs(log_dir, exist_ok=True)
-log_file = os.path.join(log_dir, f"motion_detector_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)8s | %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+# Default position to monitor (set `motion_detector.position` in the config file per machine)
+POSITION = tuple(DEFAULTS["motion_detector"]["position"])
 
 class MotionDetector:
-    def __init__(self, position, threshold=30):
-        self.position = position  # (x, y) tuple
-        self.threshold = threshold
+    def __init__(self, position=None, threshold=None, frame_source=None, motion_sender=None, config=None):
+        self.config = config or get_config()
+        # Settings passed in here win over the config file
+        self.overrides = {
+            key: value for key, value in (("position", position), ("threshold", threshold)) if value is not None
+        }
+        self.frame_source = frame_source or default_frame_source()
         self.last_frame = None
+        self.spare_frame = None  # Buffer reused for the next capture
         self.last_motion_time = time.time()
         self.working_dir = os.path.dirname(os.path.abspath(__file__))
         self.motion_signal_file = os.path.join(self.working_dir, "motion_status")
-        self.check_interval = 0.1
-        self.last_check_time = time.time()
-        self.motion_sensitivity = 5  # Reduced sensitivity
+        self.motion_sender = motion_sender or SignalSender("motion_status", self.working_dir, ack_timeout=0.2)
+        self.scheduler = AdaptiveScheduler("motion_detector")
+        self.detect_time = timer("detect_seconds", component="motion_detector")
+        self.detections = counter("detections_total", component="motion_detector")
+        self.fingerprints = FingerprintCache("motion_detector")  # Identical frames skip the diff
+        self.position = None
+        self.apply_config()
         
         logging.info(f"Motion Detector started at position: {self.position}")
         logging.info(f"Working directory: {self.working_dir}")
         logging.info(f"Motion signal file: {self.motion_signal_file}")
+        logging.info(f"Frame source: {self.frame_source.name}")
+    
+    def apply_config(self):
+        """Take the motion_detector settings from the config; called again whenever the file changes."""
+        self.config_version = self.config.version
+        settings = dict(self.config.section("motion_detector"), **self.overrides)
+        position = tuple(settings["position"])  # (x, y) tuple
+        if self.position is not None and (position != self.position or settings["threshold"] != self.threshold):
+            # The watched area moved or changed size; start over from the next frame
+            self.last_frame = self.spare_frame = None
+            self.fingerprints.forget()
+            logging.info(f"Motion Detector moved to position: {position}")
+        self.position = position
+        self.threshold = settings["threshold"]
+        self.motion_sensitivity = settings["motion_sensitivity"]
+        self.check_interval = settings["min_interval"]  # Fastest checking rate, used while motion is seen
+        self.scheduler.set_intervals(settings["min_interval"], settings["max_interval"])
     
     def hidden_screen_capture(self, area):
-        """Capture screen area using a hidden method with minimal processing."""
+        """Capture screen area as grayscale straight into a reusable buffer."""
         try:
-            x1, y1, x2, y2 = area
-            width = x2 - x1
-            height = y2 - y1
-            
-            # Use a shell command to capture the screen
-            temp_file = f"/tmp/screen_capture_{time.time()}.png"
-            capture_cmd = f"screencapture -R {x1},{y1},{width},{height} -x {temp_file}"
-            
-            # Use os.system to execute the command
-            os.system(capture_cmd)
-            
-            # Check if the file was created
-            if not os.path.exists(temp_file):
-                logging.error(f"Screen capture failed: {temp_file} not created")
-                return None
-            
-            # Read the image in grayscale to reduce processing
-            frame = cv2.imread(temp_file, cv2.IMREAD_GRAYSCALE)
-            
-            # Remove the temporary file
-            os.remove(temp_file)
-            
+            frame = self.frame_source.grab_gray(area, out=self.spare_frame)
+            if frame is None:
+                logging.error(f"Screen capture failed for area {area}")
             return frame
         except Exception as e:
             logging.error(f"Error in hidden screen capture: {str(e)}")
             return None
     
+    def capture_area(self):
+        """The (x1, y1, x2, y2) square watched around the position."""
+        x, y = self.position
+        return (x - self.threshold, y - self.threshold, x + self.threshold, y + self.threshold)
+    
     def detect_motion(self):
         """Detect if there's any motion in the area."""
+        import cv2  # Deferred so importing this module stays cheap; cached after the first tick
+        
         try:
             x, y = self.position
-            area = (x - self.threshold, y - self.threshold, x + self.threshold, y + self.threshold)
-            current_frame = self.hidden_screen_capture(area)
+            current_frame = self.hidden_screen_capture(self.capture_area())
+            unchanged = current_frame is not None and self.fingerprints.unchanged("area", current_frame)
             
             if current_frame is None or self.last_frame is None:
-                self.last_frame = current_frame
+                # Copy once so the first frame is not the source's shared buffer
+                self.last_frame = None if current_frame is None else current_frame.copy()
                 logging.info("Initial frame captured")
                 return False
             
+            if unchanged:
+                # Same pixels as the last frame: no motion, nothing to diff or log
+                return False
+            
             # Calculate absolute difference between frames
             diff = cv2.absdiff(current_frame, self.last_frame)
             
@@ -90,8 +104,8 @@ class MotionDetector:
             # Count changed pixels
             total_changed_pixels = np.sum(thresh > 0)
             
-            # Store current frame for next comparison
-            self.last_frame = current_frame.copy()
+            # Keep current frame for next comparison and recycle the old buffer
+            self.spare_frame, self.last_frame = self.last_frame, current_frame
             
             # Consider motion only if significant changes detected
             motion_detected = total_changed_pixels > self.motion_sensitivity
@@ -111,56 +125,54 @@ class MotionDetector:
             return False
     
     def update_motion_status(self):
-        """Update the motion status file."""
+        """Publish a motion signal (written to the motion status file if nobody is listening)."""
         try:
-            with open(self.motion_signal_file, "w") as f:
-                f.write(f"{time.time()}")
-            os.chmod(self.motion_signal_file, 0o666)  # Make file readable/writable by all
+            self.motion_sender.send(MotionSignal())
         except Exception as e:
             logging.error(f"Error updating motion status: {str(e)}")
     
+    def tick(self):
+        """Run one detection pass and publish motion if seen."""
+        self.scheduler.check_started()
+        if self.config.poll() != self.config_version:
+            self.apply_config()
+        with self.detect_time.time():
+            motion_detected = self.detect_motion()
+        self.scheduler.record(motion_detected)
+        if motion_detected:
+            self.detections.inc()
+            self.update_motion_status()
+        return motion_detected
+    
     def run(self):
         """Main loop to detect motion and update status."""
         try:
             logging.info("Starting motion detection...")
+            register_process("motion_detector")
+            start_metrics("motion_detector")
+            heartbeat = Heartbeat("motion_detector")
             
             while not should_stop():  # Check kill conditions
-                current_time = time.time()
-                if current_time - self.last_check_time >= self.check_interval:
-                    self.last_check_time = current_time
-                    
-                    if self.detect_motion():
-                        self.update_motion_status()
-                    
-                time.sleep(0.1)
+                heartbeat.beat()
+                self.tick()
+                
+                # Checks back off while the area is still
+                self.scheduler.sleep()
             
             logging.info("Motion detector stopped by kill switch")
+            return True
                 
         except KeyboardInterrupt:
             logging.info("Motion detector stopped by user")
+            return True
         except Exception as e:
             logging.error(f"Fatal error in motion detector: {str(e)}")
+            return False
 
 if __name__ == "__main__":
-    # Default position if not specified
-    position = (1693, 1073)
-    
+    setup_logging("motion_detector", level=logging.INFO)
     # Create motion detector instance
-    detector = MotionDetector(position)
-    
-    logging.info("Starting motion detection...")
-    
-    try:
-        while not should_stop():
-            # Detect motion
-            motion_detected = detector.detect_motion()
-            
-            # Optional: Add a small delay to prevent excessive CPU usage
-            time.sleep(detector.check_interval)
+    detector = MotionDetector()
     
-    except KeyboardInterrupt:
-        logging.info("Motion detection stopped by user.")
-    except Exception as e:
-        logging.error(f"Unexpected error in motion detection: {str(e)}")
-    finally:
-        logging.info("Motion detection script terminated.") 
\ No newline at end of file
+    # Non-zero exit tells a supervisor the detector died rather than being stopped
+    sys.exit(0 if detector.run() else 1)
@@ -0,0 +1,124 @@
+import zlib
+import numpy as np
+from metrics import counter
+
+
+class TiledMotionEngine:
+    """Frame-to-frame change detection on a downsampled intensity grid.
+
+    The frame is cut into bands of `tile` block rows. Each band's raw bytes
+    are checksummed (crc32), so a band that did not change costs one hash
+    and nothing else. A changed band is reduced to `scale` x `scale` block
+    intensities (the sum of R + G + B over the block, kept as an exact
+    integer so a single-level change in any channel still shows up) and
+    diffed block by block against the stored grid. Changes that cancel
+    out inside a block sum (one channel up, another down) are still caught
+    by the checksum and count as one changed block for their band, so
+    "anything changed" is decided on the raw bytes. All buffers are
+    allocated once per frame size and reused on every tick.
+
+    Skipped and changed bands are counted in
+    `frame_hash_total{component,result}` like a FingerprintCache, so a
+    caller needs no whole-frame fingerprint of its own.
+    """
+
+    def __init__(self, scale=4, tile=16, component="motion_engine"):
+        if scale not in (4, 8):
+            raise ValueError("scale must be 4 or 8")
+        self.scale = scale
+        self.tile = tile
+        self.shape = None
+        self.has_previous = False
+        self.changed_bands = 0
+        self.hits = counter("frame_hash_total", component=component, result="hit")
+        self.misses = counter("frame_hash_total", component=component, result="miss")
+
+    def _allocate(self, shape):
+        height, width = shape
+        s, t = self.scale, self.tile
+        self._crop_height = height // s * s
+        self._crop_width = width // s * s
+        grid_height = self._crop_height // s
+        grid_width = self._crop_width // s
+
+        self.shape = shape
+        self.has_previous = False
+        self._rows = np.empty((t, self._crop_width * 3), dtype=np.uint16)
+        self._packed = np.empty((t, grid_width), dtype=np.uint64)
+        self._grid = np.zeros((grid_height, grid_width), dtype=np.uint16)
+        self._band = np.zeros((t, grid_width), dtype=np.uint16)
+        # Band i covers block rows i * tile onwards; the last one also takes
+        # the pixel rows below the last whole block
+        self._bands = max(1, -(-grid_height // t))
+        self._checksums = [None] * self._bands
+
+    def _block_sums(self, rgb, out):
+        """Write the block sums of `rgb` (whole blocks only, up to `tile` block rows) into `out`."""
+        s = self.scale
+        grid_height, grid_width = out.shape
+        rows = self._rows[:grid_height]
+
+        # Sum `scale` rows (all channels of every column) into uint16
+        cropped = rgb[:grid_height * s, :self._crop_width].reshape(grid_height, s, self._crop_width * 3)
+        np.add(cropped[:, 0], cropped[:, 1], out=rows, dtype=np.uint16)
+        for k in range(2, s):
+            rows += cropped[:, k]
+
+        # Add neighbouring columns four uint16 lanes at a time through a
+        # uint64 view (a block row is 3 * scale / 4 words). The lanes cannot
+        # carry into each other for scale 4 or 8.
+        blocks = rows.view(np.uint64).reshape(grid_height, grid_width, 3 * s // 4)
+        packed = self._packed[:grid_height]
+        np.add(blocks[..., 0], blocks[..., 1], out=packed)
+        for k in range(2, blocks.shape[2]):
+            packed += blocks[..., k]
+
+        # Fold the four lanes of each block into one intensity value
+        lanes = packed.view(np.uint16).reshape(grid_height, grid_width, -1)
+        np.add(lanes[..., 0], lanes[..., 1], out=out)
+        for k in range(2, lanes.shape[2]):
+            out += lanes[..., k]
+
+    def update(self, rgb):
+        """Feed the next (H, W, 3) RGB frame and return how many blocks changed.
+
+        The first frame (and the first frame after a size change) returns 0.
+        """
+        if rgb.shape[:2] != self.shape:
+            self._allocate(rgb.shape[:2])
+
+        s, t = self.scale, self.tile
+        grid = self._grid
+        changed_blocks = 0
+        hashed = 0
+        self.changed_bands = 0
+        for index in range(self._bands):
+            top = index * t
+            bottom = min(top + t, grid.shape[0])
+            pixels = rgb[top * s:bottom * s if index < self._bands - 1 else None]
+            checksum = zlib.crc32(np.ascontiguousarray(pixels))
+            if checksum == self._checksums[index]:
+                continue
+            self._checksums[index] = checksum
+            hashed += 1
+
+            band = self._band[:bottom - top]
+            if band.size:
+                self._block_sums(pixels, band)
+            if self.has_previous:
+                changed = int(np.count_nonzero(band != grid[top:bottom]))
+                self.changed_bands += 1
+                # The bytes changed but no block sum did: cancelling changes
+                # or pixels outside the whole blocks
+                changed_blocks += changed or 1
+            np.copyto(grid[top:bottom], band)
+
+        self.misses.inc(hashed)
+        self.hits.inc(self._bands - hashed)
+        self.has_previous = True
+        return changed_blocks
+
+    def reset(self):
+        """Forget the previous frame."""
+        self.has_previous = False
+        self._checksums = [None] * self._bands if self.shape is not None else []
@@ -0,0 +1,134 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from kill_switch import should_stop
+from signal_bus import LocalSignalChannel
+from pid_registry import register_process
+from metrics import start_metrics
+from log_setup import setup_logging
+
+
+class Orchestrator:
+    """Run MotionDetector, BlueDetector, Clicker and InstructionTyper as asyncio tasks in one process.
+
+    Capture, detection and AppleScript actions block, so every tick is run
+    in a thread pool (NumPy and OpenCV release the GIL while they work). The
+    components talk through in-process channels instead of sockets or files.
+    """
+
+    def __init__(self, max_workers=4, kill_check_interval=0.1):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="automation")
+        self.kill_check_interval = kill_check_interval
+        self.components = {}
+        self.actions = None
+        self.stop_event = None
+
+    def build_components(self):
+        """Create the components, wired together with in-process channels."""
+        # Imported here so that only the orchestrator pays for the imports once
+        from motion_detector import MotionDetector
+        from blue_detector import BlueDetector
+        from clicker import Clicker
+        from instruction_typer import InstructionTyper, write_project_instructions
+        from action_executor import ActionExecutor
+
+        click_channel = LocalSignalChannel("click_positions")
+        # Nothing consumes motion signals yet; keep only the latest one
+        motion_channel = LocalSignalChannel("motion_status", maxsize=1)
+        # One executor so clicks and typing never interleave
+        self.actions = ActionExecutor()
+        write_project_instructions()
+
+        self.components = {
+            "motion_detector": MotionDetector(motion_sender=motion_channel),
+            "blue_detector": BlueDetector(click_sender=click_channel),
+            "clicker": Clicker(click_listener=click_channel, action_executor=self.actions),
+            "instruction_typer": InstructionTyper(action_executor=self.actions),
+        }
+        return self.components
+
+    async def _run_blocking(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def _sleep_until(self, deadline):
+        delay = deadline - time.monotonic()
+        if delay > 0:
+            try:
+                await asyncio.wait_for(self.stop_event.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _periodic(self, name, scheduler, tick, stop_on_false=False):
+        """Call `tick` whenever `scheduler` says the next check is due, until stopped."""
+        while not self.stop_event.is_set():
+            try:
+                result = await self._run_blocking(tick)
+                if stop_on_false and result is False:
+                    logging.info(f"{name} finished, stopping automation")
+                    self.stop_event.set()
+                    break
+            except Exception as e:
+                logging.error(f"Error in {name}: {str(e)}")
+
+            await self._sleep_until(scheduler.next_time)
+
+    async def _clicker_loop(self, clicker):
+        while not self.stop_event.is_set():
+            # Blocks a worker until a click signal arrives or the timeout passes
+            await self._run_blocking(clicker.process_click_positions, 0.5)
+
+    async def _kill_switch_loop(self):
+        while not self.stop_event.is_set():
+            # should_stop only reads a flag, so no worker thread is needed
+            if should_stop():
+                logging.info("Kill switch triggered, stopping automation")
+                self.stop_event.set()
+                break
+            await self._sleep_until(time.monotonic() + self.kill_check_interval)
+
+    async def run(self):
+        self.stop_event = asyncio.Event()
+        if not self.components:
+            self.build_components()
+
+        motion = self.components["motion_detector"]
+        blue = self.components["blue_detector"]
+        clicker = self.components["clicker"]
+        typer = self.components["instruction_typer"]
+        await self._run_blocking(typer.create_instructions_file)
+
+        tasks = [
+            asyncio.create_task(self._kill_switch_loop()),
+            asyncio.create_task(self._periodic("motion_detector", motion.scheduler, motion.tick)),
+            asyncio.create_task(self._periodic("blue_detector", blue.scheduler, blue.tick)),
+            asyncio.create_task(self._clicker_loop(clicker)),
+            asyncio.create_task(self._periodic("instruction_typer", typer.scheduler, typer.tick, stop_on_false=True)),
+        ]
+        logging.info(f"Orchestrator running {len(self.components)} components in one process")
+
+        try:
+            await self.stop_event.wait()
+        finally:
+            self.stop_event.set()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.executor.shutdown(wait=True)
+            if self.actions is not None:
+                self.actions.close()
+            logging.info("Orchestrator stopped")
+
+
+def main():
+    setup_logging("orchestrator", format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s')
+
+    register_process("orchestrator")
+    start_metrics("orchestrator")
+    try:
+        asyncio.run(Orchestrator().run())
+    except KeyboardInterrupt:
+        logging.info("Orchestrator stopped by user")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import atexit
+import signal
+import logging
+import psutil
+from signal_file import atomic_write
+
+REGISTRY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pids")
+
+
+def registry_path(name, directory=REGISTRY_DIR):
+    return os.path.join(directory, f"{name}.json")
+
+
+def register_process(name, directory=REGISTRY_DIR):
+    """Record this process's PID and process group under `name`.
+
+    The entry is removed again when the process exits normally. Entries
+    left behind by crashed processes are recognised by their start time
+    and ignored, so a recycled PID is never signalled.
+    """
+    pid = os.getpid()
+    path = registry_path(name, directory)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        atomic_write(path, json.dumps({
+            "name": name,
+            "pid": pid,
+            "pgid": os.getpgid(pid),
+            "create_time": psutil.Process(pid).create_time(),
+        }))
+        atexit.register(unregister_process, name, directory, pid)
+    except Exception as e:
+        logging.warning(f"Could not register {name} in the PID registry: {str(e)}")
+
+
+def unregister_process(name, directory=REGISTRY_DIR, pid=None):
+    """Remove `name` from the registry if it still belongs to `pid` (default: this process)."""
+    pid = os.getpid() if pid is None else pid
+    path = registry_path(name, directory)
+    try:
+        with open(path, "r") as f:
+            entry = json.load(f)
+        if entry.get("pid") == pid:
+            os.remove(path)
+    except (OSError, ValueError):
+        pass
+
+
+def registered_processes(directory=REGISTRY_DIR):
+    """Return {name: (entry, psutil.Process)} for registered processes that are still alive.
+
+    Stale entries (process gone or PID reused) are deleted.
+    """
+    processes = {}
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return processes
+    for filename in names:
+        if not filename.endswith(".json"):
+            continue
+        path = os.path.join(directory, filename)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+            process = psutil.Process(entry["pid"])
+            # Start times are floats rounded differently per call; allow a little slack
+            if abs(process.create_time() - entry["create_time"]) > 1:
+                raise psutil.NoSuchProcess(entry["pid"])
+            processes[entry["name"]] = (entry, process)
+        except (psutil.NoSuchProcess, psutil.ZombieProcess, ValueError, KeyError):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        except (OSError, psutil.AccessDenied):
+            pass
+    return processes
+
+
+def _signal(entry, sig):
+    """Signal an entry's whole process group when it leads one, otherwise just the process."""
+    try:
+        if entry["pgid"] == entry["pid"]:
+            os.killpg(entry["pgid"], sig)
+        else:
+            os.kill(entry["pid"], sig)
+    except ProcessLookupError:
+        pass
+
+
+def terminate_registered(timeout=2.0, directory=REGISTRY_DIR, exclude_current=True):
+    """Send SIGTERM to every registered process group, then SIGKILL whatever outlives `timeout`.
+
+    Returns the PIDs that were signalled.
+    """
+    own_pid = os.getpid()
+    own_pgid = os.getpgrp()
+    targets = []
+    for name, (entry, process) in registered_processes(directory).items():
+        if exclude_current and (entry["pid"] == own_pid or entry["pgid"] == own_pgid):
+            continue
+        logging.info(f"Terminating {name} (PID {entry['pid']}, PGID {entry['pgid']})")
+        _signal(entry, signal.SIGTERM)
+        targets.append((entry, process))
+
+    if not targets:
+        return []
+
+    started = time.monotonic()
+    _, alive = psutil.wait_procs([process for _, process in targets], timeout=timeout)
+    for entry, process in targets:
+        if process in alive:
+            logging.warning(f"{entry['name']} ignored SIGTERM, killing PID {entry['pid']}")
+            _signal(entry, signal.SIGKILL)
+    if alive:
+        psutil.wait_procs(alive, timeout=timeout)
+    logging.info(f"Stopped {len(targets)} registered processes in {(time.monotonic() - started) * 1000:.0f} ms")
+    return [entry["pid"] for entry, _ in targets]
@@ -0,0 +1,135 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+from collections import OrderedDict
+
+PROGRESS_LOG = os.path.join(os.path.expanduser("~/automation_logs"), "progress.jsonl")
+
+
+class ProgressLog:
+    """Time series of ROAD_MAP.md percentage changes, appended to a JSON lines file.
+
+    Every record carries the run id, the project directory, the old and new
+    percentage and the last instruction typed before the change, along with
+    how many instructions were typed since the previous change. `summary()`
+    turns the run's records into throughput figures and an ETA.
+    """
+
+    def __init__(self, project_dir, path=PROGRESS_LOG, run_id=None):
+        self.project_dir = project_dir
+        self.path = path
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.records = []
+        self.instructions_sent = 0
+        self.instructions_since_change = 0
+        self.last_instruction = None
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        except OSError as e:
+            logging.error(f"Error creating progress log directory: {str(e)}")
+
+    def record_instruction(self, index, text):
+        """Note an instruction that was just typed."""
+        self.instructions_sent += 1
+        self.instructions_since_change += 1
+        self.last_instruction = (index, text)
+
+    def record_progress(self, old, new):
+        """RoadmapState change listener: append the change to the log."""
+        index, text = self.last_instruction or (None, None)
+        record = {
+            "run": self.run_id,
+            "project": self.project_dir,
+            "time": time.time(),
+            "old": old,
+            "percentage": new,
+            "instruction_index": index,
+            "instruction": text[:200] if text else None,
+            "instructions_since_change": self.instructions_since_change,
+            "instructions_sent": self.instructions_sent,
+        }
+        self.records.append(record)
+        self.instructions_since_change = 0
+        try:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logging.error(f"Error writing progress log: {str(e)}")
+        if old is not None:
+            logging.info(f"Progress: {format_summary(self.summary())}")
+
+    def summary(self, now=None):
+        return summarize(self.records, now)
+
+
+def summarize(records, now=None):
+    """Throughput and ETA for one run's records (in time order).
+
+    Returns percent_per_hour, instructions_per_percent and eta (a Unix
+    timestamp, or None while no forward progress has been made).
+    """
+    now = time.time() if now is None else now
+    if not records:
+        return {"start": None, "percentage": None, "percent_per_hour": 0.0,
+                "instructions_per_percent": None, "eta": None, "elapsed_hours": 0.0}
+
+    first, last = records[0], records[-1]
+    gained = last["percentage"] - first["percentage"]
+    hours = (last["time"] - first["time"]) / 3600
+    rate = gained / hours if hours > 0 else 0.0
+    instructions = last["instructions_sent"] - first["instructions_sent"]
+
+    eta = None
+    if rate > 0 and last["percentage"] < 100:
+        eta = last["time"] + (100 - last["percentage"]) / rate * 3600
+    elif last["percentage"] >= 100:
+        eta = last["time"]
+
+    return {
+        "start": first["time"],
+        "percentage": last["percentage"],
+        "percent_per_hour": rate,
+        "instructions_per_percent": instructions / gained if gained > 0 else None,
+        "eta": eta,
+        "elapsed_hours": (now - first["time"]) / 3600,
+    }
+
+
+def format_summary(summary):
+    if summary["percentage"] is None:
+        return "no progress recorded"
+    text = f"{summary['percentage']}% at {summary['percent_per_hour']:.1f}%/hour"
+    if summary["instructions_per_percent"] is not None:
+        text += f", {summary['instructions_per_percent']:.1f} instructions per percent"
+    if summary["eta"] is not None:
+        text += f", ETA {time.strftime('%Y-%m-%d %H:%M', time.localtime(summary['eta']))}"
+    return text
+
+
+def load_runs(path=PROGRESS_LOG):
+    """Read the progress log and group its records by run, oldest run first."""
+    runs = OrderedDict()
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                runs.setdefault(record.get("run"), []).append(record)
+    except FileNotFoundError:
+        pass
+    return runs
+
+
+if __name__ == "__main__":
+    # Compare runs: one summary line per run in the progress log
+    path = sys.argv[1] if len(sys.argv) > 1 else PROGRESS_LOG
+    for run_id, records in load_runs(path).items():
+        started = time.strftime('%Y-%m-%d %H:%M', time.localtime(records[0]["time"]))
+        print(f"{run_id}  {started}  {records[0]['project']}")
+        print(f"    {format_summary(summarize(records))}")
@@ -0,0 +1,190 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+import sys
+import json
+import time
+import argparse
+import logging
+import numpy as np
+from collections import OrderedDict
+from frame_recording import FrameRecordingWriter, RecordedFrameSource, SnapshotFrameSource
+from config import get_config, StaticConfig
+from log_setup import setup_logging
+
+# Record the screen regions the detectors look at, together with the
+# decisions they made, then replay the recording through the same detector
+# code offline to measure speed and check the decisions still match.
+#
+#   ./replay_harness.py record session.afr --seconds 60 [--synthetic]
+#   ./replay_harness.py replay session.afr [--realtime] [--json]
+
+
+# Config sections that change what the detectors see or decide; saved with each recording
+DETECTOR_SECTIONS = ("blue_detector", "motion_detector", "instruction_typer")
+
+
+def build_detectors(source, screen_size, config):
+    """Return {name: (decide, rois)} for every detector, reading frames from `source`.
+
+    Signals and actions go to in-process fakes, so nothing is sent to
+    other components or typed.
+    """
+    from motion_detector import MotionDetector
+    from blue_detector import BlueDetector
+    from instruction_typer import InstructionTyper
+    from signal_bus import LocalSignalChannel
+    from action_executor import ActionExecutor, RecordingBackend
+
+    motion = MotionDetector(frame_source=source, config=config,
+                            motion_sender=LocalSignalChannel("motion_status", maxsize=1))
+    blue = BlueDetector(frame_source=source, config=config,
+                        click_sender=LocalSignalChannel("click_positions", maxsize=1))
+    typer = InstructionTyper(frame_source=source, action_executor=ActionExecutor(RecordingBackend()),
+                             screen_size=screen_size, config=config)
+
+    return OrderedDict([
+        ("motion_detector", (lambda: bool(motion.detect_motion()), [motion.capture_area()])),
+        ("blue_detector", (lambda: [list(pos) for pos in blue.detect_blue_positions()],
+                           [bbox for bbox, _ in blue.capture_planner.groups])),
+        ("instruction_typer", (lambda: bool(typer.detect_motion()), [typer.motion_area])),
+    ])
+
+
+def record(path, live_source, screen_size, seconds=60, fps=10):
+    """Capture every detector's regions `fps` times a second for `seconds` and save them with the decisions.
+
+    The detectors use this machine's config; their settings are saved in
+    the recording so a replay elsewhere watches the same regions.
+    """
+    settings = {section: get_config().section(section) for section in DETECTOR_SECTIONS}
+    snapshot = SnapshotFrameSource([])
+    detectors = build_detectors(snapshot, screen_size, StaticConfig(settings))
+    rois = [roi for _, roi_list in detectors.values() for roi in roi_list]
+    snapshot.rois = rois
+    buffers = [np.empty((y2 - y1, x2 - x1, 3), dtype=np.uint8) for x1, y1, x2, y2 in rois]
+
+    metadata = {"screen_size": list(screen_size), "source": live_source.name, "fps": fps, "config": settings}
+    with FrameRecordingWriter(path, rois, metadata) as writer:
+        interval = 1 / fps
+        next_frame = time.monotonic()
+        end = next_frame + seconds
+        while time.monotonic() < end:
+            if all(live_source.grab(roi, out=buffer) is not None for roi, buffer in zip(rois, buffers)):
+                snapshot.set_frames(buffers)
+                decisions = {name: decide() for name, (decide, _) in detectors.items()}
+                writer.write(buffers, decisions)
+            next_frame += interval
+            delay = next_frame - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        logging.info(f"Recorded {writer.frames} frames of {len(rois)} regions to {path}")
+        return writer.frames
+
+
+def _latency_stats(samples):
+    values = np.array(samples) * 1000
+    return {
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "max_ms": float(values.max()),
+    }
+
+
+def replay(path, realtime=False):
+    """Run the recording through the detectors and return fps, latencies and decision matches."""
+    source = RecordedFrameSource(path, realtime=realtime)
+    try:
+        screen_size = tuple(source.reader.metadata.get("screen_size", (2560, 1440)))
+        # Recordings made before settings were saved used the defaults
+        config = StaticConfig(source.reader.metadata.get("config"))
+        detectors = build_detectors(source, screen_size, config)
+        latencies = {name: [] for name in detectors}
+        mismatches = {name: [] for name in detectors}
+        frames = 0
+
+        start = time.perf_counter()
+        while source.advance():
+            for name, (decide, _) in detectors.items():
+                t0 = time.perf_counter()
+                decision = decide()
+                latencies[name].append(time.perf_counter() - t0)
+                if source.decisions is not None and decision != source.decisions.get(name):
+                    mismatches[name].append(frames)
+            frames += 1
+        elapsed = time.perf_counter() - start
+    finally:
+        source.close()
+
+    return {
+        "recording": path,
+        "frames": frames,
+        "realtime": realtime,
+        "elapsed_s": elapsed,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "detectors": {
+            name: dict(
+                _latency_stats(latencies[name]) if frames else {},
+                matched=frames - len(mismatches[name]),
+                mismatched=len(mismatches[name]),
+                first_mismatches=mismatches[name][:10],
+            )
+            for name in detectors
+        },
+    }
+
+
+def print_report(result):
+    print(f"{result['recording']}: {result['frames']} frames in {result['elapsed_s']:.2f}s "
+          f"({result['fps']:.1f} fps{', real time' if result['realtime'] else ''})")
+    for name, stats in result["detectors"].items():
+        if "mean_ms" not in stats:
+            continue
+        print(f"  {name:18} mean {stats['mean_ms']:7.3f} ms | p95 {stats['p95_ms']:7.3f} ms | "
+              f"max {stats['max_ms']:7.3f} ms | decisions {stats['matched']}/{stats['matched'] + stats['mismatched']} match")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record screen regions for the detectors and replay them offline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="record the detectors' screen regions")
+    record_parser.add_argument("path")
+    record_parser.add_argument("--seconds", type=float, default=60)
+    record_parser.add_argument("--fps", type=float, default=10)
+    record_parser.add_argument("--synthetic", action="store_true", help="record a generated screen instead of the real one")
+
+    replay_parser = commands.add_parser("replay", help="replay a recording through the detectors")
+    replay_parser.add_argument("path")
+    replay_parser.add_argument("--realtime", action="store_true", help="pace frames at their recorded times")
+    replay_parser.add_argument("--json", action="store_true", help="print the report as JSON")
+
+    args = parser.parse_args(argv)
+    setup_logging("replay_harness", level=logging.INFO)
+
+    if args.command == "record":
+        if args.synthetic:
+            from frame_source import SyntheticFrameSource
+            source = SyntheticFrameSource(motion_every=5)
+            screen_size = (source.width, source.height)
+        else:
+            import pyautogui
+            from frame_source import local_frame_source
+            source = local_frame_source()
+            screen_size = tuple(pyautogui.size())
+        try:
+            record(args.path, source, screen_size, args.seconds, args.fps)
+        finally:
+            source.close()
+    else:
+        result = replay(args.path, args.realtime)
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            print_report(result)
+        # Non-zero exit when the detectors no longer agree with the recording
+        return 0 if all(stats["mismatched"] == 0 for stats in result["detectors"].values()) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
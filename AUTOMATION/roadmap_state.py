@@ -0,0 +1,106 @@
+import os
+import time
+import logging
+from collections import deque
+
+# Percentages at which the instruction set changes (see InstructionTyper.create_instructions_file)
+THRESHOLDS = (30, 80, 100)
+
+
+def parse_percentage(first_line):
+    """Parse the "<n>% complete" first line of ROAD_MAP.md; None if it does not parse."""
+    try:
+        return int(first_line.replace('% complete', '').strip())
+    except ValueError:
+        return None
+
+
+class RoadmapState:
+    """Completion percentage from the first line of ROAD_MAP.md, re-read only when the file changes.
+
+    `refresh()` costs a single stat call while the file's mtime and size
+    stay the same. Every change of percentage is appended to `history` as
+    (timestamp, percentage), and listeners registered with `add_listener`
+    are called as `listener(threshold, old, new)` whenever the percentage
+    crosses one of `thresholds` in either direction. The first reading is
+    the baseline and does not cross anything. Change listeners
+    (`add_change_listener`) get `listener(old, new)` for every change,
+    including the first reading with `old` None.
+    """
+
+    def __init__(self, path, thresholds=THRESHOLDS, history_size=1000):
+        self.path = path
+        self.thresholds = tuple(sorted(thresholds))
+        self.percentage = 0  # A missing file counts as 0%
+        self.history = deque(maxlen=history_size)
+        self.listeners = []
+        self.change_listeners = []
+        self._stat_key = ()  # (mtime, size) last read, None for a missing file; () before the first read
+        self._loaded = False
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def add_change_listener(self, listener):
+        self.change_listeners.append(listener)
+
+    def refresh(self):
+        """Return the current percentage, re-reading the file only if it changed."""
+        try:
+            stat = os.stat(self.path)
+            key = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            key = None
+        except OSError as e:
+            logging.error(f"Error checking {self.path}: {str(e)}")
+            return self.percentage
+        if key == self._stat_key:
+            return self.percentage
+
+        if key is None:
+            percentage = 0
+        else:
+            try:
+                with open(self.path, 'r') as f:
+                    percentage = parse_percentage(f.readline().strip())
+            except FileNotFoundError:
+                percentage = 0
+            except OSError as e:
+                logging.error(f"Error reading {self.path}: {str(e)}")
+                return self.percentage
+            # Recorded even if the line does not parse, so an unchanged file is not parsed again
+            self._stat_key = key
+            if percentage is None:
+                # Probably caught mid-edit; keep the last value until the line parses again
+                return self.percentage
+
+        self._stat_key = key
+        self._update(percentage)
+        return self.percentage
+
+    def _update(self, percentage):
+        old = self.percentage
+        first = not self._loaded
+        self._loaded = True
+        if not first and percentage == old:
+            return
+        self.percentage = percentage
+        self.history.append((time.time(), percentage))
+        self._notify(self.change_listeners, None if first else old, percentage)
+        if first:
+            logging.info(f"Roadmap progress: {percentage}%")
+            return
+
+        logging.info(f"Roadmap progress changed: {old}% -> {percentage}%")
+        low, high = min(old, percentage), max(old, percentage)
+        for threshold in self.thresholds:
+            # Crossing upwards means reaching the threshold; downwards means dropping below it
+            if low < threshold <= high:
+                self._notify(self.listeners, threshold, old, percentage)
+
+    def _notify(self, listeners, *args):
+        for listener in listeners:
+            try:
+                listener(*args)
+            except Exception as e:
+                logging.error(f"Error in roadmap listener: {str(e)}")
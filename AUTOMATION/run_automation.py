@@ -1,23 +1,11 @@
 #!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
 import os
+import sys
+import shlex
+import argparse
 import subprocess
-import time
 import logging
-from datetime import datetime
-
-# Set up logging
-log_dir = os.path.expanduser("~/automation_logs")
-os.makedirs(log_dir, exist_ok=True)
-log_file = os.path.join(log_dir, f"automation_runner_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+from log_setup import setup_logging
 
 def create_tmux_session(session_name, script_dir):
     """Create and configure tmux session with four panes."""
@@ -58,12 +46,9 @@ def create_tmux_session(session_name, script_dir):
                 return False
             logging.info(description)
         
-        # Set up pyenv initialization
-        pyenv_init = (
-            "eval \"$(pyenv init -)\" && "
-            "eval \"$(pyenv init --path)\" && "
-            "pyenv shell 3.10.0 && "
-        )
+        # Start every pane with this interpreter directly; running `pyenv init`
+        # in each pane cost more than the component's own start-up
+        python = shlex.quote(sys.executable)
         
         # Start components in each pane
         components = [
@@ -73,8 +58,19 @@ def create_tmux_session(session_name, script_dir):
             ("instruction_typer.py", "0.3", "Instruction Typer")
         ]
         
+        # Capture service runs in its own window and feeds all detectors
+        capture_cmd = f"cd {script_dir} && {python} capture_service.py"
+        capture_result = subprocess.run(
+            ["tmux", "new-window", "-d", "-t", f"{session_name}:1", "-n", "capture", capture_cmd],
+            capture_output=True, text=True
+        )
+        if capture_result.returncode != 0:
+            logging.error(f"Failed to start Capture Service: {capture_result.stderr}")
+            return False
+        logging.info("Started Capture Service in window 1")
+        
         for script, pane, name in components:
-            cmd = f"cd {script_dir} && {pyenv_init} python {script}"
+            cmd = f"cd {script_dir} && AUTOMATION_SHARED_CAPTURE=1 {python} {script}"
             start_result = subprocess.run(
                 ["tmux", "send-keys", "-t", f"{session_name}:{pane}", cmd, "Enter"], 
                 capture_output=True, text=True
@@ -96,7 +92,43 @@ def create_tmux_session(session_name, script_dir):
         logging.error(f"Comprehensive error in create_tmux_session: {str(e)}")
         return False
 
-def main():
+def run_async():
+    """Run every component as an asyncio task in this process instead of tmux panes."""
+    import asyncio
+    from orchestrator import Orchestrator
+    from pid_registry import register_process
+    from metrics import start_metrics
+    
+    logging.info("Starting components in a single asyncio process...")
+    # Same setup as orchestrator.main(), which would replace this runner's logging
+    register_process("orchestrator")
+    start_metrics("orchestrator")
+    try:
+        asyncio.run(Orchestrator().run())
+    except KeyboardInterrupt:
+        logging.info("Automation stopped by user")
+
+def run_supervised(script_dir):
+    """Run every component as a supervised child process that is restarted on crashes and hangs."""
+    from supervisor import Supervisor
+    
+    logging.info("Starting components under the supervisor...")
+    env = dict(os.environ, AUTOMATION_SHARED_CAPTURE="1")
+    Supervisor(script_dir, env=env).run()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Start the automation components.")
+    parser.add_argument(
+        "--mode", choices=["tmux", "async", "supervised"], default="tmux",
+        help="tmux: one interpreter per component in tmux panes (default); "
+             "async: all components as asyncio tasks in one process; "
+             "supervised: child processes restarted on crashes and hangs"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging("automation_runner")
     try:
         logging.info("Starting automation system...")
         
@@ -115,6 +147,13 @@ def main():
                 os.chmod(file_path, 0o666)
                 logging.info(f"Created signal file: {file}")
         
+        if args.mode == "async":
+            run_async()
+            return
+        if args.mode == "supervised":
+            run_supervised(script_dir)
+            return
+        
         # Set session name
         session_name = "automation"
         
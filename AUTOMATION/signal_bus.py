@@ -0,0 +1,395 @@
+import os
+import json
+import time
+import socket
+import queue
+import select
+import logging
+from collections import deque
+from signal_file import SignalFileWriter, SignalFileReader
+from metrics import counter, timer
+
+WORKING_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Message:
+    """Base class for typed signals sent between components."""
+
+    type = None
+
+    def __init__(self, timestamp=None):
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    def to_dict(self):
+        return {"type": self.type, "timestamp": self.timestamp}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(timestamp=data.get("timestamp"))
+
+    def to_file_text(self):
+        """Legacy signal-file representation."""
+        raise NotImplementedError
+
+    @classmethod
+    def from_file_text(cls, text, timestamp=None):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_dict()})"
+
+
+class ClickSignal(Message):
+    """Blue was detected at `positions`; the clicker should act."""
+
+    type = "click"
+
+    def __init__(self, positions=(), timestamp=None):
+        super().__init__(timestamp)
+        self.positions = [tuple(pos) for pos in positions]
+
+    def to_dict(self):
+        data = super().to_dict()
+        data["positions"] = [list(pos) for pos in self.positions]
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("positions", ()), data.get("timestamp"))
+
+    def to_file_text(self):
+        return "".join(f"{x},{y}\n" for x, y in self.positions)
+
+    @classmethod
+    def from_file_text(cls, text, timestamp=None):
+        positions = []
+        for line in text.splitlines():
+            parts = line.strip().split(",")
+            if len(parts) == 2:
+                positions.append((int(parts[0]), int(parts[1])))
+        return cls(positions, timestamp)
+
+
+class MotionSignal(Message):
+    """Motion was seen at the monitored position."""
+
+    type = "motion"
+
+    def to_file_text(self):
+        return f"{self.timestamp}"
+
+    @classmethod
+    def from_file_text(cls, text, timestamp=None):
+        try:
+            return cls(float(text.strip()))
+        except ValueError:
+            return cls(timestamp)
+
+
+MESSAGE_TYPES = {cls.type: cls for cls in (ClickSignal, MotionSignal)}
+
+# Channel name -> message type. Channel names double as the legacy file names.
+CHANNELS = {
+    "click_positions": ClickSignal,
+    "motion_status": MotionSignal,
+}
+
+# What SignalSender.send() did with a message
+ACKNOWLEDGED = "acknowledged"
+UNACKNOWLEDGED = "unacknowledged"  # Sent over the socket, no ack within ack_timeout
+FILE_FALLBACK = "file"  # No listener on the socket; written to the legacy signal file
+FAILED = "failed"
+
+
+def _record_delivery(latency, message):
+    """Note how long `message` took from creation to the receiver (wall clock, so across processes)."""
+    if message is not None:
+        latency.observe(max(0.0, time.time() - message.timestamp))
+    return message
+
+
+def socket_path(channel, working_dir=WORKING_DIR):
+    return os.path.join(working_dir, f"{channel}.sock")
+
+
+class FileSignalAdapter:
+    """Read and write a channel through its legacy signal file.
+
+    Keeps scripts that still poll `click_positions` / `motion_status` working
+    while the components migrate to the socket bus. Writes are atomic and
+    sequence-numbered (see signal_file.py), so a reader never sees a
+    half-written file and nothing has to be deleted to mark it handled.
+    """
+
+    def __init__(self, channel, working_dir=WORKING_DIR, poll_interval=0.1):
+        self.channel = channel
+        self.message_type = CHANNELS[channel]
+        self.path = os.path.join(working_dir, channel)
+        self.poll_interval = poll_interval
+        self._writer = None
+        self._reader = None
+
+    @property
+    def reader(self):
+        if self._reader is None:
+            self._reader = SignalFileReader(self.path, self.poll_interval)
+        return self._reader
+
+    def write(self, message):
+        if self._writer is None:
+            self._writer = SignalFileWriter(self.path)
+        self._writer.write(message.to_file_text(), message.timestamp)
+
+    def read(self):
+        """Return the newest unseen message in the signal file, or None."""
+        result = self.reader.read_new()
+        if result is None:
+            return None
+        _, timestamp, payload = result
+        if not payload.strip():
+            return None
+        return self.message_type.from_file_text(payload, timestamp)
+
+    def close(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+
+class SignalSender:
+    """Send typed messages on a channel and wait for the listener's acknowledgement.
+
+    If no listener is bound to the channel socket the message is written to
+    the legacy signal file instead, so older readers still see it.
+    """
+
+    def __init__(self, channel, working_dir=WORKING_DIR, ack_timeout=1.0, file_fallback=True):
+        self.channel = channel
+        self.path = socket_path(channel, working_dir)
+        self.ack_timeout = ack_timeout
+        self.file_adapter = FileSignalAdapter(channel, working_dir) if file_fallback else None
+        self.sock = None
+        self.buffer = b""
+        self.next_id = 1
+        self.sent_socket = counter("signals_sent_total", channel=channel, transport="socket")
+        self.sent_file = counter("signals_sent_total", channel=channel, transport="file")
+        self.unacknowledged = counter("signals_unacknowledged_total", channel=channel)
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.ack_timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+        self.buffer = b""
+
+    def _wait_for_ack(self, message_id):
+        deadline = time.monotonic() + self.ack_timeout
+        while True:
+            while b"\n" in self.buffer:
+                line, self.buffer = self.buffer.split(b"\n", 1)
+                if json.loads(line).get("ack") == message_id:
+                    return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout("No acknowledgement")
+            self.sock.settimeout(remaining)
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("Listener closed the connection")
+            self.buffer += chunk
+
+    def send(self, message):
+        """Deliver `message` and return how it went: ACKNOWLEDGED, UNACKNOWLEDGED, FILE_FALLBACK or FAILED."""
+        message_id = self.next_id
+        self.next_id += 1
+        data = message.to_dict()
+        data["id"] = message_id
+        payload = (json.dumps(data) + "\n").encode()
+
+        # One retry covers a listener that restarted since the last send
+        for _ in range(2):
+            try:
+                if self.sock is None:
+                    self._connect()
+                self.sock.sendall(payload)
+            except OSError:
+                self.close()
+                continue
+            self.sent_socket.inc()
+            try:
+                self._wait_for_ack(message_id)
+                return ACKNOWLEDGED
+            except socket.timeout:
+                # Delivered but the listener is busy; resending would duplicate it
+                self.unacknowledged.inc()
+                logging.warning(f"No acknowledgement for {message.type} message {message_id} on {self.channel}")
+                return UNACKNOWLEDGED
+            except (OSError, ValueError):
+                self.close()
+                return FAILED
+
+        if self.file_adapter is not None:
+            try:
+                self.file_adapter.write(message)
+                self.sent_file.inc()
+                return FILE_FALLBACK
+            except Exception as e:
+                logging.error(f"Error writing {self.channel} signal file: {str(e)}")
+        return FAILED
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+
+class SignalListener:
+    """Bind a channel socket and hand out messages with a blocking `receive`.
+
+    Every message is acknowledged to its sender as soon as it is read off
+    the socket. The legacy signal file is watched too (inotify/kqueue, or
+    polling), so messages from components that still write files are not
+    lost.
+    """
+
+    def __init__(self, channel, working_dir=WORKING_DIR, file_poll_interval=0.1):
+        self.channel = channel
+        self.path = socket_path(channel, working_dir)
+        self.file_adapter = FileSignalAdapter(channel, working_dir, file_poll_interval)
+        self.file_poll_interval = file_poll_interval
+        self.pending = deque()
+        self.clients = {}
+        self.latency = timer("signal_latency_seconds", channel=channel)
+
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.path)
+        os.chmod(self.path, 0o666)
+        self.server.listen(8)
+        self.server.setblocking(False)
+
+    def _drop(self, sock):
+        self.clients.pop(sock, None)
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+    def _read_client(self, sock):
+        try:
+            chunk = sock.recv(65536)
+        except OSError:
+            chunk = b""
+        if not chunk:
+            self._drop(sock)
+            return
+        buffer = self.clients[sock] + chunk
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            try:
+                data = json.loads(line)
+                message = MESSAGE_TYPES[data["type"]].from_dict(data)
+            except (ValueError, KeyError) as e:
+                logging.error(f"Dropping malformed {self.channel} message: {str(e)}")
+                continue
+            self.pending.append(message)
+            try:
+                sock.sendall((json.dumps({"ack": data.get("id")}) + "\n").encode())
+            except OSError:
+                self._drop(sock)
+                return
+        self.clients[sock] = buffer
+
+    def _poll_sockets(self, timeout):
+        watched = [self.server] + list(self.clients)
+        file_fd = self.file_adapter.reader.fileno()
+        if file_fd is not None:
+            watched.append(file_fd)
+        readable, _, _ = select.select(watched, [], [], max(0, timeout))
+        for sock in readable:
+            if sock == file_fd:
+                self.file_adapter.reader.drain()
+            elif sock is self.server:
+                try:
+                    client, _ = self.server.accept()
+                    client.setblocking(True)
+                    self.clients[client] = b""
+                except OSError:
+                    pass
+            elif sock in self.clients:
+                self._read_client(sock)
+
+    def receive(self, timeout=None):
+        """Block until a message arrives and return it, or return None after `timeout` seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.pending:
+                return _record_delivery(self.latency, self.pending.popleft())
+            message = self.file_adapter.read()
+            if message is not None:
+                return _record_delivery(self.latency, message)
+
+            # With file events available nothing needs polling
+            wait = self.file_poll_interval if self.file_adapter.reader.fileno() is None else 1.0
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                wait = min(wait, remaining)
+            self._poll_sockets(wait)
+
+    def close(self):
+        for sock in list(self.clients):
+            self._drop(sock)
+        self.file_adapter.close()
+        self.server.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class LocalSignalChannel:
+    """In-process channel with the same send/receive interface as the socket bus.
+
+    Used when components share one process (orchestrator.py). With a
+    `maxsize` the oldest undelivered message is dropped to make room, which
+    suits status channels that nobody may be reading.
+    """
+
+    def __init__(self, channel, maxsize=0):
+        self.channel = channel
+        self.queue = queue.Queue(maxsize)
+        self.sent = counter("signals_sent_total", channel=channel, transport="local")
+        self.latency = timer("signal_latency_seconds", channel=channel)
+
+    def send(self, message):
+        self.sent.inc()
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                return ACKNOWLEDGED
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def receive(self, timeout=None):
+        try:
+            return _record_delivery(self.latency, self.queue.get(timeout=timeout))
+        except queue.Empty:
+            return None
+
+    def close(self):
+        pass
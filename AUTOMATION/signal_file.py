@@ -0,0 +1,278 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import logging
+import tempfile
+
+# First line of every signal file: "#seq <n> <timestamp>"
+HEADER_PREFIX = "#seq "
+
+
+def _format(seq, payload, timestamp):
+    return f"{HEADER_PREFIX}{seq} {timestamp}\n{payload}"
+
+
+def _parse(text):
+    """Split a signal file into (seq, timestamp, payload).
+
+    Files without a header (written by older scripts) get seq None.
+    """
+    if text.startswith(HEADER_PREFIX):
+        header, _, payload = text.partition("\n")
+        parts = header[len(HEADER_PREFIX):].split()
+        try:
+            return int(parts[0]), float(parts[1]), payload
+        except (IndexError, ValueError):
+            pass
+    return None, None, text
+
+
+def read_signal_file(path):
+    """Return (seq, timestamp, payload) for a signal file, or None if it does not exist."""
+    try:
+        with open(path, "r") as f:
+            return _parse(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def atomic_write(path, text, mode=0o666):
+    """Replace `path` with `text` so readers see either the old or the new file, never a mix."""
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class SignalFileWriter:
+    """Write a signal file atomically with a monotonically increasing sequence number.
+
+    Data goes to a temp file in the same directory and is moved over the
+    target with os.replace, so readers always see either the previous or
+    the new complete file, never a partial one.
+    """
+
+    def __init__(self, path, mode=0o666):
+        self.path = path
+        self.mode = mode
+        self.seq = self._current_seq()
+
+    def _current_seq(self):
+        # Continue the sequence across restarts
+        try:
+            result = read_signal_file(self.path)
+        except PermissionError:
+            return 0
+        return (result and result[0]) or 0
+
+    def write(self, payload, timestamp=None):
+        """Publish `payload` and return its sequence number."""
+        self.seq += 1
+        atomic_write(self.path, _format(self.seq, payload, time.time() if timestamp is None else timestamp), self.mode)
+        return self.seq
+
+
+class _InotifyWatcher:
+    """Linux inotify on the signal file's directory, through ctypes."""
+
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    def __init__(self, path):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        directory = os.path.dirname(os.path.abspath(path)).encode()
+        if libc.inotify_add_watch(self.fd, directory, mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+        self.name = os.path.basename(path).encode()
+
+    def fileno(self):
+        return self.fd
+
+    def drain(self):
+        """Consume pending events; True if any concerned the watched file."""
+        try:
+            data = os.read(self.fd, 65536)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return False
+            raise
+        seen = False
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = struct.unpack_from("iIII", data, offset)
+            name = data[offset + 16:offset + 16 + length].rstrip(b"\0")
+            offset += 16 + length
+            seen = seen or name == self.name
+        return seen
+
+    def wait(self, timeout):
+        """Return True if the watched file may have changed within `timeout` seconds."""
+        readable, _, _ = select.select([self.fd], [], [], max(0, timeout))
+        return bool(readable) and self.drain()
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _KqueueWatcher:
+    """macOS/BSD kqueue on the signal file's directory and on the file itself.
+
+    Directory writes cover creates and atomic renames. Older scripts rewrite
+    the file in place, which only the file's own vnode reports, so the file
+    is watched too and re-opened whenever a rename replaces it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        self.file_fd = None
+        self.replaced = select.KQ_NOTE_DELETE | select.KQ_NOTE_RENAME
+        self.kq = select.kqueue()
+        # Registered now so fileno() is usable in select() before the first wait
+        self._register(self.dir_fd, select.KQ_NOTE_WRITE)
+        self._watch_file()
+
+    def _register(self, fd, fflags):
+        event = select.kevent(fd, filter=select.KQ_FILTER_VNODE,
+                              flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR, fflags=fflags)
+        self.kq.control([event], 0, 0)
+
+    def _watch_file(self):
+        # Closing the old descriptor also removes its event from the queue
+        if self.file_fd is not None:
+            os.close(self.file_fd)
+            self.file_fd = None
+        try:
+            self.file_fd = os.open(self.path, os.O_RDONLY)
+        except OSError:
+            return
+        self._register(self.file_fd, select.KQ_NOTE_WRITE | select.KQ_NOTE_EXTEND | self.replaced)
+
+    def _handle(self, events):
+        # The caller re-checks the sequence, so any event just means "look again"
+        if any(event.ident != self.file_fd or event.fflags & self.replaced
+               for event in events):
+            self._watch_file()
+        return bool(events)
+
+    def fileno(self):
+        return self.kq.fileno()
+
+    def drain(self):
+        return self._handle(self.kq.control(None, 8, 0))
+
+    def wait(self, timeout):
+        return self._handle(self.kq.control(None, 8, max(0, timeout)))
+
+    def close(self):
+        self.kq.close()
+        if self.file_fd is not None:
+            os.close(self.file_fd)
+        os.close(self.dir_fd)
+
+
+def _make_watcher(path):
+    try:
+        if sys.platform.startswith("linux"):
+            return _InotifyWatcher(path)
+        if hasattr(select, "kqueue"):
+            return _KqueueWatcher(path)
+    except Exception as e:
+        logging.warning(f"File watching unavailable for {path}, polling instead: {str(e)}")
+    return None
+
+
+class SignalFileReader:
+    """Wait for new versions of a signal file.
+
+    `wait` returns as soon as the file's sequence number moves past the
+    last one seen. It sleeps on inotify (Linux) or kqueue (macOS) events and
+    falls back to polling every `poll_interval` seconds where neither is
+    available. Files written without a sequence header by older scripts
+    are reported once per modification time.
+    """
+
+    def __init__(self, path, poll_interval=0.1, use_events=True):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.last_seq = 0
+        self.last_legacy_mtime = None
+        self.watcher = _make_watcher(path) if use_events else None
+        # Whatever is already there at startup has been handled by someone else
+        self.read_new()
+
+    def read_new(self):
+        """Return (seq, timestamp, payload) if the file changed since the last call, else None."""
+        try:
+            with open(self.path, "r") as f:
+                text = f.read()
+            mtime = os.path.getmtime(self.path)
+        except FileNotFoundError:
+            return None
+        seq, timestamp, payload = _parse(text)
+        if seq is None:
+            if not text.strip() or mtime == self.last_legacy_mtime:
+                return None
+            self.last_legacy_mtime = mtime
+            return None, mtime, payload
+        if seq == self.last_seq:
+            return None
+        # A lower sequence means the writer restarted without history; accept it
+        self.last_seq = seq
+        return seq, timestamp, payload
+
+    def fileno(self):
+        """Descriptor that becomes readable when the file may have changed, or None when polling."""
+        return None if self.watcher is None else self.watcher.fileno()
+
+    def drain(self):
+        """Clear pending change events after `fileno()` became readable."""
+        if self.watcher is not None:
+            self.watcher.drain()
+
+    def wait(self, timeout=None):
+        """Block until the file has a new version and return it, or None after `timeout` seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            result = self.read_new()
+            if result is not None:
+                return result
+            wait = self.poll_interval if self.watcher is None else 1.0
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                wait = min(wait, remaining)
+            if self.watcher is None:
+                time.sleep(wait)
+            else:
+                self.watcher.wait(wait)
+
+    def close(self):
+        if self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
@@ -0,0 +1,215 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import subprocess
+from kill_switch import should_stop
+from heartbeat import HEARTBEAT_DIR, read_heartbeat
+from signal_file import atomic_write
+from pid_registry import register_process
+
+# (name, script) of every component the supervisor manages. The name is
+# also the component's heartbeat name.
+COMPONENTS = [
+    ("capture_service", "capture_service.py"),
+    ("motion_detector", "motion_detector.py"),
+    ("blue_detector", "blue_detector.py"),
+    ("clicker", "clicker.py"),
+    ("instruction_typer", "instruction_typer.py"),
+]
+
+
+class ManagedComponent:
+    """One supervised child process and its restart bookkeeping."""
+
+    def __init__(self, name, script):
+        self.name = name
+        self.script = script
+        self.process = None
+        self.started_at = None
+        self.restarts = 0
+        self.backoff = 0
+        self.next_start = 0
+        self.finished = False
+        self.last_exit_code = None
+        self.last_loops = None
+        self.last_loops_time = None
+        self.loop_rate = 0.0
+
+    @property
+    def state(self):
+        if self.finished:
+            return "finished"
+        if self.process is None:
+            return "waiting"
+        return "running"
+
+    def status(self):
+        uptime = time.monotonic() - self.started_at if self.process is not None else 0
+        return {
+            "state": self.state,
+            "pid": self.process.pid if self.process is not None else None,
+            "uptime": round(uptime, 1),
+            "restarts": self.restarts,
+            "loop_rate": round(self.loop_rate, 2),
+            "last_exit_code": self.last_exit_code,
+        }
+
+
+class Supervisor:
+    """Launch the components as child processes and keep them alive.
+
+    A component that crashes (non-zero exit) or stops sending heartbeats
+    for `hang_timeout` seconds is restarted, with an exponential backoff
+    from `min_backoff` up to `max_backoff` that resets once it has stayed
+    up for `stable_after` seconds. A clean exit (kill switch, project
+    finished) is not restarted. Per-component status is written to
+    `heartbeats/supervisor_status.json` every check.
+    """
+
+    def __init__(self, script_dir, components=COMPONENTS, hang_timeout=30, check_interval=1.0,
+                 min_backoff=1, max_backoff=60, stable_after=60, status_log_interval=60, env=None):
+        self.script_dir = script_dir
+        self.components = [ManagedComponent(name, script) for name, script in components]
+        self.hang_timeout = hang_timeout
+        self.check_interval = check_interval
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.status_log_interval = status_log_interval
+        self.env = dict(os.environ if env is None else env)
+        self.status_file = os.path.join(HEARTBEAT_DIR, "supervisor_status.json")
+
+    def start(self, component):
+        component.process = subprocess.Popen(
+            [sys.executable, component.script],
+            cwd=self.script_dir,
+            env=self.env,
+            start_new_session=True  # Own process group so the whole tree can be signalled
+        )
+        component.started_at = time.monotonic()
+        component.last_loops = None
+        component.loop_rate = 0.0
+        logging.info(f"Started {component.name} (PID {component.process.pid})")
+
+    def stop(self, component, timeout=5):
+        """Terminate a component's process group, killing it if it does not exit in time."""
+        process = component.process
+        if process is None:
+            return
+        for sig, wait in ((signal.SIGTERM, timeout), (signal.SIGKILL, timeout)):
+            try:
+                os.killpg(process.pid, sig)
+            except ProcessLookupError:
+                break
+            try:
+                process.wait(wait)
+                break
+            except subprocess.TimeoutExpired:
+                continue
+        component.last_exit_code = process.poll()
+        component.process = None
+
+    def _schedule_restart(self, component, reason):
+        now = time.monotonic()
+        if component.started_at is not None and now - component.started_at >= self.stable_after:
+            component.backoff = 0
+        component.backoff = min(self.max_backoff, max(self.min_backoff, component.backoff * 2))
+        component.next_start = now + component.backoff
+        component.restarts += 1
+        logging.warning(f"{component.name} {reason}; restarting in {component.backoff}s (restart #{component.restarts})")
+
+    def _update_loop_rate(self, component, heartbeat):
+        loops = heartbeat.get("loops", 0)
+        if component.last_loops is not None and heartbeat["time"] > component.last_loops_time:
+            component.loop_rate = (loops - component.last_loops) / (heartbeat["time"] - component.last_loops_time)
+        if component.last_loops_time != heartbeat["time"]:
+            component.last_loops = loops
+            component.last_loops_time = heartbeat["time"]
+
+    def check(self, component):
+        """Start, restart or leave alone one component."""
+        if component.finished:
+            return
+        now = time.monotonic()
+
+        if component.process is None:
+            if now >= component.next_start:
+                self.start(component)
+            return
+
+        exit_code = component.process.poll()
+        if exit_code is not None:
+            component.last_exit_code = exit_code
+            component.process = None
+            if exit_code == 0:
+                component.finished = True
+                logging.info(f"{component.name} exited cleanly")
+            else:
+                self._schedule_restart(component, f"exited with code {exit_code}")
+            return
+
+        heartbeat = read_heartbeat(component.name)
+        if heartbeat is not None and heartbeat.get("pid") == component.process.pid:
+            self._update_loop_rate(component, heartbeat)
+            silent_for = time.time() - heartbeat["time"]
+        else:
+            # No heartbeat from this process yet; allow for startup
+            silent_for = now - component.started_at
+        if silent_for > self.hang_timeout:
+            self.stop(component)
+            self._schedule_restart(component, f"sent no heartbeat for {silent_for:.0f}s")
+
+    def status(self):
+        return {component.name: component.status() for component in self.components}
+
+    def write_status(self):
+        try:
+            os.makedirs(os.path.dirname(self.status_file), exist_ok=True)
+            atomic_write(self.status_file, json.dumps({"time": time.time(), "components": self.status()}, indent=2))
+        except Exception as e:
+            logging.error(f"Error writing supervisor status: {str(e)}")
+
+    def log_status(self):
+        for name, status in self.status().items():
+            logging.info(
+                f"{name}: {status['state']}, PID {status['pid']}, up {status['uptime']}s, "
+                f"{status['restarts']} restarts, {status['loop_rate']} loops/s"
+            )
+
+    def run(self):
+        """Supervise until the kill switch fires or every component has finished."""
+        try:
+            logging.info(f"Supervising {len(self.components)} components")
+            register_process("supervisor")
+            next_status_log = time.monotonic() + self.status_log_interval
+            while not should_stop():
+                for component in self.components:
+                    self.check(component)
+                self.write_status()
+                if time.monotonic() >= next_status_log:
+                    self.log_status()
+                    next_status_log = time.monotonic() + self.status_log_interval
+                if all(component.finished for component in self.components):
+                    logging.info("All components finished")
+                    break
+                time.sleep(self.check_interval)
+            logging.info("Supervisor stopping")
+        except KeyboardInterrupt:
+            logging.info("Supervisor stopped by user")
+        finally:
+            for component in self.components:
+                self.stop(component)
+            self.write_status()
+
+
+if __name__ == "__main__":
+    from log_setup import setup_logging
+
+    setup_logging("supervisor", level=logging.INFO)
+
+    env = dict(os.environ, AUTOMATION_SHARED_CAPTURE="1")
+    Supervisor(os.path.dirname(os.path.abspath(__file__)), env=env).run()
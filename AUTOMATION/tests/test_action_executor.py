@@ -0,0 +1,57 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from action_executor import ActionExecutor, RecordingBackend, focus, click, paste, key
+
+
+def test_batch_is_recorded_in_order():
+    backend = RecordingBackend()
+    executor = ActionExecutor(backend)
+    try:
+        ok = executor.run([
+            focus("Cursor"),
+            click(1306.7, 1029),
+            paste("continue"),
+            key("return", modifiers=("command", "shift")),
+        ], timeout=5)
+    finally:
+        executor.close()
+
+    assert ok is True
+    assert len(backend.batches) == 1
+    _, actions = backend.batches[0]
+    assert actions == [
+        {"action": "focus", "app": "Cursor"},
+        {"action": "click", "x": 1306, "y": 1029},
+        {"action": "paste", "text": "continue"},
+        {"action": "key", "key": "return", "modifiers": ["command", "shift"]},
+    ]
+
+
+def test_batches_run_in_submission_order():
+    backend = RecordingBackend()
+    executor = ActionExecutor(backend)
+    try:
+        futures = [executor.submit([click(i, i)]) for i in range(20)]
+        assert all(future.result(5) for future in futures)
+    finally:
+        executor.close()
+
+    assert [actions[0]["x"] for _, actions in backend.batches] == list(range(20))
+
+
+def test_close_stops_the_worker():
+    executor = ActionExecutor(RecordingBackend())
+    executor.run([key("tab")], timeout=5)
+    worker = executor.worker
+    assert worker.is_alive()
+
+    executor.close()
+
+    assert not worker.is_alive()
+    assert executor.worker is None
+    # A batch after close starts a fresh worker
+    assert executor.run([key("tab")], timeout=5) is True
+    executor.close()
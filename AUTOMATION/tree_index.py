@@ -0,0 +1,227 @@
+import os
+import re
+import time
+import fnmatch
+import logging
+
+# Same exclusions get_project_tree always passed to `tree -I`
+DEFAULT_IGNORE = ["node_modules", ".git", "__pycache__", "*.pyc"]
+
+_DIR, _FILE, _LINK = "dir", "file", "link"
+
+
+class _Listing:
+    """Cached, filtered and sorted contents of one directory."""
+
+    __slots__ = ("mtime_ns", "entries")
+
+    def __init__(self, mtime_ns, entries):
+        self.mtime_ns = mtime_ns
+        self.entries = entries  # [(name, kind, link_target)]
+
+
+class TreeIndex:
+    """In-process snapshot of a directory tree, refreshed incrementally.
+
+    `refresh()` stats every directory but only re-lists the ones whose
+    modification time changed, since adding, removing or renaming an entry
+    updates its parent directory's mtime. Files are never opened or
+    stat'ed on their own. Calls within `min_interval` seconds of the last
+    refresh reuse the snapshot as is.
+
+    Entries whose name matches one of the `ignore` fnmatch patterns are
+    left out, as are hidden entries unless `show_hidden` is set (which is
+    what `tree` does by default).
+    """
+
+    def __init__(self, root, ignore=DEFAULT_IGNORE, show_hidden=False, min_interval=1.0):
+        self.root = os.path.abspath(root)
+        self.ignore = list(ignore)
+        # One compiled regex instead of an fnmatch call per pattern per entry
+        self._ignore_match = re.compile("|".join(fnmatch.translate(p) for p in self.ignore)).match if self.ignore else None
+        self.show_hidden = show_hidden
+        self.min_interval = min_interval
+        self.listings = {}
+        self._totals = {}
+        self.last_refresh = None
+        self.relisted = 0  # Directories re-read by the last refresh
+
+    def is_ignored(self, name):
+        if not self.show_hidden and name.startswith("."):
+            return True
+        return self._ignore_match is not None and self._ignore_match(name) is not None
+
+    def _list(self, path):
+        entries = []
+        with os.scandir(path) as it:
+            for entry in it:
+                if self.is_ignored(entry.name):
+                    continue
+                try:
+                    if entry.is_symlink():
+                        entries.append((entry.name, _LINK, os.readlink(entry.path)))
+                    elif entry.is_dir():
+                        entries.append((entry.name, _DIR, None))
+                    else:
+                        entries.append((entry.name, _FILE, None))
+                except OSError:
+                    continue
+        entries.sort(key=lambda e: (e[0].lower(), e[0]))
+        return entries
+
+    def refresh(self, force=False):
+        """Bring the snapshot up to date; returns self."""
+        now = time.monotonic()
+        if not force and self.last_refresh is not None and now - self.last_refresh < self.min_interval:
+            return self
+
+        listings = {}
+        self.relisted = 0
+        stack = [""]
+        while stack:
+            relative = stack.pop()
+            path = os.path.join(self.root, relative) if relative else self.root
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            listing = self.listings.get(relative)
+            if listing is None or listing.mtime_ns != mtime_ns:
+                try:
+                    listing = _Listing(mtime_ns, self._list(path))
+                except OSError as e:
+                    logging.warning(f"Cannot list {path}: {str(e)}")
+                    listing = _Listing(mtime_ns, [])
+                self.relisted += 1
+            listings[relative] = listing
+            for name, kind, _ in listing.entries:
+                if kind == _DIR:
+                    stack.append(os.path.join(relative, name) if relative else name)
+
+        # Directories that disappeared drop out because they were not visited
+        self.listings = listings
+        self._totals = {}
+        self.last_refresh = now
+        return self
+
+    def counts(self, relative=""):
+        """Return (directories, files) below `relative` (default: the root, which is not counted)."""
+        if not self._totals:
+            # Deepest directories first, so every child is summed before its parent
+            for path in sorted(self.listings, key=lambda p: p.count(os.sep) + bool(p), reverse=True):
+                directories = files = 0
+                for name, kind, _ in self.listings[path].entries:
+                    if kind == _DIR:
+                        child_dirs, child_files = self._totals.get(os.path.join(path, name) if path else name, (0, 0))
+                        directories += 1 + child_dirs
+                        files += child_files
+                    else:
+                        files += 1
+                self._totals[path] = (directories, files)
+        return self._totals.get(relative, (0, 0))
+
+    def iter_lines(self, max_depth=None, max_dir_entries=None, collapse_over=None):
+        """Yield the tree lines (without the root label and footer) one at a time.
+
+        Directories deeper than `max_depth`, or holding more than
+        `collapse_over` entries in total, are shown as a single line with
+        their counts. At most `max_dir_entries` children are listed per
+        directory, followed by a line saying how many were left out.
+        """
+        # Explicit stack of (relative, prefix, depth, entry iterator) so deep trees cannot hit the recursion limit
+        stack = [("", "", 1, self._visible_entries("", max_dir_entries))]
+        while stack:
+            relative, prefix, depth, entries = stack[-1]
+            item = next(entries, None)
+            if item is None:
+                stack.pop()
+                continue
+            name, kind, target, last = item
+            branch = "└── " if last else "├── "
+            if kind is None:
+                yield f"{prefix}{branch}... {name}"
+                continue
+            if kind != _DIR:
+                yield f"{prefix}{branch}{name} -> {target}" if kind == _LINK else f"{prefix}{branch}{name}"
+                continue
+
+            child = os.path.join(relative, name) if relative else name
+            directories, files = self.counts(child)
+            listing = self.listings.get(child)
+            if (max_depth is not None and depth >= max_depth and listing is not None and listing.entries) or (
+                    collapse_over is not None and directories + files > collapse_over):
+                yield f"{prefix}{branch}{name}/ {describe_counts(directories, files)}"
+                continue
+            yield f"{prefix}{branch}{name}"
+            stack.append((child, prefix + ("    " if last else "│   "), depth + 1,
+                          self._visible_entries(child, max_dir_entries)))
+
+    def _visible_entries(self, relative, max_dir_entries):
+        listing = self.listings.get(relative)
+        entries = listing.entries if listing is not None else []
+        hidden = 0
+        if max_dir_entries is not None and len(entries) > max_dir_entries:
+            hidden = len(entries) - max_dir_entries
+            entries = entries[:max_dir_entries]
+        last_index = len(entries) - 1
+        for index, (name, kind, target) in enumerate(entries):
+            yield name, kind, target, index == last_index and not hidden
+        if hidden:
+            yield f"{hidden} more entries", None, None, True
+
+    def render(self, label=".", max_depth=None, max_dir_entries=None, collapse_over=None, max_bytes=None):
+        """Render the snapshot in the format of the `tree` command.
+
+        With no limits the output matches `tree`. `max_bytes` caps the UTF-8
+        size of the result; lines are streamed from `iter_lines` and the
+        walk stops as soon as the budget is used up.
+        """
+        directories, files = self.counts()
+        footer = (
+            f"\n{directories} director{'y' if directories == 1 else 'ies'}, "
+            f"{files} file{'' if files == 1 else 's'}\n"
+        )
+        truncated = "... (tree truncated)\n"
+        budget = None
+        if max_bytes is not None:
+            budget = max_bytes - len(label.encode()) - 1 - len(footer.encode()) - len(truncated.encode())
+
+        lines = [label]
+        for line in self.iter_lines(max_depth, max_dir_entries, collapse_over):
+            if budget is not None:
+                budget -= len(line.encode()) + 1
+                if budget < 0:
+                    lines.append(truncated.rstrip("\n"))
+                    break
+            lines.append(line)
+        return "\n".join(lines) + "\n" + footer
+
+
+def describe_counts(directories, files):
+    """Short summary like "12k files" or "1.2k files in 40 directories"."""
+    text = f"{_abbreviate(files)} file{'' if files == 1 else 's'}"
+    if directories:
+        text += f" in {_abbreviate(directories)} director{'y' if directories == 1 else 'ies'}"
+    return text
+
+
+def _abbreviate(count):
+    if count < 1000:
+        return str(count)
+    if count < 10000:
+        return f"{count / 1000:.1f}k"
+    if count < 1000000:
+        return f"{count // 1000}k"
+    return f"{count / 1000000:.1f}M"
+
+
+_indexes = {}
+
+
+def tree_index(root, ignore=DEFAULT_IGNORE):
+    """Return the shared TreeIndex for `root`, refreshed."""
+    key = (os.path.abspath(root), tuple(ignore))
+    index = _indexes.get(key)
+    if index is None:
+        index = _indexes[key] = TreeIndex(root, ignore)
+    return index.refresh()
@@ -0,0 +1,309 @@
+#!/Users/omarmaarouf/.pyenv/versions/3.10.0/bin/python
+import os
+import sys
+import time
+import logging
+import argparse
+from metrics import counter, timer
+from frame_source import rgb_to_gray
+from capture_planner import CapturePlanner
+from frame_hash import FingerprintCache
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+# Template sizes tried by a full scan, relative to the saved image
+# (0.5 and 2.0 cover a template saved on a display of the other density)
+DEFAULT_SCALES = (0.5, 0.75, 1.0, 1.25, 1.5, 2.0)
+
+MIN_TEMPLATE_SIZE = 8  # Smaller scaled templates match anything and are skipped
+
+
+class Template:
+    """A named button image, matched in grayscale; scaled copies are made once and kept."""
+
+    def __init__(self, name, image):
+        self.name = name
+        self.image = image  # (H, W) uint8 grayscale
+        self._scaled = {}
+
+    @classmethod
+    def load(cls, path):
+        """Load a template image; its name is the file name without the extension."""
+        import cv2
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE) if os.path.isfile(path) else None
+        if image is None:
+            raise ValueError(f"Cannot read template image {path}")
+        return cls(os.path.splitext(os.path.basename(path))[0], image)
+
+    def scaled(self, scale):
+        """The template resized by `scale`, or None if that makes it too small to match."""
+        import cv2
+        key = round(scale, 3)
+        if key not in self._scaled:
+            height, width = self.image.shape
+            size = (int(round(width * scale)), int(round(height * scale)))
+            if min(size) < MIN_TEMPLATE_SIZE:
+                self._scaled[key] = None
+            elif key == 1:
+                self._scaled[key] = self.image
+            else:
+                interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+                self._scaled[key] = cv2.resize(self.image, size, interpolation=interpolation)
+        return self._scaled[key]
+
+
+class UIElement:
+    """Where a template was last seen: top-left corner, size, scale and match score."""
+
+    __slots__ = ("name", "x", "y", "width", "height", "scale", "score")
+
+    def __init__(self, name, x, y, width, height, scale, score):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.score = score
+
+    @property
+    def box(self):
+        return (self.x, self.y, self.x + self.width, self.y + self.height)
+
+    @property
+    def center(self):
+        return (self.x + self.width // 2, self.y + self.height // 2)
+
+    def __repr__(self):
+        return f"UIElement({self.name!r}, box={self.box}, scale={self.scale:.2f}, score={self.score:.2f})"
+
+
+def match_best(gray, template_image):
+    """Best normalised-correlation match of `template_image` in `gray`: (score, (x, y)).
+
+    Returns (-1.0, None) when the template does not fit in the image.
+    """
+    import cv2
+    height, width = template_image.shape
+    if gray.shape[0] < height or gray.shape[1] < width:
+        return -1.0, None
+    result = cv2.matchTemplate(gray, template_image, cv2.TM_CCOEFF_NORMED)
+    _, score, _, location = cv2.minMaxLoc(result)
+    return score, location
+
+
+def _clip(box, bounds):
+    return (max(box[0], bounds[0]), max(box[1], bounds[1]), min(box[2], bounds[2]), min(box[3], bounds[3]))
+
+
+class UIStateEngine:
+    """Find known button templates on screen once, then follow them with small grabs.
+
+    `locate()` searches the whole `search_area` at every scale in `scales`.
+    The coarse pass works on a copy shrunk by `scan_downscale`. Each hit is
+    then refined at full resolution and kept if it scores at least
+    `threshold`. After that, `update()` only grabs the cached elements,
+    each padded by `margin` pixels, in as few grabs as CapturePlanner can
+    manage. Each element is first compared in place at its cached spot and
+    scale; only if that fails is the padded area searched, so a window that
+    moved a little is followed without a rescan. A full rescan runs
+    only when an element is lost, and at most every `rescan_interval`
+    seconds.
+    """
+
+    def __init__(self, templates, search_area, threshold=0.8, scales=DEFAULT_SCALES, margin=24,
+                 scan_downscale=0.5, rescan_interval=2.0):
+        self.templates = {template.name: template for template in templates}
+        self.search_area = tuple(search_area)
+        self.threshold = threshold
+        self.scales = tuple(scales)
+        self.margin = margin
+        self.scan_downscale = scan_downscale
+        self.rescan_interval = rescan_interval
+        self.elements = {name: None for name in self.templates}
+        self.last_scan = None
+        self.planner = None
+        self.fingerprints = FingerprintCache("ui_state")  # Areas unchanged since the last match are not matched again
+        self.scan_time = timer("ui_scan_seconds")
+        self.track_time = timer("ui_track_seconds")
+        self.scans = counter("ui_scans_total")
+        self.track_hits = counter("ui_track_total", result="hit")
+        self.track_misses = counter("ui_track_total", result="miss")
+
+    def _refine(self, gray, template, scale, x, y):
+        """Match `template` near (x, y) of the full-resolution `gray`, trying scales around `scale`."""
+        best = None
+        for candidate in (scale * 0.9, scale, scale * 1.1):
+            image = template.scaled(candidate)
+            if image is None:
+                continue
+            height, width = image.shape
+            x1, y1 = max(0, x - self.margin), max(0, y - self.margin)
+            window = gray[y1:y + height + self.margin, x1:x + width + self.margin]
+            score, location = match_best(window, image)
+            if location is not None and (best is None or score > best.score):
+                best = UIElement(template.name, x1 + location[0], y1 + location[1], width, height, candidate, score)
+        return best if best is not None and best.score >= self.threshold else None
+
+    def locate(self, grab):
+        """Search the whole search area for every template; returns the number found."""
+        import cv2
+
+        self.last_scan = time.monotonic()
+        self.scans.inc()
+        with self.scan_time.time():
+            frame = grab(self.search_area)
+            if frame is None:
+                return 0
+            gray = rgb_to_gray(frame)
+            factor = self.scan_downscale
+            small = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA) if factor < 1 else gray
+            left, top = self.search_area[:2]
+
+            for template in self.templates.values():
+                coarse = None
+                for scale in self.scales:
+                    image = template.scaled(scale * factor)
+                    if image is None:
+                        continue
+                    score, location = match_best(small, image)
+                    if location is not None and (coarse is None or score > coarse[0]):
+                        coarse = (score, location, scale)
+                element = None
+                if coarse is not None:
+                    # The shrunk copy blurs edges, so the coarse score is only a hint
+                    _, (x, y), scale = coarse
+                    element = self._refine(gray, template, scale, int(x / factor), int(y / factor))
+                if element is not None:
+                    element.x += left
+                    element.y += top
+                    logging.info(f"Found {element}")
+                elif self.elements[template.name] is not None:
+                    logging.info(f"Template {template.name} not found on screen")
+                self.elements[template.name] = element
+        self.planner = None
+        return sum(element is not None for element in self.elements.values())
+
+    def _plan(self, elements):
+        areas = [_clip((element.x - self.margin, element.y - self.margin,
+                        element.x + element.width + self.margin, element.y + element.height + self.margin),
+                       self.search_area) for element in elements]
+        if self.planner is None or self.planner.areas != areas:
+            self.planner = CapturePlanner(areas)
+        return areas
+
+    def track(self, grab):
+        """Re-match every cached element in a small area around it.
+
+        Returns [(element, region)] for the elements still in view; `region`
+        is the element's RGB pixels, valid until the next call. Elements
+        that cannot be matched are dropped from the cache.
+        """
+        elements = [element for element in self.elements.values() if element is not None]
+        if not elements:
+            return []
+        found = []
+        with self.track_time.time():
+            areas = self._plan(elements)
+            views = self.planner.capture(grab)
+            for element, area, view in zip(elements, areas, views):
+                image = self.templates[element.name].scaled(element.scale)
+                score, location = -1.0, None
+                if view is not None and self.fingerprints.unchanged((element.name, area), view):
+                    # Not a pixel changed since the button was last matched here
+                    self.track_hits.inc()
+                    x, y = element.x - area[0], element.y - area[1]
+                    found.append((element, view[y:y + element.height, x:x + element.width]))
+                    continue
+                if view is not None:
+                    # Usually the button has not moved: one comparison at the cached spot
+                    x, y = element.x - area[0], element.y - area[1]
+                    score, location = match_best(rgb_to_gray(view[y:y + element.height, x:x + element.width]), image)
+                    if location is not None and score >= self.threshold:
+                        location = (x, y)
+                    else:
+                        score, location = match_best(rgb_to_gray(view), image)
+                if location is None or not score >= self.threshold:  # Also rejects NaN from flat areas
+                    self.track_misses.inc()
+                    self.elements[element.name] = None
+                    self.fingerprints.forget((element.name, area))
+                    logging.info(f"Lost {element.name} (score {score:.2f})")
+                    continue
+                self.track_hits.inc()
+                element.x, element.y, element.score = area[0] + location[0], area[1] + location[1], score
+                found.append((element, view[location[1]:location[1] + element.height,
+                                            location[0]:location[0] + element.width]))
+        return found
+
+    def update(self, grab):
+        """Track the known elements, rescanning first if any are missing and a scan is due.
+
+        Returns [(element, region)] like track().
+        """
+        missing = any(element is None for element in self.elements.values())
+        if missing and (self.last_scan is None or time.monotonic() - self.last_scan >= self.rescan_interval):
+            self.locate(grab)
+        found = self.track(grab)
+        if len(found) < len(self.elements) and self.last_scan is not None \
+                and time.monotonic() - self.last_scan >= self.rescan_interval:
+            # Lost one while tracking; find it again straight away
+            self.locate(grab)
+            found = self.track(grab)
+        return found
+
+
+def load_templates(paths, base_dir=TEMPLATE_DIR):
+    """Load template images; relative paths are taken from `base_dir`."""
+    return [Template.load(os.path.join(base_dir, os.path.expanduser(path))) for path in paths]
+
+
+def screen_area():
+    """(0, 0, width, height) of the main screen."""
+    import pyautogui
+    width, height = pyautogui.size()
+    return (0, 0, int(width), int(height))
+
+
+def save_template(name, area, frame_source, directory=TEMPLATE_DIR):
+    """Grab `area` from the screen and save it as templates/<name>.png; returns the path."""
+    import cv2
+    frame = frame_source.grab(area)
+    if frame is None:
+        raise RuntimeError(f"Screen capture failed for area {area}")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.png")
+    cv2.imwrite(path, cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+    return path
+
+
+if __name__ == "__main__":
+    from frame_source import local_frame_source
+
+    parser = argparse.ArgumentParser(description="Save button templates and check that they are found on screen.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    capture_parser = commands.add_parser("capture", help="save a screen area as a template")
+    capture_parser.add_argument("name")
+    capture_parser.add_argument("area", nargs=4, type=int, metavar=("X1", "Y1", "X2", "Y2"))
+    locate_parser = commands.add_parser("locate", help="search the screen for templates")
+    locate_parser.add_argument("templates", nargs="+", help="template images (relative to templates/)")
+    locate_parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    source = local_frame_source()
+    try:
+        if args.command == "capture":
+            print(save_template(args.name, tuple(args.area), source))
+        else:
+            engine = UIStateEngine(load_templates(args.templates), screen_area(), threshold=args.threshold)
+            start = time.perf_counter()
+            found = engine.locate(source.grab)
+            print(f"Full scan: {found}/{len(engine.templates)} found in {(time.perf_counter() - start) * 1e3:.1f} ms")
+            start = time.perf_counter()
+            tracked = engine.track(source.grab)
+            print(f"Tracking: {len(tracked)} in view, {(time.perf_counter() - start) * 1e3:.1f} ms")
+            for element, _ in tracked:
+                print(f"  {element}")
+            sys.exit(0 if found == len(engine.templates) else 1)
+    finally:
+        source.close()
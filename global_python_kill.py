@@ -7,6 +7,9 @@ import signal
 import logging
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "AUTOMATION"))
+from pid_registry import terminate_registered
+
 # Set up logging
 log_dir = os.path.expanduser("~/automation_logs")
 os.makedirs(log_dir, exist_ok=True)
@@ -91,14 +94,23 @@ def kill_python_processes(force=False, exclude_current=True):
 def main():
     """Main function to handle different kill switch modes."""
     force_kill = False
+    scan_all = False
     
     # Check for force kill argument
-    if len(sys.argv) > 1 and sys.argv[1] in ['-f', '--force']:
+    if any(arg in ['-f', '--force'] for arg in sys.argv[1:]):
         force_kill = True
         logging.info("Force kill mode activated")
     
+    # Check for scanning every Python process even when automation is registered
+    if any(arg in ['-a', '--all'] for arg in sys.argv[1:]):
+        scan_all = True
+    
+    # Stop the registered automation process groups first; this needs no process table scan
+    killed_pids = terminate_registered(timeout=0 if force_kill else 2.0)
+    
     # Kill Python processes
-    killed_pids = kill_python_processes(force=force_kill)
+    if scan_all or not killed_pids:
+        killed_pids += kill_python_processes(force=force_kill)
     
     # Report results
     if killed_pids: